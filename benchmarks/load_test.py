@@ -0,0 +1,320 @@
+"""Load test of the job change calculator: many concurrent sessions with randomized inputs.
+
+Every simulated session opens the app, then reruns it ``--reruns`` times, each time with new random values of the
+main inputs (see ``RANDOM_NUMBERS``, ``RANDOM_CHECKBOXES`` and all radio buttons). The sessions run concurrently
+against one app process, like the users of one replica. Reported:
+
+* ``throughput``: finished reruns per second over all sessions (the time includes opening the sessions)
+* ``rerun_ms``: p50/p95/p99/max latency of a rerun, from the request until the script run has finished
+* ``rss_mib``: resident memory of the app process before the sessions (after a warm-up session), with all sessions
+  open, its peak and after the sessions have disconnected; ``per_session_mib`` is the growth per open session
+
+Two modes:
+
+* ``server`` (default): starts ``streamlit run streamlit_app.py`` and speaks Streamlit's websocket protocol, like
+  the browsers of real users (see startup_benchmark.py)
+* ``apptest``: runs the sessions in this process with Streamlit's AppTest harness, without server and network. AppTest
+  is not thread-safe, so the sessions are open at the same time, but rerun in turns; the latencies have no contention
+
+Usage::
+
+    python benchmarks/load_test.py --sessions 20 --reruns 10
+    python benchmarks/load_test.py --mode apptest --sessions 5 --output load.json
+    python benchmarks/load_test.py --max-p95-ms 500 --max-session-mib 5   # exit code 1 if a limit is exceeded
+
+Resident memory is read from /proc (Linux) or with psutil, if installed. Timings and memory are machine specific.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from startup_benchmark import REPO_ROOT, SERVER_TIMEOUT, free_port, start_server, wait_for_server
+
+# randomized inputs: label -> (low, high, whole numbers); all other inputs keep their values
+RANDOM_NUMBERS = {"Years until my retirement": (1, 45, True),
+                  "Current Job Salary (k€/year)": (30, 200, True),
+                  "New job Salary (k€/year)": (30, 200, True),
+                  "Expected annual salary increase rate (%)": (0.0, 5.0, False),
+                  "Compensation payment (k€)": (0, 300, True),
+                  "Annual payout from compensation payment (yearly/k€)": (0, 100, True),
+                  "Expected annual revenue from investment (%)": (0.0, 10.0, False),
+                  "Expected annual inflation rate (%)": (0.0, 5.0, False)}
+RANDOM_CHECKBOXES = ("I will receive a compensation payment", "Monthly payouts and investment revenue",
+                     "Calculate net income (Germany)")
+PERCENTILES = (50, 95, 99)
+MIB = 2 ** 20
+
+
+def random_value(rng: random.Random, label: str):
+    low, high, whole = RANDOM_NUMBERS[label]
+    return rng.randint(low, high) if whole else round(rng.uniform(low, high), 1)
+
+
+def resident_memory(pid: int) -> dict:
+    """Current and peak resident memory (bytes) of a process, empty if not available on this platform."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as file:
+            fields = dict(line.split(":", 1) for line in file if line.startswith(("VmRSS", "VmHWM")))
+        return {"rss": int(fields["VmRSS"].split()[0]) * 1024, "peak": int(fields["VmHWM"].split()[0]) * 1024}
+    except (OSError, KeyError):
+        pass
+    if importlib.util.find_spec("psutil") is not None:
+        import psutil
+
+        memory = psutil.Process(pid).memory_info()
+        return {"rss": memory.rss, "peak": getattr(memory, "peak_wset", memory.rss)}
+    return {}
+
+
+def summarize(latencies: list[float], seconds: float, memory: dict, sessions: int) -> dict:
+    latencies = sorted(latencies)
+    result = {"sessions": sessions, "reruns": len(latencies), "seconds": seconds,
+              "throughput": len(latencies) / seconds if seconds else 0.0}
+    if latencies:
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+        result["rerun_ms"] = {**{f"p{q}": quantiles[q - 1] for q in PERCENTILES}, "max": latencies[-1]}
+    if memory:
+        result["rss_mib"] = {name: value / MIB for name, value in memory.items()}
+        result["per_session_mib"] = (memory["open"] - memory["baseline"]) / MIB / sessions
+    return result
+
+
+# server mode: simulated browsers speaking the websocket protocol
+
+class WebsocketSession:
+    """One browser session: reruns the app with widget states and remembers the widgets of the last run."""
+
+    def __init__(self, port: int, rng: random.Random):
+        self.port = port
+        self.rng = rng
+        self.websocket = None
+        self.widgets = {}  # label -> (kind, widget proto) of the last run
+        self.states = {}  # widget id -> WidgetState sent with every rerun
+
+    async def open(self):
+        from tornado.websocket import websocket_connect
+
+        self.websocket = await websocket_connect(f"ws://127.0.0.1:{self.port}/_stcore/stream",
+                                                 max_message_size=256 * MIB)
+
+    def close(self):
+        self.websocket.close()
+
+    async def rerun(self, randomize: bool = True) -> float:
+        """Milliseconds until the script run has finished."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        if randomize:
+            self.randomize()
+        request = BackMsg()
+        request.rerun_script.query_string = ""
+        request.rerun_script.page_script_hash = ""
+        request.rerun_script.widget_states.widgets.extend(self.states.values())
+        start = time.perf_counter()
+        await self.websocket.write_message(request.SerializeToString(), binary=True)
+        widgets = {}
+        while True:
+            message = await asyncio.wait_for(self.websocket.read_message(), SERVER_TIMEOUT)
+            if message is None:
+                raise RuntimeError("The streamlit server closed the connection.")
+            forward_message = ForwardMsg()
+            forward_message.ParseFromString(message)
+            kind = forward_message.WhichOneof("type")
+            if kind == "script_finished":
+                elapsed = (time.perf_counter() - start) * 1000
+                self.widgets = widgets
+                return elapsed
+            if kind == "delta" and forward_message.delta.WhichOneof("type") == "new_element":
+                element = forward_message.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in ("number_input", "checkbox", "radio"):
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (element_type, widget)
+
+    def randomize(self):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        for label, (kind, widget) in self.widgets.items():
+            state = WidgetState(id=widget.id)
+            if kind == "number_input" and label in RANDOM_NUMBERS:
+                value = random_value(self.rng, label)
+                if widget.data_type == widget.INT:
+                    state.int_value = int(value)
+                else:
+                    state.double_value = float(value)
+            elif kind == "checkbox" and label in RANDOM_CHECKBOXES:
+                state.bool_value = self.rng.random() < 0.5
+            elif kind == "radio":
+                state.int_value = self.rng.randrange(len(widget.options))
+            else:
+                continue
+            self.states[widget.id] = state
+
+
+async def run_websocket_sessions(port: int, sessions: int, reruns: int, think_time: float, seed: int,
+                                 pid: int) -> tuple[list[float], float, dict]:
+    latencies = []
+    all_done = asyncio.Event()
+    closing = asyncio.Event()
+    done = 0
+
+    async def session(number: int):
+        nonlocal done
+        browser = WebsocketSession(port, random.Random(seed + number))
+        await browser.open()
+        try:
+            await browser.rerun(randomize=False)  # open the app
+            for _ in range(reruns):
+                await asyncio.sleep(think_time * browser.rng.random() * 2)
+                latencies.append(await browser.rerun())
+            done += 1
+            if done == sessions:
+                all_done.set()
+            await closing.wait()  # keep the session open until the memory of all sessions has been measured
+        finally:
+            browser.close()
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(session(number)) for number in range(sessions)]
+    waiting = asyncio.create_task(all_done.wait())
+    await asyncio.wait([waiting, *tasks], return_when=asyncio.FIRST_COMPLETED)
+    seconds = time.perf_counter() - start
+    memory = resident_memory(pid)
+    closing.set()
+    waiting.cancel()
+    await asyncio.gather(*tasks)  # raises the error of a failed session
+    return latencies, seconds, memory
+
+
+def load_test_server(sessions: int, reruns: int, think_time: float, seed: int) -> dict:
+    port = free_port()
+    process = start_server(port)
+    try:
+        wait_for_server(port, process)
+
+        async def warm_up():
+            browser = WebsocketSession(port, random.Random(seed - 1))
+            await browser.open()
+            try:
+                await browser.rerun(randomize=False)
+                await browser.rerun()
+            finally:
+                browser.close()
+
+        asyncio.run(warm_up())
+        time.sleep(1)
+        baseline = resident_memory(process.pid)
+        latencies, seconds, loaded = asyncio.run(run_websocket_sessions(port, sessions, reruns, think_time, seed,
+                                                                        process.pid))
+        time.sleep(2)  # let the server clean up the disconnected sessions
+        closed = resident_memory(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+    memory = {}
+    if baseline:
+        memory = {"baseline": baseline["rss"], "open": loaded["rss"], "peak": loaded["peak"], "closed": closed["rss"]}
+    return summarize(latencies, seconds, memory, sessions)
+
+
+# apptest mode: sessions in this process
+
+def open_apptest_session():
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(REPO_ROOT, "streamlit_app.py"), default_timeout=SERVER_TIMEOUT)
+    app.run()
+    return app
+
+
+def rerun_apptest_session(app, rng: random.Random) -> float:
+    """Milliseconds of a rerun with random inputs."""
+    for widget in app.number_input:
+        if widget.label in RANDOM_NUMBERS:
+            widget.set_value(random_value(rng, widget.label))
+    for widget in app.checkbox:
+        if widget.label in RANDOM_CHECKBOXES:
+            widget.set_value(rng.random() < 0.5)
+    for widget in app.radio:
+        widget.set_value(rng.choice(widget.options))
+    start = time.perf_counter()
+    app.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if app.exception:
+        raise RuntimeError(f"The app raised an exception: {app.exception[0].message}")
+    return elapsed
+
+
+def load_test_apptest(sessions: int, reruns: int, think_time: float, seed: int) -> dict:
+    # AppTest is not thread-safe: all sessions are open at the same time, but their reruns take turns
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(REPO_ROOT)  # the app loads images relative to the working directory
+    pid = os.getpid()
+    rerun_apptest_session(open_apptest_session(), random.Random(seed - 1))  # warm-up
+    baseline = resident_memory(pid)
+
+    latencies = []
+    start = time.perf_counter()
+    apps = [(open_apptest_session(), random.Random(seed + number)) for number in range(sessions)]
+    for _ in range(reruns):
+        for app, rng in apps:
+            latencies.append(rerun_apptest_session(app, rng))
+        time.sleep(think_time)
+    seconds = time.perf_counter() - start
+    loaded = resident_memory(pid)  # all sessions are still referenced by apps
+    apps.clear()
+    closed = resident_memory(pid)
+    memory = {}
+    if baseline:
+        memory = {"baseline": baseline["rss"], "open": loaded["rss"], "peak": loaded["peak"], "closed": closed["rss"]}
+    return summarize(latencies, seconds, memory, sessions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the job change calculator with concurrent sessions.")
+    parser.add_argument("--mode", choices=("server", "apptest"), default="server",
+                        help="Sessions against a local streamlit server (default) or the AppTest harness.")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions (default: 10).")
+    parser.add_argument("--reruns", type=int, default=10, help="Reruns with random inputs per session (default: 10).")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause between the reruns of a session in seconds (default: 0).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random inputs (default: 0).")
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if the p95 rerun latency exceeds this value.")
+    parser.add_argument("--max-session-mib", type=float, help="Fail if the memory per session exceeds this value.")
+    args = parser.parse_args(argv)
+
+    load_test = load_test_server if args.mode == "server" else load_test_apptest
+    result = load_test(args.sessions, args.reruns, args.think_time, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"python": sys.version.split()[0], "mode": args.mode, "results": result}, file, indent=2)
+    print(f"{'sessions':<20} {result['sessions']:>9}")
+    print(f"{'reruns':<20} {result['reruns']:>9}")
+    print(f"{'throughput':<20} {result['throughput']:>9.1f} reruns/s")
+    for name, ms in result.get("rerun_ms", {}).items():
+        print(f"{'rerun ' + name:<20} {ms:>9.1f}ms")
+    for name, mib in result.get("rss_mib", {}).items():
+        print(f"{'rss ' + name:<20} {mib:>9.1f}MiB")
+    if "per_session_mib" in result:
+        print(f"{'per session':<20} {result['per_session_mib']:>9.2f}MiB")
+
+    failures = []
+    if args.max_p95_ms is not None and result.get("rerun_ms", {}).get("p95", 0.0) > args.max_p95_ms:
+        failures.append(f"p95 rerun latency {result['rerun_ms']['p95']:.1f}ms > {args.max_p95_ms}ms")
+    if args.max_session_mib is not None and result.get("per_session_mib", 0.0) > args.max_session_mib:
+        failures.append(f"memory per session {result['per_session_mib']:.2f}MiB > {args.max_session_mib}MiB")
+    if failures:
+        sys.exit("Limits exceeded: " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
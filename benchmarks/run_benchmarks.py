@@ -0,0 +1,242 @@
+"""Benchmark suite of the job change calculator.
+
+Times every stage of a rerun separately over a matrix of years (1-100), with and without compensation payment and
+in both views ("Yearly"/"Overall sum"):
+
+* ``engine``: salary and compensation computation (projection, dataframe and key metrics)
+* ``cumsum``: the "Overall sum" cumsum/concat path (build_view_frames)
+* ``incremental``: rerun of the session's IncrementalProjection after a change of the new job's salary (only its
+  rows are recomputed) plus the overall sums from the prefix sums (cumulative_rows) and the key metrics
+* ``plot_bar_chart``, ``plot_line_chart``, ``plot_difference_bar_chart``, ``plot_difference_line_char``: melt and
+  build of each figure
+* ``app``: full script run through Streamlit's AppTest harness (result cache bypassed and the session's incremental
+  projection dropped, i.e. a real recalculation)
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --output results.json                 # run and save the results
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json   # run and compare, exit 1 on regression
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+
+A stage regresses if its fastest run is more than ``--threshold`` times the fastest run of the baseline and slower by
+more than ``--min-delta-ms`` (absolute noise floor); the minimum is much less affected by other processes than the
+median. Baselines are machine specific: create them on the machine that runs
+the comparison.
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from job_change_calculator import charts  # noqa: E402
+from job_change_calculator.engine import key_metrics, project  # noqa: E402
+from job_change_calculator.incremental import IncrementalProjection  # noqa: E402
+
+YEARS = (1, 10, 30, 60, 100)
+QUICK_YEARS = (10, 100)
+COMPENSATION = (False, True)
+VIEWS = ("Yearly", "Overall sum")
+CHART_TYPES = ("Bar charts", "Line charts")
+PLOT_FUNCTIONS = (("plot_bar_chart", 1), ("plot_line_chart", 1), ("plot_difference_bar_chart", 2),
+                  ("plot_difference_line_char", 2))  # function name, index of its dataframe in build_view_frames
+
+# inputs of the scenario, the same for all cases of the matrix
+CURRENT_JOB_SALARY = 100
+NEW_JOB_SALARY = 80
+SALARY_INCREASE_RATE = 0.02
+COMPENSATION_PAYMENT = 90
+COMPENSATION_ANNUAL_RATE = 25
+INVESTMENT_REVENUE_RATE = 0.05
+
+
+def measure(function, repeat: int) -> dict:
+    function()  # warm up
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()  # like timeit: a collection in the middle of a run is noise
+        try:
+            start = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            gc.enable()
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "repeat": repeat}
+
+
+def run_engine(years: int, compensation_paid: bool):
+    projection = project(years, CURRENT_JOB_SALARY, NEW_JOB_SALARY, SALARY_INCREASE_RATE, compensation_paid,
+                         COMPENSATION_PAYMENT, COMPENSATION_ANNUAL_RATE, INVESTMENT_REVENUE_RATE)
+    key_metrics(projection, COMPENSATION_PAYMENT if compensation_paid else 0)
+    return projection.to_frame()
+
+
+def run_incremental(incremental_projection: IncrementalProjection, years: int, compensation_paid: bool,
+                    new_job_salary: float):
+    projection = incremental_projection.project(years, CURRENT_JOB_SALARY, new_job_salary, SALARY_INCREASE_RATE,
+                                                compensation_paid, COMPENSATION_PAYMENT, COMPENSATION_ANNUAL_RATE,
+                                                INVESTMENT_REVENUE_RATE)
+    key_metrics(projection, COMPENSATION_PAYMENT if compensation_paid else 0)
+    return projection.cumulative_rows()
+
+
+def benchmark_stages(years_matrix, repeat: int) -> dict:
+    results = {}
+    for years, compensation_paid in itertools.product(years_matrix, COMPENSATION):
+        case = f"years={years},compensation={compensation_paid}"
+        results[f"engine[{case}]"] = measure(lambda: run_engine(years, compensation_paid), repeat)
+        incremental_projection = IncrementalProjection()
+        new_job_salaries = itertools.cycle((NEW_JOB_SALARY, NEW_JOB_SALARY + 1))  # every run is a change
+        results[f"incremental[{case}]"] = measure(
+            lambda: run_incremental(incremental_projection, years, compensation_paid, next(new_job_salaries)), repeat)
+        df = run_engine(years, compensation_paid)
+        for view in VIEWS:
+            view_case = f"{case},view={view}"
+            results[f"cumsum[{view_case}]"] = measure(
+                lambda: charts.build_view_frames(df, compensation_paid, view), repeat)
+            frames = charts.build_view_frames(df, compensation_paid, view)
+            for name, frame_index in PLOT_FUNCTIONS:
+                plot_function = getattr(charts, name)
+                results[f"{name}[{view_case}]"] = measure(
+                    lambda: plot_function(frames[frame_index], compensation_paid, view), repeat)
+    return results
+
+
+def benchmark_app(years_matrix, repeat: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(REPO_ROOT)  # the app loads images/logo.png relative to the working directory
+    results = {}
+    for years, compensation_paid, view, chart_type in itertools.product(years_matrix, COMPENSATION, VIEWS,
+                                                                        CHART_TYPES):
+        app = AppTest.from_file(os.path.join(REPO_ROOT, "streamlit_app.py"), default_timeout=120)
+        # recalculate instead of serving the shared result cache; the other cached resources (e.g. the chart warm-up
+        # thread) stay, as in a long-running server
+        app.session_state["bypass_result_cache"] = True
+        app.run()
+        set_inputs(app, years, compensation_paid, view, chart_type)
+
+        def rerun():
+            del app.session_state["incremental_projection"]  # a recalculation from scratch, not an incremental update
+            app.run()
+
+        results[f"app[years={years},compensation={compensation_paid},view={view},chart={chart_type}]"] = measure(
+            rerun, repeat)
+        if app.exception:
+            raise RuntimeError(f"The app raised an exception: {app.exception[0].message}")
+    return results
+
+
+def set_inputs(app, years: int, compensation_paid: bool, view: str, chart_type: str):
+    number_inputs = {widget.label: widget for widget in app.sidebar.number_input}
+    number_inputs["Years until my retirement"].set_value(years)
+    number_inputs["Expected annual salary increase rate (%)"].set_value(SALARY_INCREASE_RATE * 100)
+    if compensation_paid:
+        checkboxes = {widget.label: widget for widget in app.sidebar.checkbox}
+        checkboxes["I will receive a compensation payment"].check()
+        app.run()
+        number_inputs = {widget.label: widget for widget in app.sidebar.number_input}
+        number_inputs["Compensation payment (k€)"].set_value(COMPENSATION_PAYMENT)
+        number_inputs["Annual payout from compensation payment (yearly/k€)"].set_value(COMPENSATION_ANNUAL_RATE)
+        number_inputs["Expected annual revenue from investment (%)"].set_value(INVESTMENT_REVENUE_RATE * 100)
+    radios = {widget.label: widget for widget in app.radio}
+    radios["View"].set_value(view)
+    radios["Chart type"].set_value(chart_type)
+    app.run()
+
+
+def machine() -> str:
+    """CPU model and number of CPUs: the timings of a baseline only apply to the machine they were measured on."""
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as file:
+            cpu = next((line.split(":", 1)[1].strip() for line in file if line.startswith("model name")), cpu)
+    except OSError:
+        pass
+    return f"{cpu}, {os.cpu_count()} CPU(s)"
+
+
+def metadata() -> dict:
+    import numpy
+    import pandas
+    import plotly
+
+    return {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "machine": machine(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "plotly": plotly.__version__}
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """Print the comparison with the baseline and return the names of the regressed stages."""
+    regressions = []
+    print(f"{'stage (min)':<90} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<90} {'-':>10} {result['min_ms']:>8.3f}ms {'new':>7}")
+            continue
+        baseline_ms = baseline[name]["min_ms"]
+        ratio = result["min_ms"] / baseline_ms if baseline_ms else float("inf")
+        regressed = ratio > threshold and result["min_ms"] - baseline_ms > min_delta_ms
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<90} {baseline_ms:>8.3f}ms {result['min_ms']:>8.3f}ms {ratio:>7.2f}{marker}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the job change calculator.")
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file.")
+    parser.add_argument("--save-baseline", help="Save the results as new baseline to this file.")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Maximum allowed ratio current/baseline (default: 1.5).")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Slowdowns below this absolute difference are ignored as noise (default: 0.5).")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per stage (default: 10).")
+    parser.add_argument("--quick", action="store_true", help=f"Only years {QUICK_YEARS} instead of {YEARS}.")
+    parser.add_argument("--no-app", action="store_true", help="Skip the full script runs (AppTest).")
+    args = parser.parse_args(argv)
+
+    years_matrix = QUICK_YEARS if args.quick else YEARS
+    results = benchmark_stages(years_matrix, args.repeat)
+    if not args.no_app:
+        results.update(benchmark_app(years_matrix, max(3, args.repeat // 2)))
+    report = {"meta": metadata(), "results": results}
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline["meta"].get("machine") != report["meta"]["machine"]:
+            print(f"Warning: the baseline was measured on another machine ({baseline['meta'].get('machine')}), "
+                  f"this run on {report['meta']['machine']}.", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed by more than {args.threshold}x: "
+                  f"{', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+        print("\nNo regressions.")
+    elif not (args.output or args.save_baseline):
+        for name, result in results.items():
+            print(f"{name:<90} {result['median_ms']:>8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Startup benchmark of the job change calculator: import times and time to first render of a cold app.
+
+* ``import[<module>]``: import of a module in a fresh interpreter (incl. its dependencies, e.g. pandas for
+  plotly.express)
+* ``server``: start of ``streamlit run streamlit_app.py`` until the health endpoint answers
+* ``first_delta``, ``key_metrics``, ``first_chart``, ``script_finished``: time from the request of the first script
+  run of a new session (a fresh server process, i.e. a cold start) until the first element, the first key metric,
+  the first chart and the end of the run arrive at the client
+
+Usage::
+
+    python benchmarks/startup_benchmark.py                      # print the results
+    python benchmarks/startup_benchmark.py --output startup.json --repeat 5
+
+The client speaks Streamlit's websocket protocol directly (tornado and the protobuf messages ship with streamlit),
+so no browser is needed. Timings are machine specific.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTS = ("numpy", "pandas", "streamlit", "plotly.express", "job_change_calculator",
+           "job_change_calculator.charts")
+FIRST_RENDER_STAGES = ("server", "first_delta", "key_metrics", "first_chart", "script_finished")
+SERVER_TIMEOUT = 60
+
+
+def summarize(timings: list[float]) -> dict:
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "repeat": len(timings)}
+
+
+def import_time(module: str) -> float:
+    """Milliseconds to import ``module`` in a fresh interpreter."""
+    code = (f"import time; start = time.perf_counter(); import {module}; "
+            f"print((time.perf_counter() - start) * 1000)")
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, capture_output=True, text=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", "streamlit", "run", "streamlit_app.py", "--server.headless=true",
+                             f"--server.port={port}", "--server.address=127.0.0.1",
+                             "--browser.gatherUsageStats=false", "--server.fileWatcherType=none"],
+                            cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_for_server(port: int, process: subprocess.Popen):
+    deadline = time.perf_counter() + SERVER_TIMEOUT
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The streamlit server exited during startup.")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError(f"The streamlit server did not answer within {SERVER_TIMEOUT} s.")
+
+
+async def first_render(port: int) -> dict:
+    """Milliseconds from the rerun request of a new session until the milestones of the first script run."""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from tornado.websocket import websocket_connect
+
+    websocket = await websocket_connect(f"ws://127.0.0.1:{port}/_stcore/stream")
+    request = BackMsg()
+    request.rerun_script.query_string = ""
+    request.rerun_script.page_script_hash = ""
+    start = time.perf_counter()
+    await websocket.write_message(request.SerializeToString(), binary=True)
+    timings = {}
+    try:
+        while "script_finished" not in timings:
+            message = await asyncio.wait_for(websocket.read_message(), SERVER_TIMEOUT)
+            if message is None:
+                raise RuntimeError("The streamlit server closed the connection.")
+            forward_message = ForwardMsg()
+            forward_message.ParseFromString(message)
+            elapsed = (time.perf_counter() - start) * 1000
+            kind = forward_message.WhichOneof("type")
+            if kind == "script_finished":
+                timings["script_finished"] = elapsed
+            elif kind == "delta" and forward_message.delta.WhichOneof("type") == "new_element":
+                element = forward_message.delta.new_element.WhichOneof("type")
+                timings.setdefault("first_delta", elapsed)
+                if element == "metric":
+                    timings.setdefault("key_metrics", elapsed)
+                elif element == "plotly_chart":
+                    timings.setdefault("first_chart", elapsed)
+    finally:
+        websocket.close()
+    return timings
+
+
+def benchmark_first_render(repeat: int) -> dict:
+    timings = {stage: [] for stage in FIRST_RENDER_STAGES}
+    for _ in range(repeat):
+        port = free_port()
+        start = time.perf_counter()
+        process = start_server(port)
+        try:
+            wait_for_server(port, process)
+            timings["server"].append((time.perf_counter() - start) * 1000)
+            for stage, ms in asyncio.run(first_render(port)).items():
+                timings[stage].append(ms)
+        finally:
+            process.terminate()
+            process.wait()
+    return {stage: summarize(values) for stage, values in timings.items() if values}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cold start of the job change calculator.")
+    parser.add_argument("--output", help="Save the results as JSON to this file.")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold starts per measurement (default: 3).")
+    parser.add_argument("--no-server", action="store_true", help="Only measure the import times.")
+    args = parser.parse_args(argv)
+
+    results = {f"import[{module}]": summarize([import_time(module) for _ in range(args.repeat)])
+               for module in IMPORTS}
+    if not args.no_server:
+        results.update(benchmark_first_render(args.repeat))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"python": sys.version.split()[0], "results": results}, file, indent=2)
+    for name, result in results.items():
+        print(f"{name:<40} {result['median_ms']:>9.1f}ms (min {result['min_ms']:.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
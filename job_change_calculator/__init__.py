@@ -0,0 +1,16 @@
+"""Calculation core of the job change calculator (no Streamlit dependency)."""
+from job_change_calculator.breakeven import (breakeven_annual_payout, breakeven_new_job_salary,
+                                             required_investment_revenue)
+from job_change_calculator.career import CareerSchedule, Segment
+from job_change_calculator.engine import (Projection, compensation_payouts, key_metrics, key_metrics_batch, project,
+                                          salary_projection)
+from job_change_calculator.offers import OfferComparison, compare_offers
+from job_change_calculator.payout_plan import PayoutPlan, optimal_payouts
+from job_change_calculator.simulation import RateDistribution, SimulationResult, simulate
+from job_change_calculator.sweep import sweep
+from job_change_calculator.tax import GrossToNet
+
+__all__ = ["CareerSchedule", "GrossToNet", "OfferComparison", "PayoutPlan", "Projection", "RateDistribution",
+           "Segment", "SimulationResult", "breakeven_annual_payout", "breakeven_new_job_salary", "compare_offers",
+           "compensation_payouts", "key_metrics", "key_metrics_batch", "optimal_payouts", "project",
+           "required_investment_revenue", "salary_projection", "simulate", "sweep"]
@@ -0,0 +1,185 @@
+"""Local JSON HTTP API for the calculation (Python standard library only, plus NumPy).
+
+Usage::
+
+    python -m job_change_calculator.api [--host 127.0.0.1] [--port 8000]
+
+Endpoints:
+
+* ``POST /metrics``: key metrics of a scenario.
+* ``POST /projection``: yearly rows of the detailed calculation plus the key metrics of a scenario.
+* ``GET /health``
+
+The request body is either one scenario object or an array of scenarios (the response is an object or an array
+accordingly). A scenario has the fields ``years``, ``current_job_salary``, ``new_job_salary`` and optionally
+``salary_increase_rate``, ``compensation_paid``, ``compensation_payment``, ``compensation_annual_rate`` and
+``investment_revenue_rate`` (rates as fractions, e.g. 0.02 for 2%). ``compensation_paid`` is ``true`` or ``false``
+(default: whether there is a compensation payment), all other fields are numbers. A whole array is computed in one
+vectorized pass. Connections are kept alive (HTTP/1.1) and every response reports its processing time in the
+``Server-Timing`` header.
+"""
+import argparse
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from job_change_calculator.engine import OPTIONAL_INPUTS, REQUIRED_INPUTS, key_metrics_batch, project
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 16 * 2 ** 20
+MAX_YEARS = 100
+
+
+def scenario_arrays(scenarios: list) -> dict[str, np.ndarray]:
+    """Validated keyword arguments for :func:`key_metrics_batch` from a list of scenario objects."""
+    if not all(isinstance(scenario, dict) for scenario in scenarios):
+        raise ValueError("Every scenario must be a JSON object.")
+    if not all(isinstance(scenario.get("compensation_paid", False), bool) for scenario in scenarios):
+        raise ValueError("'compensation_paid' must be true or false.")
+    inputs = {}
+    try:
+        for name in REQUIRED_INPUTS:
+            inputs[name] = np.array([scenario[name] for scenario in scenarios], dtype=np.float64)
+        for name, default in OPTIONAL_INPUTS.items():
+            inputs[name] = np.array([scenario.get(name, default) for scenario in scenarios], dtype=np.float64)
+        inputs["compensation_paid"] = np.array(
+            [scenario.get("compensation_paid", scenario.get("compensation_payment", 0) > 0) for scenario in scenarios],
+            dtype=bool)
+    except KeyError as error:
+        raise ValueError(f"Missing field {error}.")
+    except (TypeError, ValueError):
+        raise ValueError("All scenario fields must be numbers.")
+    if not all(np.isfinite(values).all() for values in inputs.values()):  # e.g. 1e400
+        raise ValueError("All scenario fields must be finite numbers.")
+    years = inputs["years"]
+    if ((years < 0) | (years > MAX_YEARS) | (years != np.round(years))).any():
+        raise ValueError(f"'years' must be a whole number between 0 and {MAX_YEARS}.")
+    if (inputs["salary_increase_rate"] <= -1).any() or (inputs["investment_revenue_rate"] <= -1).any():
+        raise ValueError("Rates must be greater than -1.")
+    inputs["years"] = years.astype(np.intp)
+    return inputs
+
+
+def _reject_constant(name: str):
+    # json.loads accepts NaN, Infinity and -Infinity, which are no valid JSON
+    raise ValueError(f"Invalid number '{name}'.")
+
+
+def metrics_response(inputs: dict[str, np.ndarray]) -> list[dict]:
+    metrics = key_metrics_batch(**inputs)
+    columns = {name: values.tolist() for name, values in metrics.items()}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def projection_response(inputs: dict[str, np.ndarray]) -> list[dict]:
+    responses = metrics_response(inputs)
+    # scenarios with the same horizon and compensation flag share the rows of the projection
+    groups = np.stack([inputs["years"], inputs["compensation_paid"]], axis=1)
+    for years, compensation_paid in np.unique(groups, axis=0):
+        position = np.flatnonzero((inputs["years"] == years) & (inputs["compensation_paid"] == compensation_paid))
+        projection = project(int(years), inputs["current_job_salary"][position], inputs["new_job_salary"][position],
+                             inputs["salary_increase_rate"][position], bool(compensation_paid),
+                             inputs["compensation_payment"][position], inputs["compensation_annual_rate"][position],
+                             inputs["investment_revenue_rate"][position])
+        rows = {name: projection.values[i].tolist() for i, name in enumerate(projection.index)}
+        for j, scenario in enumerate(position):
+            responses[scenario] = {"rows": {name: values[j] for name, values in rows.items()},
+                                   "metrics": responses[scenario]}
+    return responses
+
+
+ENDPOINTS = {"/metrics": metrics_response, "/projection": projection_response}
+
+
+class CalculationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # small responses must not wait for the delayed ACK of the client
+    wbufsize = -1  # buffer headers and body, they are sent together when the request is done
+    server_version = "JobChangeCalculator"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"}, start)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint '{self.path}'."}, start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        endpoint = ENDPOINTS.get(self.path)
+        length = self.headers.get("Content-Length") or "0"
+        # the body cannot be skipped without a valid length: answer and close the connection
+        if not (length.isascii() and length.isdigit()):
+            self.close_connection = True
+            self._send_json(400, {"error": "Invalid Content-Length."}, start)
+            return
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "Request body too large."}, start)
+            return
+        body = self.rfile.read(length)  # read the body in any case, so that the connection can be reused
+        if endpoint is None:
+            self._send_json(404, {"error": f"Unknown endpoint '{self.path}'."}, start)
+            return
+        try:
+            request = json.loads(body, parse_constant=_reject_constant)
+            single = isinstance(request, dict)
+            scenarios = [request] if single else request
+            if not isinstance(scenarios, list):
+                raise ValueError("The request body must be a scenario object or an array of scenarios.")
+            response = endpoint(scenario_arrays(scenarios)) if scenarios else []
+        except ValueError as error:  # includes json.JSONDecodeError
+            self._send_json(400, {"error": str(error)}, start)
+            return
+        self._send_json(200, response[0] if single else response, start)
+
+    def _send_json(self, status: int, payload, start: float):
+        try:
+            data = json.dumps(payload, separators=(",", ":"), allow_nan=False).encode("utf-8")
+        except ValueError:  # a result overflowed, strict JSON has no NaN or Infinity
+            status = 500
+            data = json.dumps({"error": "The result is not a finite number."}).encode("utf-8")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Server-Timing", f"app;dur={elapsed_ms:.3f}")
+        self.end_headers()
+        self.wfile.write(data)
+        logger.info("%s %s %d %.3f ms", self.command, self.path, status, elapsed_ms)
+
+    def log_message(self, format, *args):
+        pass  # requests are logged with their latency in _send_json
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), CalculationHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m job_change_calculator.api",
+                                     description="Serve the job change calculation as JSON HTTP API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000).")
+    parser.add_argument("--log-requests", action="store_true", help="Log every request with its latency.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.log_requests else logging.WARNING, format="%(asctime)s %(message)s")
+    server = create_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Headless batch mode: score a CSV or Parquet file of scenarios without the Streamlit app.
+
+Usage::
+
+    python -m job_change_calculator.batch scenarios.csv results.csv [--yearly] [--chunk-size 50000] [--workers 4]
+
+Each input row is one scenario with the columns ``years``, ``current_job_salary``, ``new_job_salary`` and optionally
+``salary_increase_rate``, ``compensation_paid``, ``compensation_payment``, ``compensation_annual_rate`` and
+``investment_revenue_rate`` (rates as fractions, e.g. 0.02 for 2%; ``compensation_paid`` defaults to
+``compensation_payment > 0``). All other columns (e.g. an employee id) are copied to the output; CSV columns are
+read with fixed types (the scenario inputs as numbers, all other columns as text), so that every chunk has the same
+columns and types and the output has one header (CSV) or schema (Parquet) for all chunks.
+
+The input is read in chunks, every chunk is computed in one vectorized pass in a pool of worker processes and written
+out in input order as soon as it is ready, so memory stays bounded by ``chunk_size x workers``. By default one line
+with the key metrics is written per scenario; ``--yearly`` writes one line per scenario and year with the rows of
+the detailed calculation instead. Parquet input/output needs ``pyarrow``.
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from job_change_calculator.engine import (ANNUAL_COMPENSATION, COMPENSATION_ACCOUNT_BALANCE, CURRENT_JOB,
+                                          DIFFERENCE_NJ_CJ_COMP, KEY_METRICS, NEW_JOB, OPTIONAL_INPUTS,
+                                          REQUIRED_INPUTS, TOTAL_NEW_JOB, compensation_payouts, key_metrics_batch,
+                                          salary_projection)
+
+DEFAULT_CHUNK_SIZE = 50_000
+MAX_YEARS = 100
+YEARLY_ROWS = (CURRENT_JOB, NEW_JOB, ANNUAL_COMPENSATION, TOTAL_NEW_JOB, COMPENSATION_ACCOUNT_BALANCE,
+               DIFFERENCE_NJ_CJ_COMP)
+
+
+def result_columns(yearly: bool) -> list[str]:
+    """Columns appended to the input columns: the key metrics, or the year and the rows of the calculation."""
+    return ["year", *YEARLY_ROWS] if yearly else list(KEY_METRICS)
+
+
+def output_columns(input_columns, yearly: bool) -> list[str]:
+    """All columns of the output, in the order they are written (results replace input columns of the same name)."""
+    results = result_columns(yearly)
+    return [column for column in input_columns if column not in results] + results
+
+
+def csv_dtypes(input_columns) -> dict[str, str]:
+    """Types of the columns of a CSV input: the scenario inputs as numbers, all other columns as text."""
+    numeric = REQUIRED_INPUTS + tuple(OPTIONAL_INPUTS)
+    return {column: "float64" if column in numeric else "boolean" if column == "compensation_paid" else "string"
+            for column in input_columns}
+
+
+def input_columns(path: str) -> list[str]:
+    """Column names of the input file."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def output_schema(input_path: str, yearly: bool):
+    """Arrow schema of the Parquet output, fixed before the first chunk: the types of the input columns (from the
+    Parquet schema or :func:`csv_dtypes`) plus the result columns."""
+    import pyarrow as pa
+
+    if input_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        types = {field.name: field.type for field in pq.ParquetFile(input_path).schema_arrow}
+    else:
+        arrow_types = {"float64": pa.float64(), "boolean": pa.bool_(), "string": pa.string()}
+        types = {column: arrow_types[dtype] for column, dtype in csv_dtypes(input_columns(input_path)).items()}
+    results = result_columns(yearly)
+    types.update({column: pa.int64() if column == "year" else pa.float64() for column in results})
+    return pa.schema([(column, types[column]) for column in output_columns(types, yearly)])
+
+
+def scenario_inputs(chunk: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Validated keyword arguments for :func:`key_metrics_batch` from the columns of a chunk."""
+    missing = [column for column in REQUIRED_INPUTS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing input column(s): {', '.join(missing)}.")
+    inputs = {column: chunk[column].to_numpy(dtype=np.float64) for column in REQUIRED_INPUTS}
+    for column, default in OPTIONAL_INPUTS.items():
+        inputs[column] = (chunk[column].fillna(default).to_numpy(dtype=np.float64) if column in chunk.columns
+                          else np.full(len(chunk), default))
+    if "compensation_paid" in chunk.columns:
+        compensation_paid = chunk["compensation_paid"]
+        if not pd.api.types.is_bool_dtype(compensation_paid.dtype):
+            # e.g. a Parquet column of text or numbers (booleans with missing values arrive as objects)
+            is_bool = compensation_paid.map(lambda value: isinstance(value, (bool, np.bool_)))
+            invalid = ~(compensation_paid.isna() | is_bool)
+            if invalid.any():
+                raise ValueError(f"'compensation_paid' must be true or false (row(s) {_rows(chunk, invalid)}).")
+        inputs["compensation_paid"] = compensation_paid.astype("boolean").fillna(False).to_numpy(dtype=bool)
+    else:
+        inputs["compensation_paid"] = inputs["compensation_payment"] > 0
+    years = inputs["years"]
+    invalid = ~np.isfinite(years) | (years < 0) | (years > MAX_YEARS) | (years != np.round(years))
+    if invalid.any():
+        raise ValueError(f"'years' must be a whole number between 0 and {MAX_YEARS} (row(s) {_rows(chunk, invalid)}).")
+    inputs["years"] = years.astype(np.intp)
+    return inputs
+
+
+def _rows(chunk: pd.DataFrame, invalid) -> str:
+    # row numbers of the input file, 1 = first scenario (the index of a chunk continues over the chunks)
+    invalid = np.asarray(invalid)
+    return ", ".join(str(row + 1) for row in chunk.index[invalid][:10]) + (", ..." if invalid.sum() > 10 else "")
+
+
+def score_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Key metrics of every scenario of the chunk (one broadcasted pass)."""
+    metrics = key_metrics_batch(**scenario_inputs(chunk))
+    return chunk.assign(**metrics)
+
+
+def yearly_rows_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Rows of the detailed calculation in long format: one line per scenario and year."""
+    inputs = scenario_inputs(chunk)
+    compensation_payment = np.where(inputs["compensation_paid"], inputs["compensation_payment"], 0.0)
+    parts = []
+    # the final year pays out the remaining compensation, so scenarios are computed per horizon
+    for years in np.unique(inputs["years"]):
+        if years == 0:
+            continue
+        position = np.flatnonzero(inputs["years"] == years)
+        current_job = salary_projection(inputs["current_job_salary"][position],
+                                        inputs["salary_increase_rate"][position], years)
+        new_job = salary_projection(inputs["new_job_salary"][position], inputs["salary_increase_rate"][position],
+                                    years)
+        payouts, balance = compensation_payouts(compensation_payment[position],
+                                                inputs["compensation_annual_rate"][position],
+                                                inputs["investment_revenue_rate"][position], years)
+        part = chunk.iloc[np.repeat(position, years)].reset_index(drop=True)
+        part = part.assign(**{"year": np.tile(np.arange(1, years + 1), len(position)),
+                              CURRENT_JOB: current_job.ravel(),
+                              NEW_JOB: new_job.ravel(),
+                              ANNUAL_COMPENSATION: payouts.ravel(),
+                              TOTAL_NEW_JOB: (new_job + payouts).ravel(),
+                              COMPENSATION_ACCOUNT_BALANCE: balance.ravel(),
+                              DIFFERENCE_NJ_CJ_COMP: (new_job + payouts - current_job).ravel()})
+        part["_position"] = np.repeat(position, years)
+        parts.append(part)
+    if not parts:  # all horizons are 0: no lines, but the same columns and types as every other chunk
+        return chunk.iloc[:0].assign(year=np.array([], dtype=np.int64),
+                                     **{row: np.array([], dtype=np.float64) for row in YEARLY_ROWS})
+    # keep the input order of the scenarios
+    result = pd.concat(parts, ignore_index=True)
+    return result.sort_values(["_position", "year"], kind="stable").drop(columns="_position")
+
+
+def read_chunks(path: str, chunk_size: int):
+    """Yield the input file as DataFrames of at most ``chunk_size`` rows."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        start = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))  # row numbers of the file, like read_csv
+            start += len(chunk)
+            yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=csv_dtypes(input_columns(path)))
+
+
+def encode_header(columns: list[str]) -> bytes:
+    """CSV header line, written once from the fixed output columns."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8")
+    buffer = pa.BufferOutputStream()
+    pa_csv.write_csv(pa.table({column: pa.array([], pa.string()) for column in columns}), buffer,
+                     pa_csv.WriteOptions(include_header=True, quoting_style="needed"))
+    return buffer.getvalue().to_pybytes()
+
+
+def encode_chunk(result: pd.DataFrame, output_format: str, schema=None):
+    """Serialize a result chunk for the writer: CSV bytes (without header) or an Arrow table with the fixed
+    ``schema`` for Parquet."""
+    if output_format == "parquet":
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(result, schema=schema, preserve_index=False)
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return result.to_csv(header=False, index=False).encode("utf-8")
+    # pyarrow formats floats about ten times faster than DataFrame.to_csv
+    buffer = pa.BufferOutputStream()
+    pa_csv.write_csv(pa.Table.from_pandas(result, preserve_index=False), buffer,
+                     pa_csv.WriteOptions(include_header=False, quoting_style="needed"))
+    return buffer.getvalue().to_pybytes()
+
+
+def process_chunk(chunk: pd.DataFrame, yearly: bool, output_format: str, columns: list[str], schema=None):
+    """Compute and serialize one chunk (runs in the worker processes), with the fixed output ``columns``."""
+    result = yearly_rows_chunk(chunk) if yearly else score_chunk(chunk)
+    return encode_chunk(result[columns], output_format, schema)
+
+
+class ChunkWriter:
+    """Append encoded result chunks to a CSV or Parquet file."""
+
+    def __init__(self, path: str, output_format: str, columns: list[str], schema=None):
+        self.output_format = output_format
+        self._file = None
+        self._parquet_writer = None
+        if output_format == "csv":
+            self._file = open(path, "wb")
+            self._file.write(encode_header(columns))
+        else:
+            import pyarrow.parquet as pq
+
+            self._parquet_writer = pq.ParquetWriter(path, schema)
+
+    def write(self, encoded):
+        if self.output_format == "csv":
+            self._file.write(encoded)
+        else:
+            self._parquet_writer.write_table(encoded)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def run_batch(input_path: str, output_path: str, yearly: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              workers: int | None = None) -> int:
+    """Score all scenarios of ``input_path`` and write them to ``output_path``. Returns the number of scenarios."""
+    output_format = "parquet" if output_path.endswith(".parquet") else "csv"
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    columns = output_columns(input_columns(input_path), yearly)
+    schema = output_schema(input_path, yearly) if output_format == "parquet" else None
+    writer = ChunkWriter(output_path, output_format, columns, schema)
+    scenarios = 0
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(process_chunk(chunk, yearly, output_format, columns, schema))
+                scenarios += len(chunk)
+            return scenarios
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # at most two chunks per worker are in flight, results are written in input order
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(executor.submit(process_chunk, chunk, yearly, output_format, columns, schema))
+                scenarios += len(chunk)
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+        return scenarios
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m job_change_calculator.batch",
+                                     description="Compute the job change calculation for a file of scenarios.")
+    parser.add_argument("input", help="CSV or Parquet file, one scenario per row.")
+    parser.add_argument("output", help="CSV or Parquet file for the results.")
+    parser.add_argument("--yearly", action="store_true",
+                        help="Write the yearly rows of the detailed calculation instead of the key metrics.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Scenarios per chunk (default: {DEFAULT_CHUNK_SIZE}).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: number of CPUs, 1: no pool).")
+    args = parser.parse_args(argv)
+    try:
+        scenarios = run_batch(args.input, args.output, args.yearly, args.chunk_size, args.workers)
+    except (OSError, ValueError) as error:
+        parser.exit(1, f"error: {error}\n")
+    print(f"{scenarios} scenarios written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Break-even solver: input values at which the overall delta is exactly zero.
+
+The overall delta is linear in the new job salary and piecewise linear in the annual payout (one piece per year
+in which the compensation account is depleted), so both are solved in closed form. The required investment revenue
+has no closed form and is found with a vectorized bisection. All functions broadcast over their scenario inputs.
+Results are ``nan`` if no value breaks even and ``inf`` if every value does.
+
+With ``tax`` (see :mod:`job_change_calculator.tax`) the overall delta is computed from net amounts, the inputs and
+results stay gross. The net salary is not linear in the gross salary, so the break-even salary is found with the
+bisection as well; the payout is still solved in closed form, with the net compensation payment.
+With career schedules (see :mod:`job_change_calculator.career`) the salaries are summed up from the schedules; the
+overall delta stays linear in the starting salary of the new job.
+"""
+import numpy as np
+
+from job_change_calculator.engine import (annuity_factors, compensation_totals, growth_factors, key_metrics_batch,
+                                          net_compensation_payment, periodic_rate, salary_projection, salary_sums)
+
+MAX_INVESTMENT_REVENUE_RATE = 5.0  # 500%, the maximum of the app input
+
+
+def breakeven_new_job_salary(years, current_job_salary, salary_increase_rate, compensation_paid=False,
+                             compensation_payment=0.0, compensation_annual_rate=0.0, investment_revenue_rate=0.0,
+                             periods_per_year: int = 1, tax=None, iterations: int = 60, current_job_career=None,
+                             new_job_career=None) -> np.ndarray:
+    """Minimum starting salary of the new job for an overall delta >= 0 (0 if every salary breaks even)."""
+    if tax is not None:
+        return _breakeven_net_new_job_salary(years, current_job_salary, salary_increase_rate, compensation_paid,
+                                             compensation_payment, compensation_annual_rate, investment_revenue_rate,
+                                             periods_per_year, tax, iterations, current_job_career, new_job_career)
+    salary_sum = salary_sums(salary_increase_rate, years, new_job_career)
+    current_job_overall_salary = (np.asarray(current_job_salary, dtype=np.float64)
+                                  * salary_sums(salary_increase_rate, years, current_job_career))
+    compensation_total = np.where(compensation_paid, compensation_totals(compensation_payment,
+                                                                         compensation_annual_rate,
+                                                                         investment_revenue_rate, years,
+                                                                         periods_per_year), 0.0)
+    # overall delta = new * salary_sum - current job overall salary + compensation_total
+    with np.errstate(divide="ignore", invalid="ignore"):
+        salary = (current_job_overall_salary - compensation_total) / salary_sum
+    return np.where(salary_sum > 0, np.maximum(salary, 0.0), np.nan)
+
+
+def _breakeven_net_new_job_salary(years, current_job_salary, salary_increase_rate, compensation_paid,
+                                  compensation_payment, compensation_annual_rate, investment_revenue_rate,
+                                  periods_per_year: int, tax, iterations: int, current_job_career,
+                                  new_job_career) -> np.ndarray:
+    # the net overall delta grows with the gross salary of the new job, except for horizons of a year or two with a
+    # large compensation (a higher salary taxes it higher): then the bisection finds one of the break-even salaries.
+    # The current salary breaks even whenever the compensation is >= 0 (with career schedules: the bracket is widened
+    # until it does).
+    def overall_delta(salary):
+        return key_metrics_batch(years, current_job_salary, salary, salary_increase_rate, compensation_paid,
+                                 compensation_payment, compensation_annual_rate, investment_revenue_rate,
+                                 periods_per_year, tax, current_job_career, new_job_career)["overall_delta"]
+
+    high = np.asarray(current_job_salary, dtype=np.float64) + np.zeros(np.shape(overall_delta(0.0)))
+    if current_job_career is not None or new_job_career is not None:
+        high = _bracket(overall_delta, high)
+    low = np.zeros(high.shape)
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        ahead = overall_delta(middle) >= 0
+        high = np.where(ahead, middle, high)
+        low = np.where(ahead, low, middle)
+
+    salary = np.where(overall_delta(0.0) >= 0, 0.0, high)
+    return np.where((np.asarray(years) > 0) & (overall_delta(high) >= 0), salary, np.nan)
+
+
+def _bracket(overall_delta, high: np.ndarray, max_doublings: int = 10) -> np.ndarray:
+    # double the upper bound of the salary until it breaks even (the new job may pay less than its starting salary)
+    for _ in range(max_doublings):
+        ahead = overall_delta(high) >= 0
+        if ahead.all():
+            break
+        high = np.where(ahead, high, 2 * np.maximum(high, 1.0))
+    return high
+
+
+def breakeven_annual_payout(years: int, current_job_salary, new_job_salary, salary_increase_rate,
+                            compensation_payment, investment_revenue_rate, periods_per_year: int = 1,
+                            tax=None, current_job_career=None, new_job_career=None) -> np.ndarray:
+    """Maximum annual payout from the compensation for an overall delta >= 0.
+
+    A higher payout takes money out of the investment earlier, so the compensation incl. revenue never grows with the
+    payout. If the account is depleted in year d, the total payout is C * g^d + a * (d - A_d) with g = 1 + revenue
+    rate and A_d = g + ... + g^d, i.e. linear in the payout a. Depletion in year d happens for a between the running
+    minima of C * g^t / (1 + A_t); the final year always pays out the remaining balance. With ``periods_per_year``
+    the same holds per period (g is the growth per period), the result is the payout per period times
+    ``periods_per_year``. ``years`` must be a scalar, all other inputs broadcast.
+    """
+    compensation_payment = np.asarray(net_compensation_payment(compensation_payment, new_job_salary, tax),
+                                      dtype=np.float64)[..., None]
+    if tax is None and current_job_career is None and new_job_career is None:
+        target = ((np.asarray(current_job_salary, dtype=np.float64) - new_job_salary)
+                  * salary_sums(salary_increase_rate, years))
+    else:
+        target = (salary_projection(current_job_salary, salary_increase_rate, years, tax=tax,
+                                    career=current_job_career).sum(axis=-1)
+                  - salary_projection(new_job_salary, salary_increase_rate, years, tax=tax,
+                                      career=new_job_career).sum(axis=-1))
+    target = target[..., None]  # compensation total needed to break even
+    shape = np.broadcast_shapes(compensation_payment.shape[:-1], target.shape[:-1],
+                                np.shape(investment_revenue_rate))
+    if years == 0:
+        return np.full(shape, np.nan)
+
+    periods = years * periods_per_year
+    growth = growth_factors(periodic_rate(investment_revenue_rate, periods_per_year), periods)
+    annuity = annuity_factors(periodic_rate(investment_revenue_rate, periods_per_year), periods)
+    # the full payment can be made in year t as long as a <= C * g^t / (1 + A_t) holds in all years up to t
+    max_solvent_payout = np.minimum.accumulate(compensation_payment * growth / (1 + annuity), axis=-1)
+    upper = np.concatenate([np.full(max_solvent_payout.shape[:-1] + (1,), np.inf), max_solvent_payout[..., :-1]],
+                           axis=-1)
+    lower = max_solvent_payout.copy()
+    lower[..., -1] = 0.0  # the final year pays out the rest, whether or not the account covers the payment
+
+    slope = np.arange(periods) - annuity
+    intercept = compensation_payment * growth
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payout = (target - intercept) / slope
+    valid = (slope != 0) & (payout >= lower) & (payout <= upper) & (payout >= 0)
+    payout = np.max(np.where(valid, payout, -np.inf), axis=-1)
+
+    total_without_payout = compensation_payment[..., 0] * growth[..., -1]  # a = 0: everything is paid in the end
+    total_full_payout = compensation_payment[..., 0]  # a >= C: everything is paid in the first year
+    payout = np.where(total_full_payout >= target[..., 0], np.inf, payout)
+    payout = np.where(total_without_payout < target[..., 0], np.nan, payout)
+    return np.broadcast_to(payout * periods_per_year, shape)
+
+
+def required_investment_revenue(years, current_job_salary, new_job_salary, salary_increase_rate,
+                                compensation_payment, compensation_annual_rate, iterations: int = 60,
+                                periods_per_year: int = 1, tax=None, current_job_career=None,
+                                new_job_career=None) -> np.ndarray:
+    """Minimum annual investment revenue rate of the compensation for an overall delta >= 0 (bisection).
+
+    The compensation incl. revenue grows with the revenue rate, so the overall delta is monotonic and the root is
+    bracketed by 0 and :data:`MAX_INVESTMENT_REVENUE_RATE`.
+    """
+    def overall_delta(rate):
+        return key_metrics_batch(years, current_job_salary, new_job_salary, salary_increase_rate, True,
+                                 compensation_payment, compensation_annual_rate, rate,
+                                 periods_per_year, tax, current_job_career, new_job_career)["overall_delta"]
+
+    low = np.zeros(np.shape(overall_delta(0.0)))
+    high = np.full(low.shape, MAX_INVESTMENT_REVENUE_RATE)
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        ahead = overall_delta(middle) >= 0
+        high = np.where(ahead, middle, high)
+        low = np.where(ahead, low, middle)
+
+    rate = np.where(overall_delta(0.0) >= 0, 0.0, high)
+    return np.where(overall_delta(MAX_INVESTMENT_REVENUE_RATE) >= 0, rate, np.nan)
@@ -0,0 +1,163 @@
+"""Result cache shared by all sessions of the app.
+
+Results are keyed by the normalized scenario inputs (see :func:`scenario_key`) and kept in an in-memory LRU that is
+bounded by number of entries and by size (estimated from the arrays of a value, see :func:`estimate_size`, or its
+pickled size if it is persisted). Optionally the cache is backed by a SQLite file, so results survive a restart of the
+app; the file is bounded by size as well and evicts the least recently used entries.
+Cached values are shared between sessions and must be treated as read-only.
+"""
+import dataclasses
+import logging
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2  # increase when the calculation changes, so that persisted results are not reused
+
+
+def scenario_key(years, current_job_salary, new_job_salary, salary_increase_rate, compensation_paid=False,
+                 compensation_payment=0.0, compensation_annual_rate=0.0, investment_revenue_rate=0.0,
+                 periods_per_year=1, tax=None, current_job_career=None, new_job_career=None) -> tuple:
+    """Normalized input tuple: equal scenarios get equal keys, regardless of int/float or unused inputs.
+
+    ``tax`` (a frozen :class:`job_change_calculator.tax.GrossToNet` or None) and the career schedules (frozen
+    :class:`job_change_calculator.career.CareerSchedule` or None) are part of the key as they are.
+    """
+    if not compensation_paid:
+        compensation_payment = compensation_annual_rate = investment_revenue_rate = 0.0
+        periods_per_year = 1  # the salaries add up to the same yearly values
+    return (int(years), _normalize(current_job_salary), _normalize(new_job_salary),
+            _normalize(salary_increase_rate), bool(compensation_paid), _normalize(compensation_payment),
+            _normalize(compensation_annual_rate), _normalize(investment_revenue_rate), int(periods_per_year), tax,
+            current_job_career, new_job_career)
+
+
+def _normalize(value) -> float:
+    return round(float(value), 10) + 0.0  # + 0.0 turns -0.0 into 0.0
+
+
+def estimate_size(value, _seen: set | None = None) -> int:
+    """Approximate in-memory size of ``value`` in bytes, without serializing it.
+
+    Numpy arrays count their buffers, dataframes their columns (8 bytes per value of object columns), plotly figures
+    their traces (not the layout, which is mostly the template), containers and dataclasses their items. Objects
+    referenced more than once count once.
+    """
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "memory_usage") and hasattr(value, "index"):  # pandas dataframe or series
+        dtypes = value.dtypes if hasattr(value, "columns") else [value.dtype]
+        return sum(dtype.itemsize for dtype in dtypes) * len(value) + value.index.nbytes
+    if hasattr(value, "to_plotly_json") and hasattr(value, "data"):  # plotly figure
+        return sum(estimate_size(trace.to_plotly_json(), _seen) for trace in value.data)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(estimate_size(key, _seen) + estimate_size(item, _seen) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _seen) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return size + sum(estimate_size(getattr(value, field.name), _seen) for field in dataclasses.fields(value))
+    return size
+
+
+class ResultCache:
+    """Thread-safe LRU cache with optional SQLite persistence and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 256 * 2 ** 20, path: str | None = None,
+                 max_disk_bytes: int = 1024 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = dict(hits=0, disk_hits=0, misses=0, evictions=0, disk_evictions=0)
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                             "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+
+    def get_or_compute(self, key: tuple, compute):
+        """Return the cached value for ``key`` or compute, store and return it."""
+        db_key = repr((CACHE_VERSION, key))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return self._entries[key][0]
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (db_key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), db_key))
+                    self._counters["disk_hits"] += 1
+                    value = pickle.loads(row[0])
+                    self._store(key, value, len(row[0]))
+                    return value
+            self._counters["misses"] += 1
+
+        # compute outside the lock, so that other sessions are not blocked
+        value = compute()
+        if self._db is None:  # only persisted values are serialized
+            with self._lock:
+                self._store(key, value, estimate_size(value))
+            return value
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, value, len(data))
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (db_key, data, len(data), time.time()))
+            self._evict_disk()
+        return value
+
+    def _store(self, key, value, size: int):
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._counters["evictions"] += 1
+
+    def _evict_disk(self):
+        disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if disk_bytes <= self.max_disk_bytes:
+            return
+        # delete the least recently used entries until the file is back within its limit
+        cursor = self._db.execute("SELECT key, size FROM results ORDER BY accessed")
+        stale = []
+        for db_key, size in cursor:
+            if disk_bytes <= self.max_disk_bytes:
+                break
+            stale.append((db_key,))
+            disk_bytes -= size
+        self._db.executemany("DELETE FROM results WHERE key = ?", stale)
+        self._counters["disk_evictions"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def stats(self) -> dict:
+        """Counters for monitoring: hits, disk_hits, misses, evictions, disk_evictions, entries, bytes, hit_rate."""
+        with self._lock:
+            stats = dict(self._counters, entries=len(self._entries), bytes=self._bytes)
+        requests = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / requests if requests else 0.0
+        return stats
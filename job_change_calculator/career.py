@@ -0,0 +1,91 @@
+"""Career path of a job: promotions, raises, part-time and breaks as a schedule of segments.
+
+A segment starts in a year of the projection (1 = first year) and changes the salary once by ``salary_change``
+(e.g. 0.1 for a promotion with 10% more), then raises it every year by ``growth_rate`` until the next segment starts.
+``work_share`` scales the paid salary of the segment (0.5 for half time, 0 for a sabbatical) without changing the
+salary the next segments build on. Before the first segment the salary grows with the salary increase rate of the
+scenario, which also applies to segments without a growth rate of their own.
+
+Each segment is a geometric series, so the log salary is piecewise linear in the year: the level at the start of
+each segment is one cumulative sum over the segments, the salary of a year one lookup of its segment plus one
+exponential. Schedules of any length and batches of schedules (segments on the last axis) are evaluated without a
+loop over years or segments.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Phase of a career, from ``start_year`` until the next segment starts."""
+    start_year: int
+    salary_change: float = 0.0  # relative change of the salary at the start of the segment
+    growth_rate: float | None = None  # yearly salary increase within the segment, None: the scenario's rate
+    work_share: float = 1.0  # share of the salary paid in the segment (part-time, sabbatical)
+
+    def __post_init__(self):
+        if self.start_year < 1:
+            raise ValueError(f"The start year of a segment must be >= 1, got {self.start_year}.")
+        if self.salary_change <= -1:
+            raise ValueError(f"The salary change of a segment must be > -100%, got {self.salary_change}; "
+                             "use work_share=0 for a break.")
+        if self.growth_rate is not None and self.growth_rate <= -1:
+            raise ValueError(f"The growth rate of a segment must be > -100%, got {self.growth_rate}.")
+        if not 0 <= self.work_share <= 1:
+            raise ValueError(f"The work share of a segment must be between 0 and 1, got {self.work_share}.")
+
+
+@dataclass(frozen=True)
+class CareerSchedule:
+    """Segments of a career path, sorted by start year (hashable, so it can be part of a cache key)."""
+    segments: tuple[Segment, ...] = ()
+
+    def __post_init__(self):
+        object.__setattr__(self, "segments", tuple(sorted(self.segments, key=lambda segment: segment.start_year)))
+
+    def salary_factors(self, salary_increase_rate, years: int) -> np.ndarray:
+        """Paid salary per year relative to the starting salary, shape ``(..., years)``; broadcasts over
+        ``salary_increase_rate``."""
+        salary_increase_rate = np.asarray(salary_increase_rate, dtype=np.float64)[..., None]
+        # the scenario's growth from the first year until the first segment
+        start_years = np.array([1] + [segment.start_year for segment in self.segments], dtype=np.float64)
+        salary_changes = np.array([0.0] + [segment.salary_change for segment in self.segments])
+        work_shares = np.array([1.0] + [segment.work_share for segment in self.segments])
+        growth_rates = np.array([np.nan] + [np.nan if segment.growth_rate is None else segment.growth_rate
+                                            for segment in self.segments])
+        growth_rates = np.where(np.isnan(growth_rates), salary_increase_rate, growth_rates)
+        return career_factors(start_years, salary_changes, growth_rates, work_shares, years)
+
+
+def career_factors(start_years, salary_changes, growth_rates, work_shares, years: int) -> np.ndarray:
+    """Paid salary per year relative to the starting salary for schedules given as arrays of shape
+    ``(..., segments)`` (broadcast), sorted by start year, the first segment starting in year 1.
+
+    Returns shape ``(..., years)``. Within segment j the log salary is ``level_j + (t - start_j) * log(1 + g_j)``
+    with ``level_j = sum_{i<=j} log(1 + change_i) + sum_{i<j} (start_{i+1} - start_i) * log(1 + g_i)``.
+    """
+    start_years, salary_changes, growth_rates, work_shares = np.broadcast_arrays(
+        np.asarray(start_years, dtype=np.float64), np.asarray(salary_changes, dtype=np.float64),
+        np.asarray(growth_rates, dtype=np.float64), np.asarray(work_shares, dtype=np.float64))
+    starts = start_years - 1  # first year index of each segment
+    log_growth = np.log1p(growth_rates)
+    growth_until_next = np.zeros(starts.shape)
+    np.cumsum(np.diff(starts, axis=-1) * log_growth[..., :-1], axis=-1, out=growth_until_next[..., 1:])
+    levels = np.cumsum(np.log1p(salary_changes), axis=-1) + growth_until_next
+
+    t = np.arange(years, dtype=np.float64)
+    # segment of each year: the last one starting at or before it (segments sharing a start year: the last one)
+    if starts.ndim == 1:  # one schedule
+        segment = np.searchsorted(starts, t, side="right") - 1
+
+        def of_segment(values):
+            return values[segment]
+    else:
+        segment = np.sum(starts[..., None, :] <= t[:, None], axis=-1) - 1
+        segment = np.broadcast_to(segment, starts.shape[:-1] + (years,))
+
+        def of_segment(values):
+            return np.take_along_axis(values, segment, axis=-1)
+
+    return np.exp(of_segment(levels) + (t - of_segment(starts)) * of_segment(log_growth)) * of_segment(work_shares)
@@ -0,0 +1,287 @@
+"""Plotly figures of the app and the dataframes they are built from (no Streamlit dependency).
+
+The figures are built for display only: wide dataframes are decimated to at most ``MAX_POINTS_PER_TRACE`` points per
+trace (keeping the first and the last year), bars lose their value labels above ``MAX_BAR_LABELS`` bars and dense line
+charts are drawn with WebGL, so the figure payload and the render time in the browser stay bounded for any horizon.
+The dataframes (detailed table and export) always keep all columns.
+"""
+import pandas as pd
+import plotly.express as px
+
+from job_change_calculator.engine import (TYPE_OF_INCOME, CURRENT_JOB, NEW_JOB, ANNUAL_COMPENSATION, TOTAL_NEW_JOB,
+                                          DIFFERENCE_NJ_CJ, DIFFERENCE_NJ_CJ_COMP, CURRENT_JOB_CUM_SUM, NEW_JOB_CUM_SUM,
+                                          ANNUAL_COMPENSATION_SUM, TOTAL_NEW_JOB_SUM, CUM_SUM_NAMES, NOMINAL, REAL,
+                                          PRESENT_VALUE)
+from job_change_calculator.profiling import StageTimer
+
+# color scheme for the charts
+COLOR_CURRENT_JOB = "#83C9FF"
+COLOR_NEW_JOB = "#0068C9"
+COLOR_ANNUAL_COMPENSATION = "#FFB74D"
+COLOR_TOTAL_NEW_JOB = "#7F7F7F"
+COLOR_POSITIVE = "#4CAF50"
+COLOR_NEGATIVE = "#E57373"
+COLOR_DIFFERENCE = "#9C27B0"
+
+color_discrete_map = {CURRENT_JOB: COLOR_CURRENT_JOB,
+                      CURRENT_JOB_CUM_SUM: COLOR_CURRENT_JOB,
+                      NEW_JOB: COLOR_NEW_JOB,
+                      NEW_JOB_CUM_SUM: COLOR_NEW_JOB,
+                      ANNUAL_COMPENSATION: COLOR_ANNUAL_COMPENSATION,
+                      ANNUAL_COMPENSATION_SUM: COLOR_ANNUAL_COMPENSATION,
+                      TOTAL_NEW_JOB: COLOR_TOTAL_NEW_JOB,
+                      TOTAL_NEW_JOB_SUM: COLOR_TOTAL_NEW_JOB
+                      }
+
+# display limits of the figures
+MAX_POINTS_PER_TRACE = 60  # wider dataframes (horizons over 60 years) are decimated for display
+MAX_BAR_LABELS = 60  # no value labels inside the bars if a figure has more bars
+WEBGL_MIN_POINTS = 300  # line charts with more points are drawn with WebGL (scattergl) instead of SVG
+MAX_YEAR_TICKS = 25
+
+# title suffix of the figures per value terms (engine.VALUE_TERMS)
+VALUE_TERMS_TITLES = {NOMINAL: "", REAL: " in today's money (real)", PRESENT_VALUE: " (present value)"}
+
+
+def decimate(_df, _max_points=MAX_POINTS_PER_TRACE):
+    # keep every n-th column (counted back from the last one) and the first one, so that each row keeps its endpoints
+    # and has at most _max_points points
+    columns = len(_df.columns)
+    if columns <= _max_points:
+        return _df
+    step = -(-(columns - 1) // max(_max_points - 2, 1))  # ceil
+    positions = list(range((columns - 1) % step, columns, step))
+    if positions[0]:
+        positions.insert(0, 0)
+    return _df.iloc[:, positions]
+
+
+def year_tick_step(_df):
+    # full years only, but not more than MAX_YEAR_TICKS tick labels
+    return max(1, -(-int(max(_df.columns, default=1)) // MAX_YEAR_TICKS))
+
+
+def plot_bar_chart(_df, _compensation_paid, _data_type):
+    if _compensation_paid == 0:
+        title = "Comparison of current salary and new salary"
+    else:
+        title = "Comparison of current salary and new salary with compensation payment"
+    if _data_type == "Overall sum":
+        title = title + " (cumulative overall sum)"
+
+    _df = decimate(_df)
+    bar_labels = _df.size <= MAX_BAR_LABELS
+    # convert df into "longer" format, because it is easier for plotly
+    df_long = _df.reset_index().melt(id_vars=TYPE_OF_INCOME, var_name='Year', value_name='Income')
+    fig = px.bar(df_long,
+                 x='Year',
+                 y='Income',
+                 barmode='group',
+                 hover_data={TYPE_OF_INCOME: True, 'Income': True, 'Year': True},
+                 title=title,
+                 color=TYPE_OF_INCOME,
+                 color_discrete_map=color_discrete_map,
+                 text_auto=bar_labels  # show bar value(s) inside the bars
+                 )
+
+    # set legend
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.3,
+            xanchor="center",
+            x=0.5
+        ),
+        legend_title=None,
+        yaxis_title="Income (k€)",
+        title_font=dict(size=14, family="Arial", weight="normal"),
+        title_x=0.0,
+        title_y=0.85
+    )
+
+    if bar_labels:
+        fig.update_traces(texttemplate='%{y:.2f} k€', textposition='auto')  # format display values inside the bars
+
+    return fig
+
+
+def plot_line_chart(_df_cumsum, _compensation_paid, _data_type):
+    if _compensation_paid == 0:
+        title = "Comparison of current salary and new salary"
+    else:
+        title = "Comparison of current salary and new salary with compensation payment"
+    if _data_type == "Overall sum":
+        title = title + " (cumulative overall sum)"
+
+    _df_cumsum = decimate(_df_cumsum)
+    webgl = _df_cumsum.size > WEBGL_MIN_POINTS
+    # convert df into "longer" format, because it is easier for plotly
+    df_long = _df_cumsum.reset_index().melt(id_vars=TYPE_OF_INCOME, var_name='Year', value_name='Income')
+    fig = px.line(df_long,
+                  x='Year',
+                  y='Income',
+                  hover_data={TYPE_OF_INCOME: True, 'Income': True, 'Year': False},
+                  color=TYPE_OF_INCOME,
+                  title=title,
+                  color_discrete_map=color_discrete_map,
+                  markers=not webgl,
+                  render_mode="webgl" if webgl else "svg")
+
+    fig.update_xaxes(tickmode='linear', dtick=year_tick_step(_df_cumsum))  # only full years
+    # set legend
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.3,
+            xanchor="center",
+            x=0.5
+        ),
+        legend_title=None,
+        title_font=dict(size=14, family="Arial", weight="normal"),
+        title_x=0.0,
+        title_y=0.85,
+        yaxis=dict(range=[0, df_long['Income'].max() * 1.1]),  # y-axis start with '0'
+        yaxis_title="Income (k€)"
+    )
+    return fig
+
+
+def plot_difference_bar_chart(_df_diff, _compensation_paid, _data_type):
+    if _compensation_paid == 0:
+        # -> difference between CURRENT_JOB, NEW_JOB
+        title = f"Difference between {CURRENT_JOB} and {NEW_JOB}"
+    else:
+        # -> difference between CURRENT_JOB, TOTAL_NEW_JOB
+        title = f"Difference between '{CURRENT_JOB}' and '{TOTAL_NEW_JOB}'"
+    if _data_type == "Overall sum":
+        title = title + " (cumulative overall sum)"
+
+    _df_diff = decimate(_df_diff)
+    bar_labels = _df_diff.size <= MAX_BAR_LABELS
+    df_diff_t = _df_diff.T
+    df_diff_t = df_diff_t.reset_index()
+    df_diff_t.columns = ['Year', 'Difference']
+    # add colors: negative is red, positive is green
+    df_diff_t['Color'] = df_diff_t['Difference'].apply(lambda x: 'red' if x < 0 else 'green')
+    fig = px.bar(df_diff_t,
+                 x='Year',
+                 y='Difference',
+                 hover_data={'Difference': True, 'Year': True, "Color": False},
+                 title=title,
+                 color='Color',
+                 color_discrete_map={'red': COLOR_NEGATIVE, 'green': COLOR_POSITIVE},
+                 text='Difference' if bar_labels else None  # show 'difference' value inside the bars
+                 )
+
+    # set y axis to always display the "0"-line
+    y_min = min(df_diff_t['Difference'].min(), -5.0)
+    y_max = max(df_diff_t['Difference'].max(), 5.0)
+    fig.update_layout(yaxis=dict(range=[y_min, y_max * 1.1]),
+                      yaxis_title="Difference (k€)",
+                      showlegend=False,
+                      height=350,
+                      title_font=dict(size=14, family="Arial", weight="normal"),
+                      title_x=0.0,
+                      title_y=0.85
+                      )
+    if bar_labels:
+        fig.update_traces(texttemplate='%{text:.2f} k€', textposition='auto')  # format text in bars
+
+    return fig
+
+
+def plot_difference_line_char(_df_diff, _compensation_paid, _data_type):
+    if _compensation_paid == 0:
+        # -> difference between CURRENT_JOB, NEW_JOB
+        title = f"Difference between '{CURRENT_JOB}' and '{NEW_JOB}'"
+    else:
+        # -> difference between CURRENT_JOB, TOTAL_NEW_JOB
+        title = f"Difference between '{CURRENT_JOB}' and '{TOTAL_NEW_JOB}'"
+
+    if _data_type == "Overall sum":
+        title = title + " (cumulative overall sum)"
+
+    _df_diff = decimate(_df_diff)
+    webgl = _df_diff.size > WEBGL_MIN_POINTS
+    df_diff_t = _df_diff.T
+    df_diff_t = df_diff_t.reset_index()
+    df_diff_t.columns = ['Year', 'Difference']
+    fig = px.line(df_diff_t, x='Year', y='Difference', title=title, markers=not webgl,
+                  render_mode="webgl" if webgl else "svg")
+
+    fig.update_traces(line=dict(color=COLOR_DIFFERENCE))
+
+    # set y axis to always display the "0"-line
+    y_min = min(df_diff_t['Difference'].min(), -5.0)
+    y_max = max(df_diff_t['Difference'].max(), 5.0)
+    fig.update_layout(yaxis=dict(range=[y_min, y_max * 1.1]),
+                      yaxis_title="Income (k€)",
+                      showlegend=False,
+                      height=350,
+                      title_font=dict(size=14, family="Arial", weight="normal"),
+                      title_x=0.0,
+                      title_y=0.85
+                      )
+
+    return fig
+
+
+def build_view_frames(_df, _compensation_paid, _data_type, _df_cumsum=None):
+    # generate the dataframes for the different chart types (comparison/difference) and view modes (Yearly/Overall sum)
+    # _df_cumsum: optional overall sums of the projection (Projection.cumulative_frame), used instead of the cumsum
+    if _compensation_paid == 0:
+        comparison_rows = [CURRENT_JOB, NEW_JOB]
+        difference_rows = [DIFFERENCE_NJ_CJ]
+    else:
+        comparison_rows = [CURRENT_JOB, NEW_JOB, ANNUAL_COMPENSATION, TOTAL_NEW_JOB]
+        difference_rows = [DIFFERENCE_NJ_CJ_COMP]
+    df_4_comparison = _df.loc[comparison_rows]
+    df_4_difference = _df.loc[difference_rows]
+
+    if _data_type == "Overall sum":
+        # calculate the cumulative/overall sum for each year
+        if _df_cumsum is None:
+            df_4_comparison = df_4_comparison.cumsum(axis=1).rename(index=CUM_SUM_NAMES)
+            df_4_difference = df_4_difference.cumsum(axis=1).rename(index=CUM_SUM_NAMES)
+        else:
+            df_4_comparison = _df_cumsum.loc[[CUM_SUM_NAMES[row] for row in comparison_rows]]
+            df_4_difference = _df_cumsum.loc[[CUM_SUM_NAMES[row] for row in difference_rows]]
+        # append cumsum data to "main" df, because we want to print the df later
+        _df = pd.concat([_df, df_4_comparison, df_4_difference])
+
+    return _df, df_4_comparison, df_4_difference
+
+
+def build_view(_df, _compensation_paid, _data_type, _chart_type, _timer=None, _df_cumsum=None, _value_terms=NOMINAL):
+    # returns the dataframe for the detailed calculation and the comparison and difference figures
+    # _timer: optional StageTimer (job_change_calculator.profiling) that records the time of each step
+    # _value_terms: the value terms of _df (engine.VALUE_TERMS), only used for the titles
+    _timer = _timer or StageTimer(enabled=False)
+    with _timer.stage("cumsum"):
+        _df, df_4_comparison, df_4_difference = build_view_frames(_df, _compensation_paid, _data_type, _df_cumsum)
+    if _chart_type == "Line charts":
+        plot_comparison, plot_difference = plot_line_chart, plot_difference_line_char
+    else:
+        plot_comparison, plot_difference = plot_bar_chart, plot_difference_bar_chart
+    with _timer.stage(plot_comparison.__name__):
+        fig_comparison = plot_comparison(df_4_comparison, _compensation_paid, _data_type)
+    with _timer.stage(plot_difference.__name__):
+        fig_difference = plot_difference(df_4_difference, _compensation_paid, _data_type)
+    if VALUE_TERMS_TITLES[_value_terms]:
+        for fig in (fig_comparison, fig_difference):
+            fig.update_layout(title_text=fig.layout.title.text + VALUE_TERMS_TITLES[_value_terms])
+    return _df, fig_comparison, fig_difference
+
+
+def warm_up():
+    # build and serialize every chart once: the first figure of a process loads the templates and validators of plotly
+    from job_change_calculator.engine import project
+
+    projection = project(2, 100, 80, 0.02, True, 90, 25, 0.05)
+    for chart_type in ("Bar charts", "Line charts"):
+        _, fig_comparison, fig_difference = build_view(projection.to_frame(), True, "Overall sum", chart_type,
+                                                       _df_cumsum=projection.cumulative_frame())
+        fig_comparison.to_json()
+        fig_difference.to_json()
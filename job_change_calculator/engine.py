@@ -0,0 +1,405 @@
+"""Projection engine of the job change calculator.
+
+Pure NumPy implementation of the salary and compensation math shown in the Streamlit app. All functions broadcast
+over their scalar inputs, so a single call can evaluate one scenario or a whole batch of scenarios
+(shape ``(..., years)``). With ``periods_per_year=12`` the calculation runs month by month (shape
+``(..., years * 12)``): the salary is paid monthly and raised once a year, the annual payout is paid in monthly
+installments and the investment revenue compounds monthly at the same effective annual rate.
+With ``tax`` (a :class:`job_change_calculator.tax.GrossToNet`) all inputs are gross amounts and the results are net:
+the yearly salaries are converted to net salaries and the compensation payment is taxed as severance in the first
+year of the new job.
+With a career schedule per job (a :class:`job_change_calculator.career.CareerSchedule`: promotions, part-time,
+breaks) the salary follows the schedule instead of one constant increase rate.
+:meth:`Projection.adjusted` converts all rows to real terms (today's money, deflated with an inflation rate) and to
+present values (discounted with a discount rate) in one array pass.
+This module must not import streamlit.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+# income types (index values for dataframe) for "normal" yearly view:
+TYPE_OF_INCOME = "Type of income"
+CURRENT_JOB = "Salary current Job"
+NEW_JOB = "Salary new job"
+ANNUAL_COMPENSATION = "Compensation payment (annual)"
+COMPENSATION_ACCOUNT_BALANCE = "Remaining compensation (incl. investment revenue)"  # the remaining heigt of the compensation over the years
+TOTAL_NEW_JOB = f"Total: {NEW_JOB} + {ANNUAL_COMPENSATION}"
+DIFFERENCE_NJ_CJ = f"Difference {NEW_JOB} vs. {CURRENT_JOB}"
+DIFFERENCE_NJ_CJ_COMP = f"Difference {NEW_JOB} vs {CURRENT_JOB} + {ANNUAL_COMPENSATION}"
+
+# income types (index values for dataframe) for cummulated "Overall sum":
+CURRENT_JOB_CUM_SUM = f"Overall sum {CURRENT_JOB}"
+NEW_JOB_CUM_SUM = f"Overall sum {NEW_JOB}"
+ANNUAL_COMPENSATION_SUM = f"Overall sum {ANNUAL_COMPENSATION}"
+TOTAL_NEW_JOB_SUM = f"Overall sum {TOTAL_NEW_JOB}"
+DIFFERENCE_NJ_CJ_SUM = f"Overall sum {DIFFERENCE_NJ_CJ}"
+DIFFERENCE_NJ_CJ_COMP_SUM = f"Overall sum {DIFFERENCE_NJ_CJ_COMP}"
+
+CUM_SUM_NAMES = {CURRENT_JOB: CURRENT_JOB_CUM_SUM,
+                 NEW_JOB: NEW_JOB_CUM_SUM,
+                 ANNUAL_COMPENSATION: ANNUAL_COMPENSATION_SUM,
+                 TOTAL_NEW_JOB: TOTAL_NEW_JOB_SUM,
+                 DIFFERENCE_NJ_CJ: DIFFERENCE_NJ_CJ_SUM,
+                 DIFFERENCE_NJ_CJ_COMP: DIFFERENCE_NJ_CJ_COMP_SUM}
+
+# rows holding a balance (value at the end of the period); all other rows are flows, which add up over periods
+STOCK_ROWS = (COMPENSATION_ACCOUNT_BALANCE,)
+
+# value terms of a projection: nominal amounts, in today's money (inflation adjusted) and discounted to today
+NOMINAL = "Nominal"
+REAL = "Real"
+PRESENT_VALUE = "Present value"
+VALUE_TERMS = (NOMINAL, REAL, PRESENT_VALUE)
+
+# inputs of a scenario for key_metrics_batch: required names and the defaults of the optional ones
+# (compensation_paid defaults to compensation_payment > 0)
+REQUIRED_INPUTS = ("years", "current_job_salary", "new_job_salary")
+OPTIONAL_INPUTS = {"salary_increase_rate": 0.0, "compensation_payment": 0.0, "compensation_annual_rate": 0.0,
+                   "investment_revenue_rate": 0.0}
+# names of the key metrics returned by key_metrics and key_metrics_batch, in this order
+KEY_METRICS = ("current_job_salary_final", "new_job_salary_final", "current_job_overall_salary",
+               "new_job_overall_salary", "compensation_payment_incl_revenue", "investment_revenue", "overall_delta")
+
+
+def growth_factors(rate, periods: int, start: int = 0) -> np.ndarray:
+    """(1 + rate) ** t for t = start .. periods-1, broadcast over ``rate``."""
+    rate = np.asarray(rate, dtype=np.float64)[..., None]
+    t = np.arange(start, periods, dtype=np.float64)
+    return np.exp(t * np.log1p(rate))
+
+
+def year_discount_factors(rate, periods: int, periods_per_year: int = 1) -> np.ndarray:
+    """1 / (1 + rate) ** y for the year y of each period t = 0 .. periods-1, broadcast over ``rate``: all periods of a
+    year share its factor, so amounts of the first year are today's money."""
+    years = -(-periods // periods_per_year)  # ceil
+    return 1 / growth_factors(rate, years)[..., np.arange(periods) // periods_per_year]
+
+
+def annuity_factors(rate, periods: int, start: int = 0) -> np.ndarray:
+    """Sum of (1 + rate) ** k for k = 1 .. t, for t = start .. periods-1 (closed-form geometric series)."""
+    rate = np.asarray(rate, dtype=np.float64)[..., None]
+    t = np.arange(start, periods, dtype=np.float64)
+    # (1+r) * ((1+r)^t - 1) / r, written with expm1/log1p to stay exact for small rates; rate 0 -> t
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factors = (1 + rate) * np.expm1(t * np.log1p(rate)) / rate
+    return np.where(rate == 0, t, factors)
+
+
+def salary_sums(salary_increase_rate, years, career=None) -> np.ndarray:
+    """Sum of (1 + rate) ** t for t < years, i.e. the overall salary of 1 k€ starting salary (broadcasts).
+
+    With ``career`` the sum of its salary factors, for all years of the longest horizon masked per scenario.
+    """
+    years = np.asarray(years, dtype=np.intp)
+    if career is not None:
+        factors = career.salary_factors(salary_increase_rate, int(years.max(initial=0)))
+        factors, years = np.broadcast_arrays(factors, years[..., None])
+        return np.where(np.arange(factors.shape[-1]) < years, factors, 0.0).sum(axis=-1)
+    salary_increase_rate = np.asarray(salary_increase_rate, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sums = np.expm1(years * np.log1p(salary_increase_rate)) / salary_increase_rate
+    return np.where(salary_increase_rate == 0, years, sums)
+
+
+def salary_projection(initial_salary, salary_increase_rate, years: int, periods_per_year: int = 1,
+                      tax=None, career=None) -> np.ndarray:
+    """Salary per period with a constant yearly increase rate: initial_salary * (1 + rate) ** t / periods_per_year
+    (the salary is raised once a year), net of taxes and social contributions with ``tax``. With ``career`` the
+    yearly salary follows its schedule instead."""
+    initial_salary = np.asarray(initial_salary, dtype=np.float64)[..., None]
+    if career is None:
+        salary = initial_salary * growth_factors(salary_increase_rate, years)
+    else:
+        salary = initial_salary * career.salary_factors(salary_increase_rate, years)
+    if tax is not None:
+        salary = tax.net_income(salary)
+    if periods_per_year == 1:
+        return salary
+    return np.repeat(salary / periods_per_year, periods_per_year, axis=-1)
+
+
+def periodic_rate(yearly_rate, periods_per_year: int = 1):
+    """Rate per period with the same effective annual rate, e.g. the monthly compounding rate for 12 periods."""
+    if periods_per_year == 1:
+        return yearly_rate
+    return np.expm1(np.log1p(np.asarray(yearly_rate, dtype=np.float64)) / periods_per_year)
+
+
+def compensation_payouts(compensation_payment, annual_payment, investment_revenue_rate, years: int,
+                         periods_per_year: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized drawdown of the compensation account.
+
+    Each period the payment (annual payment / periods per year) is paid out while the balance covers it, then
+    whatever is left; the final period pays out the complete remaining balance. The balance earns the investment
+    revenue (compounded per period) after each payout.
+    Returns ``(payouts, balance)``, where balance is the account balance at the end of each period.
+    """
+    periods = years * periods_per_year
+    investment_revenue_rate = periodic_rate(investment_revenue_rate, periods_per_year)
+    compensation_payment = np.asarray(compensation_payment, dtype=np.float64)[..., None]
+    annual_payment = np.asarray(annual_payment, dtype=np.float64)[..., None] / periods_per_year
+    # balance before the payout of period t, assuming the full payment was made in all previous periods
+    unconstrained = (compensation_payment * growth_factors(investment_revenue_rate, periods)
+                     - annual_payment * annuity_factors(investment_revenue_rate, periods))
+    period_growth = 1 + np.asarray(investment_revenue_rate, dtype=np.float64)[..., None]
+    return _drawdown(unconstrained, annual_payment, period_growth)
+
+
+def compensation_payouts_varying(compensation_payment, annual_payment, investment_revenue_rates,
+                                 periods_per_year: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """Same as :func:`compensation_payouts`, but with a separate revenue rate per year (shape ``(..., years)``)."""
+    compensation_payment = np.asarray(compensation_payment, dtype=np.float64)[..., None]
+    annual_payment = np.asarray(annual_payment, dtype=np.float64)[..., None] / periods_per_year
+    period_growth = 1 + periodic_rate(np.asarray(investment_revenue_rates, dtype=np.float64), periods_per_year)
+    if periods_per_year > 1:
+        period_growth = np.repeat(period_growth, periods_per_year, axis=-1)
+    # growth of one k€ from the start until the beginning of period t: prod_{k<t} (1 + r_k)
+    growth = np.ones_like(period_growth)
+    np.cumprod(period_growth[..., :-1], axis=-1, out=growth[..., 1:])
+    # U_t = G_t * (C - a * sum_{k<t} 1 / G_k)
+    discounted_payments = np.zeros_like(growth)
+    np.cumsum(1 / growth[..., :-1], axis=-1, out=discounted_payments[..., 1:])
+    unconstrained = growth * (compensation_payment - annual_payment * discounted_payments)
+    return _drawdown(unconstrained, annual_payment, period_growth)
+
+
+def _drawdown(unconstrained: np.ndarray, annual_payment: np.ndarray,
+              period_growth: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # the full payment is made as long as the balance covers it in this and all previous periods
+    solvent = np.logical_and.accumulate(unconstrained >= annual_payment, axis=-1)
+    solvent_before = np.concatenate([np.ones_like(solvent[..., :1]), solvent[..., :-1]], axis=-1)
+    # in the year of depletion the rest is paid out, afterwards the account stays empty
+    balance_before = np.where(solvent_before, np.maximum(unconstrained, 0.0), 0.0)
+    payouts = np.where(solvent, annual_payment, balance_before)
+    if payouts.shape[-1] > 0:
+        payouts[..., -1] = balance_before[..., -1]  # last year: pay out the remaining balance
+
+    balance = (balance_before - payouts) * period_growth
+    return payouts, balance
+
+
+@dataclass(frozen=True)
+class Projection:
+    """Result of the projection: a contiguous float64 matrix (rows x periods) plus the row names.
+
+    Monthly projections (``periods_per_year=12``) are aggregated to years for display, see :meth:`yearly`.
+    """
+    index: tuple[str, ...]
+    values: np.ndarray
+    periods_per_year: int = 1
+    cumulative_values: np.ndarray | None = None  # optional prefix sums per year of all rows, see cumulative_frame
+
+    @property
+    def years(self) -> int:
+        return self.values.shape[-1] // self.periods_per_year
+
+    @property
+    def column_names(self) -> list[float]:
+        # one label per year, also for monthly projections (see to_frame)
+        return [float(i) for i in range(1, self.years + 1)]
+
+    def row(self, name: str) -> np.ndarray:
+        return self.values[self.index.index(name)]
+
+    def yearly(self) -> "Projection":
+        """Projection aggregated to years: flows are summed, balances (STOCK_ROWS) are taken at the end of the year."""
+        if self.periods_per_year == 1:
+            return self
+        periods = self.values.reshape(self.values.shape[:-1] + (self.years, self.periods_per_year))
+        values = periods.sum(axis=-1)
+        for i, name in enumerate(self.index):
+            if name in STOCK_ROWS:
+                values[i] = periods[i, ..., -1]
+        return Projection(index=self.index, values=values)
+
+    def to_frame(self, rows=None):
+        import pandas as pd
+
+        yearly = self.yearly()
+        rows = list(self.index) if rows is None else list(rows)
+        data = yearly.values[[self.index.index(name) for name in rows]]
+        df = pd.DataFrame(data, index=pd.Index(rows, name=TYPE_OF_INCOME), columns=self.column_names)
+        return df
+
+    def cumulative_rows(self) -> dict[str, np.ndarray]:
+        """Overall sum until the end of each year of all flow rows, named like in CUM_SUM_NAMES (e.g. "Overall sum
+        Salary new job"). Uses the prefix sums of the projection if available (see incremental.py)."""
+        rows = [name for name in self.index if name in CUM_SUM_NAMES]
+        positions = [self.index.index(name) for name in rows]
+        if self.cumulative_values is not None:
+            data = self.cumulative_values[positions]
+        else:
+            data = np.cumsum(self.yearly().values[positions], axis=-1)
+        return {CUM_SUM_NAMES[name]: values for name, values in zip(rows, data)}
+
+    def adjusted(self, inflation_rate=0.0, discount_rate=0.0) -> dict[str, "Projection"]:
+        """Yearly projections in real terms (REAL) and as present values (PRESENT_VALUE) of all rows.
+
+        Amounts of the first year are today's money; an amount of year t (every period of it) is divided by
+        (1 + rate) ** t, a balance at the end of a period by the factor of the next period, so monthly and yearly
+        projections give the same real terms and present values. Both terms are one broadcasted multiplication of the
+        values with the stacked deflation and discount factors (scalar rates).
+        """
+        periods = self.values.shape[-1]
+        batch_dims = (1,) * (self.values.ndim - 1)
+        factors = year_discount_factors(np.array([inflation_rate, discount_rate], dtype=np.float64), periods + 1,
+                                        self.periods_per_year)
+        factors = factors.reshape((2,) + batch_dims + (periods + 1,))
+        stock = np.array([name in STOCK_ROWS for name in self.index]).reshape((len(self.index),) + batch_dims)
+        values = self.values * np.where(stock, factors[..., 1:], factors[..., :-1])  # (2, rows, ..., periods)
+        return {term: Projection(index=self.index, values=term_values, periods_per_year=self.periods_per_year).yearly()
+                for term, term_values in zip((REAL, PRESENT_VALUE), values)}
+
+    def cumulative_frame(self):
+        import pandas as pd
+
+        rows = self.cumulative_rows()
+        return pd.DataFrame(np.stack(list(rows.values())), index=pd.Index(list(rows), name=TYPE_OF_INCOME),
+                            columns=self.column_names)
+
+
+def project(years: int, current_job_salary, new_job_salary, salary_increase_rate, compensation_paid: bool = False,
+            compensation_payment=0.0, compensation_annual_rate=0.0, investment_revenue_rate=0.0,
+            periods_per_year: int = 1, tax=None, current_job_career=None, new_job_career=None) -> Projection:
+    """Compute all rows shown in the detailed calculation of the app, per year or per month (periods_per_year=12)."""
+    rows = {CURRENT_JOB: salary_projection(current_job_salary, salary_increase_rate, years, periods_per_year, tax,
+                                           current_job_career),
+            NEW_JOB: salary_projection(new_job_salary, salary_increase_rate, years, periods_per_year, tax,
+                                       new_job_career)}
+    if compensation_paid:
+        compensation_payment = net_compensation_payment(compensation_payment, new_job_salary, tax)
+        payouts, balance = compensation_payouts(compensation_payment, compensation_annual_rate,
+                                                investment_revenue_rate, years, periods_per_year)
+        rows[ANNUAL_COMPENSATION] = payouts
+        rows[TOTAL_NEW_JOB] = rows[NEW_JOB] + payouts
+        rows[COMPENSATION_ACCOUNT_BALANCE] = balance
+        rows[DIFFERENCE_NJ_CJ_COMP] = rows[TOTAL_NEW_JOB] - rows[CURRENT_JOB]
+    else:
+        rows[DIFFERENCE_NJ_CJ] = rows[NEW_JOB] - rows[CURRENT_JOB]
+    return Projection(index=tuple(rows), values=np.stack(list(rows.values())), periods_per_year=periods_per_year)
+
+
+def projection_overall_delta(projection: Projection) -> np.ndarray:
+    """Overall delta of a projection (in any value terms): the sum of its difference row."""
+    difference = DIFFERENCE_NJ_CJ_COMP if DIFFERENCE_NJ_CJ_COMP in projection.index else DIFFERENCE_NJ_CJ
+    return projection.row(difference).sum(axis=-1)
+
+
+def net_compensation_payment(compensation_payment, new_job_salary, tax=None):
+    """Compensation payment after taxes (taxed as severance in the first year of the new job), unchanged without
+    ``tax``."""
+    if tax is None:
+        return compensation_payment
+    return tax.net_severance(compensation_payment, new_job_salary)
+
+
+def key_metrics(projection: Projection, compensation_payment=0.0) -> dict[str, float]:
+    """Key metrics of the app header, computed from a projection (``compensation_payment`` after taxes, if the
+    projection is net)."""
+    projection = projection.yearly()
+    current_job = projection.row(CURRENT_JOB)
+    new_job = projection.row(NEW_JOB)
+    current_job_overall_salary = float(current_job.sum())
+    new_job_overall_salary = float(new_job.sum())
+    if ANNUAL_COMPENSATION in projection.index:
+        compensation_payment_incl_revenue = float(projection.row(ANNUAL_COMPENSATION).sum())
+    else:
+        compensation_payment_incl_revenue = 0.0
+    return {
+        "current_job_salary_final": float(current_job[-1]) if projection.years else 0.0,
+        "new_job_salary_final": float(new_job[-1]) if projection.years else 0.0,
+        "current_job_overall_salary": current_job_overall_salary,
+        "new_job_overall_salary": new_job_overall_salary,
+        "compensation_payment_incl_revenue": compensation_payment_incl_revenue,
+        "investment_revenue": compensation_payment_incl_revenue - float(compensation_payment),
+        "overall_delta": new_job_overall_salary + compensation_payment_incl_revenue - current_job_overall_salary,
+    }
+
+
+def compensation_totals(compensation_payment, annual_payment, investment_revenue_rate, years,
+                        periods_per_year: int = 1) -> np.ndarray:
+    """Sum of all compensation payouts (incl. investment revenue) for a horizon of ``years``.
+
+    Broadcasts over all inputs including ``years``: the drawdown is computed once for the longest horizon and the
+    total of each horizon n is gathered from it (payouts of the periods before n plus the lump sum in period n).
+    """
+    years = np.asarray(years, dtype=np.intp)
+    shape = np.broadcast_shapes(years.shape, np.shape(compensation_payment), np.shape(annual_payment),
+                                np.shape(investment_revenue_rate))
+    max_years = int(years.max(initial=0))
+    if max_years == 0:
+        return np.zeros(shape)
+    payouts, balance = compensation_payouts(compensation_payment, annual_payment, investment_revenue_rate, max_years,
+                                            periods_per_year)
+    years = years * periods_per_year  # from here on: periods
+    # paid before period t plus the balance at the beginning of period t (= lump sum when t is the last period)
+    totals = np.zeros(payouts.shape)
+    np.cumsum(payouts[..., :-1], axis=-1, out=totals[..., 1:])
+    totals[..., 0] = np.asarray(compensation_payment, dtype=np.float64)
+    totals[..., 1:] += balance[..., :-1]
+    totals = np.broadcast_to(totals, shape + (payouts.shape[-1],))
+    last_year = np.broadcast_to(np.maximum(years, 1) - 1, shape)[..., None]
+    return np.where(years > 0, np.take_along_axis(totals, last_year, axis=-1)[..., 0], 0.0)
+
+
+def key_metrics_batch(years, current_job_salary, new_job_salary, salary_increase_rate, compensation_paid=False,
+                      compensation_payment=0.0, compensation_annual_rate=0.0, investment_revenue_rate=0.0,
+                      periods_per_year: int = 1, tax=None, current_job_career=None,
+                      new_job_career=None) -> dict[str, np.ndarray]:
+    """Same metrics as :func:`key_metrics` for a batch of scenarios in one broadcasted pass.
+
+    Every input may be a scalar or an array; the results have the broadcast shape of all inputs (read-only views
+    where a result depends on fewer inputs). Gross salaries add up in closed form, net salaries and career schedules
+    are evaluated for all years of the longest horizon at once.
+    """
+    shape = np.broadcast_shapes(*map(np.shape, (years, current_job_salary, new_job_salary, salary_increase_rate,
+                                                compensation_paid, compensation_payment, compensation_annual_rate,
+                                                investment_revenue_rate)))
+    years = np.asarray(years, dtype=np.intp)
+    current_job_salary = np.asarray(current_job_salary, dtype=np.float64)
+    new_job_salary = np.asarray(new_job_salary, dtype=np.float64)
+    salary_increase_rate = np.asarray(salary_increase_rate, dtype=np.float64)
+    compensation_payment = np.where(compensation_paid,
+                                    net_compensation_payment(compensation_payment, new_job_salary, tax), 0.0)
+
+    if tax is None and current_job_career is None and new_job_career is None:
+        salary_sum = salary_sums(salary_increase_rate, years)
+        final_growth = np.where(years > 0, np.exp((years - 1) * np.log1p(salary_increase_rate)), 0.0)
+        current_job_salary_final = current_job_salary * final_growth
+        new_job_salary_final = new_job_salary * final_growth
+        current_job_overall_salary = current_job_salary * salary_sum
+        new_job_overall_salary = new_job_salary * salary_sum
+    else:
+        current_job_salary_final, current_job_overall_salary = _salary_totals(current_job_salary, salary_increase_rate,
+                                                                              years, tax, current_job_career)
+        new_job_salary_final, new_job_overall_salary = _salary_totals(new_job_salary, salary_increase_rate, years,
+                                                                      tax, new_job_career)
+    compensation_payment_incl_revenue = np.where(
+        compensation_paid,
+        compensation_totals(compensation_payment, compensation_annual_rate, investment_revenue_rate, years,
+                            periods_per_year), 0.0)
+    metrics = {
+        "current_job_salary_final": current_job_salary_final,
+        "new_job_salary_final": new_job_salary_final,
+        "current_job_overall_salary": current_job_overall_salary,
+        "new_job_overall_salary": new_job_overall_salary,
+        "compensation_payment_incl_revenue": compensation_payment_incl_revenue,
+        "investment_revenue": compensation_payment_incl_revenue - compensation_payment,
+        "overall_delta": new_job_overall_salary + compensation_payment_incl_revenue - current_job_overall_salary,
+    }
+    return {name: np.broadcast_to(value, shape) for name, value in metrics.items()}
+
+
+def _salary_totals(initial_salary, salary_increase_rate, years: np.ndarray, tax,
+                   career=None) -> tuple[np.ndarray, np.ndarray]:
+    # final and overall salary (net or with a career schedule) for horizons of ``years``: all years of the longest
+    # horizon, masked per scenario
+    max_years = int(years.max(initial=0))
+    salary = salary_projection(initial_salary, salary_increase_rate, max(max_years, 1), tax=tax, career=career)
+    if max_years and years.min(initial=max_years) == max_years:  # one horizon for all scenarios: nothing to mask
+        return salary[..., -1] + np.zeros(years.shape), salary.sum(axis=-1) + np.zeros(years.shape)
+    salary, years = np.broadcast_arrays(salary, years[..., None])
+    overall_salary = np.where(np.arange(salary.shape[-1]) < years, salary, 0.0).sum(axis=-1)
+    final_salary = np.take_along_axis(salary, np.maximum(years[..., :1] - 1, 0), axis=-1)[..., 0]
+    return np.where(years[..., 0] > 0, final_salary, 0.0), overall_salary
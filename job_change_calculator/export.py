@@ -0,0 +1,102 @@
+"""Export of results as CSV, Parquet, Arrow IPC or Excel, built directly from the NumPy result arrays.
+
+A table has one line per year (or per offer) and one column per row of the detailed calculation. The rows of a
+projection are contiguous float64 arrays, so they become Arrow columns without a copy and without a DataFrame in
+between. CSV is written batch by batch, Parquet and Arrow IPC straight from the Arrow table, Excel with number
+formats, a frozen header and column widths. Needs ``pyarrow`` (installed with streamlit), Excel needs ``xlsxwriter``.
+"""
+import importlib.util
+import io
+
+import numpy as np
+
+from job_change_calculator.engine import Projection
+from job_change_calculator.offers import OfferComparison
+
+# export format -> (file extension, mime type)
+EXPORT_FORMATS = {"CSV": ("csv", "text/csv"),
+                  "Parquet": ("parquet", "application/vnd.apache.parquet"),
+                  "Arrow": ("arrow", "application/vnd.apache.arrow.file"),
+                  "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+CSV_BATCH_ROWS = 64 * 1024
+EXCEL_NUMBER_FORMAT = '#,##0.00 "k€"'
+
+
+def available_export_formats() -> list[str]:
+    """Export formats whose optional dependencies are installed."""
+    return [name for name in EXPORT_FORMATS
+            if name != "Excel" or importlib.util.find_spec("xlsxwriter") is not None]
+
+
+def arrow_table(columns: dict):
+    """Arrow table from NumPy columns; contiguous numeric arrays are wrapped, not copied."""
+    import pyarrow as pa
+
+    return pa.table({name: pa.array(values) for name, values in columns.items()})
+
+
+def projection_table(projection: Projection, overall_sums: bool = True):
+    """Detailed calculation per year (monthly projections are aggregated), optionally with the overall sums."""
+    yearly = projection.yearly()
+    columns = {"year": np.arange(1, yearly.years + 1)}
+    columns.update(zip(yearly.index, yearly.values))
+    if overall_sums:
+        columns.update(projection.cumulative_rows())
+    return arrow_table(columns)
+
+
+def offers_table(comparison: OfferComparison):
+    """Ranking of the offers: one line per offer, best first."""
+    ranking = comparison.ranking
+    return arrow_table({"rank": np.arange(1, len(ranking) + 1),
+                        "offer": np.array(comparison.names, dtype=object)[ranking],
+                        "overall_delta": comparison.overall_delta[ranking],
+                        "overall_income": comparison.overall_income[ranking]})
+
+
+def write_export(table, export_format: str, sink):
+    """Write ``table`` in ``export_format`` (a key of EXPORT_FORMATS) to a path or binary file object."""
+    if export_format == "CSV":
+        import pyarrow.csv as pa_csv
+
+        with pa_csv.CSVWriter(sink, table.schema, write_options=pa_csv.WriteOptions(quoting_style="needed")) as writer:
+            for batch in table.to_batches(max_chunksize=CSV_BATCH_ROWS):
+                writer.write_batch(batch)
+    elif export_format == "Parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    elif export_format == "Arrow":
+        import pyarrow as pa
+
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    elif export_format == "Excel":
+        _write_excel(table, sink)
+    else:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}.")
+
+
+def export_bytes(table, export_format: str) -> bytes:
+    """Content of the export file, e.g. for a download button."""
+    sink = io.BytesIO()
+    write_export(table, export_format, sink)
+    return sink.getvalue()
+
+
+def _write_excel(table, sink):
+    import pyarrow as pa
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(sink, {"in_memory": True, "nan_inf_to_errors": True})
+    worksheet = workbook.add_worksheet("Calculation")
+    header_format = workbook.add_format({"bold": True, "text_wrap": True, "valign": "top", "bottom": 1})
+    number_format = workbook.add_format({"num_format": EXCEL_NUMBER_FORMAT})
+    for column, (name, values) in enumerate(zip(table.column_names, table.columns)):
+        is_amount = pa.types.is_floating(values.type)
+        worksheet.write(0, column, name, header_format)
+        worksheet.write_column(1, column, values.to_pylist(), number_format if is_amount else None)
+        worksheet.set_column(column, column, 18 if is_amount else max(len(name), 8))
+    worksheet.set_row(0, 45)
+    worksheet.freeze_panes(1, 1)
+    workbook.close()
@@ -0,0 +1,195 @@
+"""Incremental evaluation of the projection: rows are only recomputed when their inputs change.
+
+The rows of a projection form a small dependency graph::
+
+    current_job_salary, salary_increase_rate ──> current job ──────────────────────────┐
+    new_job_salary, salary_increase_rate ──────> new job ───────┬──> total new job ──> difference
+    compensation_payment, compensation_annual_rate,             │
+    investment_revenue_rate ───────────────────> compensation ──┘
+                                                 (payouts and balance)
+
+Every node keeps its series "open ended" for the longest horizon computed so far, together with the prefix sums of
+its flows. When the inputs of a node change, only this node and the nodes depending on it are recomputed; a longer
+horizon computes only the additional periods of each node, a shorter horizon slices. The horizon only changes the
+last period (it pays out the remaining compensation), which is patched when the projection is assembled. The results
+are identical to :func:`job_change_calculator.engine.project`, including the prefix sums for the "Overall sum" view.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from job_change_calculator.engine import (ANNUAL_COMPENSATION, COMPENSATION_ACCOUNT_BALANCE, CURRENT_JOB,
+                                          DIFFERENCE_NJ_CJ, DIFFERENCE_NJ_CJ_COMP, NEW_JOB, TOTAL_NEW_JOB, Projection,
+                                          annuity_factors, growth_factors, net_compensation_payment, periodic_rate)
+
+
+@dataclass
+class _Node:
+    key: tuple  # inputs (or versions of the parent nodes) the series were computed with
+    version: int
+    series: dict = field(default_factory=dict)  # name -> values per period, open ended
+    prefix_sums: dict = field(default_factory=dict)  # name -> cumulative sum of the flow series
+    state: dict = field(default_factory=dict)  # carried over to the next extension
+
+    @property
+    def periods(self) -> int:
+        return len(next(iter(self.series.values())))
+
+
+class IncrementalProjection:
+    """Projection of one scenario (scalar inputs) that reuses the series of its previous calls.
+
+    ``last_actions`` tells for each node whether the last call "reused", "extended" or "recomputed" it.
+    Not thread-safe: keep one instance per session.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._versions = 0
+        self.last_actions = {}
+
+    def project(self, years: int, current_job_salary, new_job_salary, salary_increase_rate,
+                compensation_paid: bool = False, compensation_payment=0.0, compensation_annual_rate=0.0,
+                investment_revenue_rate=0.0, periods_per_year: int = 1, tax=None, current_job_career=None,
+                new_job_career=None) -> Projection:
+        """Same result as :func:`job_change_calculator.engine.project`, plus prefix sums."""
+        periods = years * periods_per_year
+        self.last_actions = {}
+        current_job = self._update(
+            "current job", (current_job_salary, salary_increase_rate, periods_per_year, tax, current_job_career),
+            periods, lambda start, end, node: self._salary(current_job_salary, salary_increase_rate, periods_per_year,
+                                                           start, end, tax, current_job_career))
+        new_job = self._update(
+            "new job", (new_job_salary, salary_increase_rate, periods_per_year, tax, new_job_career), periods,
+            lambda start, end, node: self._salary(new_job_salary, salary_increase_rate, periods_per_year, start, end,
+                                                  tax, new_job_career))
+        if not compensation_paid:
+            difference = self._update(
+                "difference", (current_job.version, new_job.version), periods,
+                lambda start, end, node: {"values": new_job.series["values"][start:end]
+                                          - current_job.series["values"][start:end]})
+            rows = {CURRENT_JOB: self._rows(current_job, periods), NEW_JOB: self._rows(new_job, periods),
+                    DIFFERENCE_NJ_CJ: self._rows(difference, periods)}
+            return self._assemble(rows, periods_per_year)
+
+        compensation_payment = net_compensation_payment(compensation_payment, new_job_salary, tax)
+        compensation = self._update(
+            "compensation", (float(compensation_payment), compensation_annual_rate, investment_revenue_rate,
+                             periods_per_year), periods,
+            lambda start, end, node: self._drawdown(compensation_payment, compensation_annual_rate,
+                                                    investment_revenue_rate, periods_per_year, start, end, node))
+        total = self._update("total new job", (new_job.version, compensation.version), periods,
+                             lambda start, end, node: {"values": new_job.series["values"][start:end]
+                                                       + compensation.series["payouts"][start:end]})
+        difference = self._update(
+            "difference with compensation", (current_job.version, total.version), periods,
+            lambda start, end, node: {"values": total.series["values"][start:end]
+                                      - current_job.series["values"][start:end]})
+
+        # the last period pays out the remaining balance instead of the annual payment
+        payouts, payouts_sum = self._rows(compensation, periods, "payouts")
+        balance_before_last = compensation.series["balance_before"][periods - 1] if periods else 0.0
+        payouts, payouts_sum = self._patch_last(payouts, payouts_sum, balance_before_last)
+        balance = compensation.series["balance"][:periods].copy()
+        if periods:
+            balance[-1] = (balance_before_last - payouts[-1]) * compensation.state["growth"]
+        new_values = new_job.series["values"]
+        total_values, total_sum = self._patch_last(*self._rows(total, periods),
+                                                   new_values[periods - 1] + payouts[-1] if periods else 0.0)
+        current_values = current_job.series["values"]
+        difference_values, difference_sum = self._patch_last(
+            *self._rows(difference, periods), total_values[-1] - current_values[periods - 1] if periods else 0.0)
+        rows = {CURRENT_JOB: self._rows(current_job, periods), NEW_JOB: self._rows(new_job, periods),
+                ANNUAL_COMPENSATION: (payouts, payouts_sum), TOTAL_NEW_JOB: (total_values, total_sum),
+                COMPENSATION_ACCOUNT_BALANCE: (balance, None),
+                DIFFERENCE_NJ_CJ_COMP: (difference_values, difference_sum)}
+        return self._assemble(rows, periods_per_year)
+
+    def _update(self, name: str, key: tuple, periods: int, compute) -> _Node:
+        node = self._nodes.get(name)
+        if node is not None and node.key == key:
+            if node.periods >= periods:
+                self.last_actions[name] = "reused"
+                return node
+            self.last_actions[name] = "extended"
+            start = node.periods
+        else:
+            self._versions += 1
+            node = self._nodes[name] = _Node(key=key, version=self._versions)
+            self.last_actions[name] = "recomputed"
+            start = 0
+        segments = compute(start, periods, node)
+        for series_name, segment in segments.items():
+            if start == 0:
+                node.series[series_name] = segment
+            else:
+                node.series[series_name] = np.concatenate([node.series[series_name], segment])
+            if series_name in ("values", "payouts"):  # flows: extend the prefix sums
+                if start:
+                    # continue the running sum (same rounding as one cumsum over all periods)
+                    previous = node.prefix_sums[series_name]
+                    prefix_sum = np.concatenate([previous, np.cumsum(np.concatenate([previous[-1:], segment]))[1:]])
+                else:
+                    prefix_sum = np.cumsum(segment)
+                node.prefix_sums[series_name] = prefix_sum
+        return node
+
+    @staticmethod
+    def _rows(node: _Node, periods: int, series_name: str = "values") -> tuple[np.ndarray, np.ndarray]:
+        return node.series[series_name][:periods], node.prefix_sums[series_name][:periods]
+
+    @staticmethod
+    def _patch_last(values: np.ndarray, prefix_sum: np.ndarray, last_value) -> tuple[np.ndarray, np.ndarray]:
+        if not len(values):
+            return values, prefix_sum
+        values = values.copy()
+        prefix_sum = prefix_sum.copy()
+        values[-1] = last_value
+        prefix_sum[-1] = (prefix_sum[-2] if len(prefix_sum) > 1 else 0.0) + last_value
+        return values, prefix_sum
+
+    @staticmethod
+    def _salary(initial_salary, salary_increase_rate, periods_per_year: int, start: int, end: int, tax,
+                career=None) -> dict:
+        # salary per period, raised once a year: compute the years touched by the periods start..end-1
+        first_year, last_year = start // periods_per_year, -(-end // periods_per_year)
+        if career is None:
+            salary = float(initial_salary) * growth_factors(salary_increase_rate, last_year, first_year)
+        else:  # the schedule is evaluated from its first year (microseconds), only the new years are kept
+            salary = float(initial_salary) * career.salary_factors(salary_increase_rate, last_year)[first_year:]
+        if tax is not None:
+            salary = tax.net_income(salary)
+        if periods_per_year > 1:
+            salary = np.repeat(salary / periods_per_year, periods_per_year)
+        offset = start - first_year * periods_per_year
+        return {"values": salary[offset:offset + end - start]}
+
+    @staticmethod
+    def _drawdown(compensation_payment, annual_payment, investment_revenue_rate, periods_per_year: int, start: int,
+                  end: int, node: _Node) -> dict:
+        # open ended drawdown (no final lump sum), continued from the solvency of the previous period
+        rate = periodic_rate(investment_revenue_rate, periods_per_year)
+        payment = np.float64(annual_payment) / periods_per_year
+        unconstrained = (float(compensation_payment) * growth_factors(rate, end, start)
+                         - payment * annuity_factors(rate, end, start))
+        solvent_before_start = node.state.get("solvent", True)
+        solvent = np.logical_and.accumulate(unconstrained >= payment) & solvent_before_start
+        solvent_before = np.concatenate([[solvent_before_start], solvent[:-1]])
+        balance_before = np.where(solvent_before, np.maximum(unconstrained, 0.0), 0.0)
+        payouts = np.where(solvent, payment, balance_before)
+        node.state["growth"] = 1 + np.float64(rate)
+        if len(solvent):
+            node.state["solvent"] = bool(solvent[-1])
+        return {"payouts": payouts, "balance_before": balance_before,
+                "balance": (balance_before - payouts) * node.state["growth"]}
+
+    @staticmethod
+    def _assemble(rows: dict, periods_per_year: int) -> Projection:
+        values = np.stack([row_values for row_values, _ in rows.values()])
+        # prefix sums at the end of each year; balances (no prefix sum) are not summed up
+        year_ends = slice(periods_per_year - 1, None, periods_per_year)
+        cumulative_values = np.stack([prefix_sum[year_ends] if prefix_sum is not None
+                                      else np.full(len(row_values[year_ends]), np.nan)
+                                      for row_values, prefix_sum in rows.values()])
+        return Projection(index=tuple(rows), values=values, periods_per_year=periods_per_year,
+                          cumulative_values=cumulative_values)
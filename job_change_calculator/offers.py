@@ -0,0 +1,67 @@
+"""Comparison of several job offers against the current job in one broadcasted pass.
+
+Every offer has its own starting salary, salary increase rate, signing bonus (paid in the first year) and
+compensation package (payment, annual payout, investment revenue rate). All offers are computed as one
+``(offers, years)`` array and ranked by their overall delta against the current job. With ``tax`` all amounts are
+converted to net amounts: the signing bonus is taxed with the salary of the first year, the compensation payment as
+severance on top of it.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from job_change_calculator.engine import compensation_payouts, net_compensation_payment, salary_projection
+
+# fields of an offer and their defaults (None: required), rates as fractions
+OFFER_FIELDS = {"new_job_salary": None, "salary_increase_rate": 0.0, "signing_bonus": 0.0, "compensation_payment": 0.0,
+                "compensation_annual_rate": 0.0, "investment_revenue_rate": 0.0}
+
+
+@dataclass(frozen=True)
+class OfferComparison:
+    """Yearly and overall delta of each offer against the current job, in the order of the offers."""
+    names: tuple[str, ...]
+    yearly_delta: np.ndarray  # (offers, years): salary + signing bonus + compensation payouts - current job salary
+    overall_income: np.ndarray  # (offers,)
+    overall_delta: np.ndarray  # (offers,)
+
+    @property
+    def ranking(self) -> np.ndarray:
+        """Offer indices, best overall delta first (ties keep the order of the offers)."""
+        return np.argsort(-self.overall_delta, kind="stable")
+
+    def top(self, k: int) -> np.ndarray:
+        """Indices of the best ``k`` offers, best first."""
+        return self.ranking[:max(k, 0)]
+
+
+def compare_offers(years: int, current_job_salary, current_salary_increase_rate, names, new_job_salary,
+                   salary_increase_rate=0.0, signing_bonus=0.0, compensation_payment=0.0, compensation_annual_rate=0.0,
+                   investment_revenue_rate=0.0, periods_per_year: int = 1, tax=None) -> OfferComparison:
+    """Evaluate all offers (one value per offer or a scalar for all) against the current job."""
+    names = tuple(names)
+    shape = (len(names),)
+    offer = {name: np.broadcast_to(np.asarray(value, dtype=np.float64), shape)
+             for name, value in dict(new_job_salary=new_job_salary, salary_increase_rate=salary_increase_rate,
+                                     signing_bonus=signing_bonus, compensation_payment=compensation_payment,
+                                     compensation_annual_rate=compensation_annual_rate,
+                                     investment_revenue_rate=investment_revenue_rate).items()}
+
+    current_job = salary_projection(current_job_salary, current_salary_increase_rate, years, tax=tax)  # (years,)
+    income = salary_projection(offer["new_job_salary"], offer["salary_increase_rate"], years)  # (offers, years)
+    if years:
+        income[:, 0] += offer["signing_bonus"]
+    compensation_payment = net_compensation_payment(offer["compensation_payment"], income[:, 0] if years else 0.0,
+                                                    tax)
+    if tax is not None:
+        income = tax.net_income(income)
+    payouts, _ = compensation_payouts(compensation_payment, offer["compensation_annual_rate"],
+                                      offer["investment_revenue_rate"], years, periods_per_year)
+    if periods_per_year > 1:
+        payouts = payouts.reshape(shape + (years, periods_per_year)).sum(axis=-1)
+    income += payouts
+
+    overall_income = income.sum(axis=-1)
+    yearly_delta = income - current_job
+    return OfferComparison(names=names, yearly_delta=yearly_delta, overall_income=overall_income,
+                           overall_delta=overall_income - current_job.sum())
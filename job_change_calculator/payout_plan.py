@@ -0,0 +1,107 @@
+"""Optimal payout plan of the compensation account: a payout per year instead of a constant annual payout.
+
+The account pays out ``p_t`` in period t and earns the investment revenue on the rest, so a plan is feasible exactly
+if the payouts discounted with the revenue rate add up to the compensation payment:
+``sum_t p_t * w_t = C`` with ``w_t = (1 + r) ** -t`` and ``p_t >= 0`` (nothing is left at the end). Both objectives
+raise the lowest values of a row to a common level with the smallest budget ("water filling"):
+
+* MINIMAX_SHORTFALL: the smallest maximum shortfall of the new job (incl. payouts) vs. the current job
+* LEVEL_REAL_INCOME: the highest minimum income of the new job (incl. payouts) in today's money
+
+The optimal level is piecewise linear in the budget, so it is found in closed form from the sorted needs and their
+cumulative sums: one sort and a few cumulative sums over all years, vectorized over scenario batches.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from job_change_calculator.engine import (ANNUAL_COMPENSATION, COMPENSATION_ACCOUNT_BALANCE, CURRENT_JOB,
+                                          DIFFERENCE_NJ_CJ_COMP, NEW_JOB, TOTAL_NEW_JOB, Projection, growth_factors,
+                                          net_compensation_payment, periodic_rate, salary_projection,
+                                          year_discount_factors)
+
+MINIMAX_SHORTFALL = "Smallest maximum shortfall"
+LEVEL_REAL_INCOME = "Level real income"
+OBJECTIVES = (MINIMAX_SHORTFALL, LEVEL_REAL_INCOME)
+
+
+@dataclass(frozen=True)
+class PayoutPlan:
+    """Payout plan per period, in the order of the periods (yearly plans with ``periods_per_year=1``)."""
+    payouts: np.ndarray  # (..., periods)
+    balance: np.ndarray  # (..., periods) balance of the account at the end of each period
+    level: np.ndarray  # (...) the level reached: the maximum shortfall or the minimum real income per period
+
+
+def level_payouts(needs, weights, budget) -> tuple[np.ndarray, np.ndarray]:
+    """Payouts ``p >= 0`` with ``sum(p * weights) == budget`` that minimize ``max(needs - p)``.
+
+    Every period with a need above the optimal level L gets ``need - L``, all others nothing. Returns
+    ``(payouts, L)``; shapes ``(..., periods)`` and ``(...)``, all inputs broadcast. ``weights`` must be positive.
+    """
+    needs, weights = np.broadcast_arrays(np.asarray(needs, dtype=np.float64), np.asarray(weights, dtype=np.float64))
+    budget = np.asarray(budget, dtype=np.float64)[..., None]
+    batch_shape = np.broadcast_shapes(needs.shape[:-1], budget.shape[:-1])
+    needs = np.broadcast_to(needs, batch_shape + needs.shape[-1:])
+    weights = np.broadcast_to(weights, needs.shape)
+    budget = np.broadcast_to(budget, batch_shape + (1,))
+    if needs.shape[-1] == 0:
+        return needs.copy(), np.full(batch_shape, np.nan)
+    # with the k largest needs above the level: budget = sum_k w * need - L * sum_k w
+    order = np.argsort(-needs, axis=-1, kind="stable")
+    sorted_needs = np.take_along_axis(needs, order, axis=-1)
+    sorted_weights = np.take_along_axis(weights, order, axis=-1)
+    weighted_needs = np.cumsum(sorted_needs * sorted_weights, axis=-1)
+    weight_sums = np.cumsum(sorted_weights, axis=-1)
+    # budget needed to bring the k largest needs down to the k-th largest one (non-decreasing in k, 0 for k = 1):
+    # the optimal level lies below the k-th largest need for the last k with a breakpoint budget <= budget
+    breakpoints = weighted_needs - sorted_needs * weight_sums
+    k = np.maximum(np.sum(breakpoints <= budget, axis=-1, keepdims=True), 1)
+    level = (np.take_along_axis(weighted_needs, k - 1, axis=-1) - budget) / np.take_along_axis(weight_sums, k - 1,
+                                                                                                 axis=-1)
+    return np.maximum(needs - level, 0.0), level[..., 0]
+
+
+def optimal_payouts(years: int, current_job_salary, new_job_salary, salary_increase_rate, compensation_payment,
+                    investment_revenue_rate=0.0, objective: str = MINIMAX_SHORTFALL, inflation_rate=0.0,
+                    periods_per_year: int = 1, tax=None, current_job_career=None,
+                    new_job_career=None) -> PayoutPlan:
+    """Optimal payout plan of the compensation payment for ``objective`` (see OBJECTIVES).
+
+    Same conventions as :func:`job_change_calculator.engine.project`: with ``periods_per_year`` the plan has one
+    payout per period, with ``tax`` the salaries and the compensation payment are net, with the career schedules the
+    salaries follow them. ``inflation_rate`` is only used by LEVEL_REAL_INCOME, amounts of the first year are today's
+    money.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}.")
+    periods = years * periods_per_year
+    compensation_payment = net_compensation_payment(compensation_payment, new_job_salary, tax)
+    new_job = salary_projection(new_job_salary, salary_increase_rate, years, periods_per_year, tax, new_job_career)
+    growth = growth_factors(periodic_rate(investment_revenue_rate, periods_per_year), periods + 1)
+    weights = 1 / growth[..., :-1]  # today's value of a payout in period t for the account
+    if objective == MINIMAX_SHORTFALL:
+        current_job = salary_projection(current_job_salary, salary_increase_rate, years, periods_per_year, tax,
+                                        current_job_career)
+        payouts, level = level_payouts(current_job - new_job, weights, compensation_payment)
+    else:
+        # raise the lowest real incomes: in real terms the payout q = p * deflator costs weight / deflator
+        deflators = year_discount_factors(inflation_rate, periods, periods_per_year)
+        real_payouts, level = level_payouts(-new_job * deflators, weights / deflators, compensation_payment)
+        payouts, level = real_payouts / deflators, -level
+    # balance after period t: (C - sum_{s<=t} p_s * w_s) * (1 + r) ** (t + 1)
+    balance = (np.asarray(compensation_payment, dtype=np.float64)[..., None]
+               - np.cumsum(payouts * weights, axis=-1)) * growth[..., 1:]
+    return PayoutPlan(payouts=payouts, balance=np.maximum(balance, 0.0), level=level)
+
+
+def plan_projection(projection: Projection, plan: PayoutPlan) -> Projection:
+    """``projection`` (with compensation payment) with the payouts and balance of ``plan`` instead of the constant
+    annual payout; both must have the same periods."""
+    rows = dict(zip(projection.index, projection.values))
+    rows[ANNUAL_COMPENSATION] = plan.payouts
+    rows[TOTAL_NEW_JOB] = rows[NEW_JOB] + plan.payouts
+    rows[COMPENSATION_ACCOUNT_BALANCE] = plan.balance
+    rows[DIFFERENCE_NJ_CJ_COMP] = rows[TOTAL_NEW_JOB] - rows[CURRENT_JOB]
+    return Projection(index=projection.index, values=np.stack(list(rows.values())),
+                      periods_per_year=projection.periods_per_year)
@@ -0,0 +1,72 @@
+"""Opt-in instrumentation of a rerun: wall-clock time per stage and an optional cProfile capture."""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    """Collects the wall-clock time of the stages of one rerun. A disabled timer records nothing."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.timings = {}  # stage name -> ms, in order of the first occurrence; nested stages are named "outer/inner"
+        self._stack = []
+        self.reported = False  # set by record(): the timings of this run are complete
+        self._start = self._checkpoint = time.perf_counter()
+
+    def stage(self, name: str):
+        """Context manager timing the enclosed block as stage ``name`` (a repeated stage adds up)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str):
+        self._stack.append(name)
+        qualified_name = "/".join(self._stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._checkpoint = time.perf_counter()
+            self._stack.pop()
+            self._add(qualified_name, self._checkpoint - start)
+
+    def lap(self, name: str):
+        """Record the time since the end of the last stage (or since the start) as stage ``name``."""
+        if self.enabled:
+            now = time.perf_counter()
+            self._add(name, now - self._checkpoint)
+            self._checkpoint = now
+
+    def _add(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def record(self, **fields) -> dict:
+        """Structured record for logging: the given fields, the total and the stage timings (ms)."""
+        self.reported = True
+        return dict(fields, total_ms=round(self.total_ms, 3),
+                    stages={name: round(ms, 3) for name, ms in self.timings.items()})
+
+
+def start_profiler() -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def profile_report(profiler: cProfile.Profile, limit: int = 30) -> tuple[str, bytes]:
+    """Stop the profiler. Returns the top ``limit`` functions by cumulative time as text and the raw statistics,
+    which can be loaded with ``pstats.Stats(path)`` or viewers like snakeviz."""
+    profiler.disable()
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return text.getvalue(), marshal.dumps(stats.stats)
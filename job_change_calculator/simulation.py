@@ -0,0 +1,147 @@
+"""Monte Carlo simulation of uncertain salary growth and investment returns.
+
+All paths of a chunk are computed as one ``(paths x years)`` NumPy computation. Paths are processed in chunks of
+``chunk_size`` so that memory stays bounded; only the overall delta of each path is kept for all paths.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from job_change_calculator.engine import compensation_payouts_varying, net_compensation_payment
+
+DISTRIBUTIONS = ("Fixed", "Normal", "Lognormal", "Historical bootstrap")
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+DEFAULT_CHUNK_SIZE = 8_192  # (paths x years) blocks of this size stay cache friendly
+MIN_RATE = -0.99  # normal draws are clipped here, a rate of -100% or below would wipe out the salary/account
+
+
+@dataclass(frozen=True)
+class RateDistribution:
+    """Distribution of an annual rate (e.g. 0.02 for 2%).
+
+    ``mean`` and ``volatility`` (standard deviation) are used by "Normal" and "Lognormal", "Historical bootstrap"
+    draws the yearly rates with replacement from ``history``. "Fixed" always returns ``mean``.
+    """
+    kind: str = "Fixed"
+    mean: float = 0.0
+    volatility: float = 0.0
+    history: tuple[float, ...] = ()
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution '{self.kind}', expected one of {DISTRIBUTIONS}.")
+        if self.kind == "Historical bootstrap" and len(self.history) == 0:
+            raise ValueError("The historical bootstrap needs at least one historical rate.")
+
+    def sample(self, rng: np.random.Generator, shape: tuple[int, ...], antithetic: bool = True) -> np.ndarray:
+        """Draw rates of the given shape (paths x years).
+
+        With ``antithetic`` the second half of the paths uses the mirrored normal draws of the first half, which
+        halves the random number generation and reduces the variance of the estimates.
+        """
+        if self.kind == "Normal":
+            rates = _standard_normal(rng, shape, antithetic)
+            rates *= self.volatility
+            rates += self.mean
+            return np.maximum(rates, MIN_RATE, out=rates)
+        if self.kind == "Lognormal":
+            # parameters of log(1 + rate), so that 1 + rate has the given mean and standard deviation
+            sigma2 = np.log1p((self.volatility / (1 + self.mean)) ** 2)
+            rates = _standard_normal(rng, shape, antithetic)
+            rates *= np.sqrt(sigma2)
+            rates += np.log1p(self.mean) - sigma2 / 2
+            return np.expm1(rates, out=rates)
+        if self.kind == "Historical bootstrap":
+            return np.asarray(self.history, dtype=np.float64)[rng.integers(0, len(self.history), size=shape)]
+        return np.full(shape, self.mean, dtype=np.float64)
+
+
+def _standard_normal(rng: np.random.Generator, shape: tuple[int, ...], antithetic: bool) -> np.ndarray:
+    if not antithetic or shape[0] < 2:
+        return rng.standard_normal(shape)
+    values = np.empty(shape, dtype=np.float64)
+    half = (shape[0] + 1) // 2
+    rng.standard_normal(out=values[:half])
+    np.negative(values[:shape[0] - half], out=values[half:])
+    return values
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    overall_delta: np.ndarray  # (paths,) overall delta of each path
+    percentiles: tuple[float, ...]
+    cumulative_delta_percentiles: np.ndarray  # (percentiles x years) fan chart of the cumulative delta
+    paths: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "paths", len(self.overall_delta))
+
+    @property
+    def probability_new_job_ahead(self) -> float:
+        """Share of paths in which new job (+ compensation) earns more than the current job overall."""
+        return float(np.mean(self.overall_delta > 0)) if self.paths else 0.0
+
+    def overall_delta_percentile(self, q: float) -> float:
+        return float(np.percentile(self.overall_delta, q))
+
+
+def _percentiles_per_year(values: np.ndarray, percentiles: tuple[float, ...]) -> np.ndarray:
+    # same as np.percentile(values, percentiles, axis=0) (linear method), but a full sort of the contiguous
+    # (years x paths) transpose is several times faster than np.percentile's multi-kth partition
+    values = np.sort(values.T, axis=1)
+    position = np.asarray(percentiles) / 100 * (values.shape[1] - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, values.shape[1] - 1)
+    weight = position - lower
+    return (values[:, lower] * (1 - weight) + values[:, upper] * weight).T
+
+
+def simulate(years: int, current_job_salary: float, new_job_salary: float, salary_increase: RateDistribution,
+             compensation_paid: bool = False, compensation_payment: float = 0.0, compensation_annual_rate: float = 0.0,
+             investment_revenue: RateDistribution = RateDistribution(), paths: int = 100_000, seed=None,
+             percentiles=DEFAULT_PERCENTILES, chunk_size: int = DEFAULT_CHUNK_SIZE, antithetic: bool = True,
+             periods_per_year: int = 1, tax=None) -> SimulationResult:
+    """Simulate ``paths`` random paths of the salary increase and investment revenue.
+
+    Both jobs share the salary increase of a path, like in the deterministic calculation. The fan chart percentiles
+    are exact if all paths fit in one chunk, otherwise they are the path-weighted mean of the chunk percentiles.
+    The rates are drawn per year; with ``periods_per_year`` the compensation is paid out and compounded per period.
+    With ``tax`` the salaries of every path and the compensation payment are converted to net amounts.
+    """
+    rng = np.random.default_rng(seed)
+    percentiles = tuple(float(q) for q in percentiles)
+    overall_delta = np.empty(paths, dtype=np.float64)
+    fan = np.zeros((len(percentiles), years), dtype=np.float64)
+    if compensation_paid:
+        compensation_payment = net_compensation_payment(compensation_payment, new_job_salary, tax)
+
+    chunk_size = max(1, chunk_size // periods_per_year)  # the compensation arrays have one column per period
+    for start in range(0, paths, chunk_size):
+        n = min(chunk_size, paths - start)
+        # salary growth until the beginning of each year: the first year is the starting salary
+        salary_growth = np.ones((n, years), dtype=np.float64)
+        if years > 1:
+            salary_growth[:, 1:] = salary_increase.sample(rng, (n, years - 1), antithetic)
+            salary_growth[:, 1:] += 1
+            np.cumprod(salary_growth[:, 1:], axis=1, out=salary_growth[:, 1:])
+        if tax is None:
+            yearly_delta = salary_growth
+            yearly_delta *= new_job_salary - current_job_salary
+        else:
+            yearly_delta = tax.net_income(salary_growth * new_job_salary)
+            yearly_delta -= tax.net_income(salary_growth * current_job_salary)
+
+        if compensation_paid:
+            payouts, _ = compensation_payouts_varying(compensation_payment, compensation_annual_rate,
+                                                      investment_revenue.sample(rng, (n, years), antithetic),
+                                                      periods_per_year)
+            if periods_per_year > 1:
+                payouts = payouts.reshape(n, years, periods_per_year).sum(axis=2)
+            yearly_delta += payouts
+
+        cumulative_delta = np.cumsum(yearly_delta, axis=1, out=yearly_delta)
+        overall_delta[start:start + n] = cumulative_delta[:, -1] if years else 0.0
+        if years:
+            fan += _percentiles_per_year(cumulative_delta, percentiles) * (n / paths)
+
+    return SimulationResult(overall_delta=overall_delta, percentiles=percentiles, cumulative_delta_percentiles=fan)
@@ -0,0 +1,29 @@
+"""Sensitivity analysis: overall delta for a whole grid of two input parameters in one broadcasted pass."""
+import numpy as np
+
+from job_change_calculator.engine import key_metrics_batch
+
+# parameters of key_metrics_batch that can be swept
+SWEEP_PARAMETERS = ("years", "current_job_salary", "new_job_salary", "salary_increase_rate", "compensation_payment",
+                    "compensation_annual_rate", "investment_revenue_rate")
+
+
+def sweep(parameters: dict, x_name: str, x_values, y_name: str, y_values, metric: str = "overall_delta") -> np.ndarray:
+    """Evaluate ``metric`` for every combination of ``x_values`` and ``y_values``.
+
+    ``parameters`` holds the scalar keyword arguments of :func:`key_metrics_batch`; the swept parameters are
+    replaced by the grid values. Returns an array of shape ``(len(y_values), len(x_values))``.
+    """
+    for name in (x_name, y_name):
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter '{name}', expected one of {SWEEP_PARAMETERS}.")
+    if x_name == y_name:
+        raise ValueError("The two sweep parameters must be different.")
+
+    x_values = np.asarray(x_values)
+    y_values = np.asarray(y_values)
+    grid_parameters = dict(parameters)
+    grid_parameters[x_name] = x_values[None, :]
+    grid_parameters[y_name] = y_values[:, None]
+    values = key_metrics_batch(**grid_parameters)[metric]
+    return np.broadcast_to(values, (len(y_values), len(x_values)))
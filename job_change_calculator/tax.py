@@ -0,0 +1,205 @@
+"""Gross-to-net conversion for employees in Germany: income tax, solidarity surcharge, church tax and the employee
+share of the social contributions.
+
+The income tax follows the tariff of § 32a EStG: a basic allowance, two progression zones (quadratic) and two
+proportional zones (42% and 45%). The tariff of each tax year is precomputed as a table of zone limits and
+polynomial coefficients, so the tax of any array of incomes is a lookup of the zone and one polynomial evaluation,
+vectorized over years and scenario batches. A compensation payment (severance, no social contributions)
+can be taxed with the reduced rate of the "Fünftelregelung" (§ 34 EStG).
+
+This is an approximation for a full year of employment (tax class I, or III with joint assessment), not a payroll
+calculation: the taxable income is the gross salary minus the lump sums for income-related expenses and special
+expenses and minus the deductible social contributions. The law of the chosen tax year is applied to all future
+years. Amounts are in k€ like everywhere in the package, rates as fractions.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class TaxYear:
+    """Tariff (§ 32a EStG) and social security parameters of one year, amounts in €."""
+    basic_allowance: float  # upper limit of zone 1 (no tax)
+    zone_2_limit: float
+    zone_2_factor: float  # zone 2: (factor * y + 1400) * y with y = (income - basic_allowance) / 10000
+    zone_3_limit: float
+    zone_3_factor: float  # zone 3: (factor * z + 2397) * z + constant with z = (income - zone_2_limit) / 10000
+    zone_3_constant: float
+    zone_4_constant: float  # zone 4 (up to 277,825 €): 0.42 * income - constant
+    zone_5_constant: float  # zone 5: 0.45 * income - constant
+    solidarity_exemption: float  # no solidarity surcharge up to this income tax (doubled for joint assessment)
+    pension_ceiling: float  # contribution ceiling of the pension and unemployment insurance
+    health_ceiling: float  # contribution ceiling of the health and long-term care insurance
+    health_rate: float  # general rate plus the average additional contribution
+    care_rate: float
+    pension_rate: float = 0.186
+    unemployment_rate: float = 0.026
+    childless_surcharge: float = 0.006  # long-term care, paid by the employee alone
+    zone_4_limit: float = 277_825
+
+
+TAX_YEARS = {
+    2024: TaxYear(basic_allowance=11_784, zone_2_limit=17_005, zone_2_factor=954.80, zone_3_limit=66_760,
+                  zone_3_factor=181.19, zone_3_constant=991.21, zone_4_constant=10_636.31,
+                  zone_5_constant=18_971.06, solidarity_exemption=18_130, pension_ceiling=90_600,
+                  health_ceiling=62_100, health_rate=0.146 + 0.017, care_rate=0.034),
+    2025: TaxYear(basic_allowance=12_096, zone_2_limit=17_443, zone_2_factor=932.30, zone_3_limit=68_480,
+                  zone_3_factor=176.64, zone_3_constant=1_015.13, zone_4_constant=10_911.92,
+                  zone_5_constant=19_246.67, solidarity_exemption=19_950, pension_ceiling=96_600,
+                  health_ceiling=66_150, health_rate=0.146 + 0.025, care_rate=0.036),
+    2026: TaxYear(basic_allowance=12_348, zone_2_limit=17_799, zone_2_factor=914.51, zone_3_limit=69_878,
+                  zone_3_factor=173.10, zone_3_constant=1_034.87, zone_4_constant=11_135.63,
+                  zone_5_constant=19_470.38, solidarity_exemption=20_350, pension_ceiling=101_400,
+                  health_ceiling=69_750, health_rate=0.146 + 0.029, care_rate=0.036),
+}
+LATEST_TAX_YEAR = max(TAX_YEARS)
+
+INCOME_RELATED_EXPENSES = 1_230  # lump sum for employees (Arbeitnehmer-Pauschbetrag)
+SPECIAL_EXPENSES = 36  # lump sum per person (Sonderausgaben-Pauschbetrag)
+HEALTH_DEDUCTIBLE_SHARE = 0.96  # the part of the health contribution for sick pay is not deductible
+SOLIDARITY_RATE = 0.055
+SOLIDARITY_PHASE_IN_RATE = 0.119  # above the exemption the surcharge rises with 11.9% of the excess income tax
+SEVERANCE_FRACTION = 5  # Fünftelregelung
+CHUNK_SIZE = 16_384  # large arrays are converted in blocks of this size, which stay cache friendly
+
+
+@dataclass(frozen=True)
+class _Tariff:
+    # zone i (0-4) applies above limits[i - 1]: tax = (a * u + b) * u + c with u = (income - offset) / 10000
+    limits: np.ndarray
+    offset: np.ndarray
+    a: np.ndarray
+    b: np.ndarray
+    c: np.ndarray
+
+
+def _tariff(tax_year: TaxYear) -> _Tariff:
+    return _Tariff(limits=np.array([tax_year.basic_allowance, tax_year.zone_2_limit, tax_year.zone_3_limit,
+                                    tax_year.zone_4_limit]),
+                   offset=np.array([0.0, tax_year.basic_allowance, tax_year.zone_2_limit, 0.0, 0.0]),
+                   a=np.array([0.0, tax_year.zone_2_factor, tax_year.zone_3_factor, 0.0, 0.0]),
+                   b=np.array([0.0, 1400.0, 2397.0, 4200.0, 4500.0]),
+                   c=np.array([0.0, 0.0, tax_year.zone_3_constant, -tax_year.zone_4_constant,
+                               -tax_year.zone_5_constant]))
+
+
+TARIFFS = {year: _tariff(tax_year) for year, tax_year in TAX_YEARS.items()}
+
+
+def tariff_income_tax(taxable_income, tax_year: int = LATEST_TAX_YEAR) -> np.ndarray:
+    """Income tax (€) of § 32a EStG for a taxable income (€) of any shape, single assessment."""
+    tariff = TARIFFS[tax_year]
+    income = np.floor(np.maximum(np.asarray(taxable_income, dtype=np.float64), 0.0))
+    # number of limits below the income; a few comparisons are much faster than searchsorted for four limits
+    zone = (income > tariff.limits[0]).view(np.int8)
+    for limit in tariff.limits[1:]:
+        zone += income > limit
+    u = income
+    u -= tariff.offset[zone]
+    u /= 10_000
+    tax = tariff.a[zone] * u
+    tax += tariff.b[zone]
+    tax *= u
+    tax += tariff.c[zone]
+    return np.floor(tax)
+
+
+@dataclass(frozen=True)
+class GrossToNet:
+    """Personal tax situation for the gross-to-net conversion."""
+    tax_year: int = LATEST_TAX_YEAR
+    joint_assessment: bool = False  # splitting tariff, e.g. married with a partner without income (tax class III)
+    church_tax_rate: float = 0.0  # 0.08 in Bavaria and Baden-Württemberg, 0.09 elsewhere
+    childless: bool = True  # surcharge on the long-term care insurance
+    severance_relief: bool = True  # tax the compensation payment with the Fünftelregelung
+
+    def __post_init__(self):
+        if self.tax_year not in TAX_YEARS:
+            raise ValueError(f"Unknown tax year {self.tax_year}, expected one of {sorted(TAX_YEARS)}.")
+
+    @property
+    def parameters(self) -> TaxYear:
+        return TAX_YEARS[self.tax_year]
+
+    def _rates(self) -> tuple[float, float, float, float]:
+        # employee rates on the pension and on the health contribution base: all contributions and the deductible ones
+        p = self.parameters
+        care_rate = p.care_rate / 2 + (p.childless_surcharge if self.childless else 0.0)
+        return ((p.pension_rate + p.unemployment_rate) / 2, p.health_rate / 2 + care_rate,
+                p.pension_rate / 2, p.health_rate / 2 * HEALTH_DEDUCTIBLE_SHARE + care_rate)
+
+    def _contributions(self, gross: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # social contributions and the deductible part of them (€)
+        p = self.parameters
+        pension_rate, health_rate, deductible_pension_rate, deductible_health_rate = self._rates()
+        pension_base = np.minimum(gross, p.pension_ceiling)
+        health_base = np.minimum(gross, p.health_ceiling)
+        contributions = pension_base * pension_rate
+        contributions += health_base * health_rate
+        pension_base *= deductible_pension_rate
+        health_base *= deductible_health_rate
+        pension_base += health_base
+        return contributions, pension_base
+
+    def social_contributions(self, gross) -> np.ndarray:
+        """Employee share of pension, unemployment, health and long-term care insurance (€)."""
+        return self._contributions(np.asarray(gross, dtype=np.float64))[0]
+
+    def taxable_income(self, gross) -> np.ndarray:
+        """Taxable income (€) of a gross salary (€)."""
+        gross = np.asarray(gross, dtype=np.float64)
+        return self._taxable_income(gross, self._contributions(gross)[1])
+
+    def _taxable_income(self, gross: np.ndarray, deductible_contributions: np.ndarray) -> np.ndarray:
+        lump_sums = INCOME_RELATED_EXPENSES + SPECIAL_EXPENSES * (2 if self.joint_assessment else 1)
+        return np.maximum(gross - deductible_contributions - lump_sums, 0.0)
+
+    def income_tax(self, taxable_income) -> np.ndarray:
+        """Income tax (€), with the splitting tariff for joint assessment."""
+        if self.joint_assessment:
+            return 2 * tariff_income_tax(np.asarray(taxable_income, dtype=np.float64) / 2, self.tax_year)
+        return tariff_income_tax(taxable_income, self.tax_year)
+
+    def total_tax(self, income_tax) -> np.ndarray:
+        """Income tax plus solidarity surcharge and church tax (€)."""
+        income_tax = np.asarray(income_tax, dtype=np.float64)
+        exemption = self.parameters.solidarity_exemption * (2 if self.joint_assessment else 1)
+        # 5.5% of the income tax, phased in above the exemption (0 up to the exemption), rounded down to cents
+        solidarity = np.minimum((income_tax - exemption) * SOLIDARITY_PHASE_IN_RATE, income_tax * SOLIDARITY_RATE)
+        solidarity = np.floor(np.maximum(solidarity, 0.0) * 100) / 100
+        return income_tax * (1 + self.church_tax_rate) + solidarity
+
+    def net_income(self, gross) -> np.ndarray:
+        """Net salary (k€) of a yearly gross salary (k€) of any shape."""
+        gross = np.asarray(gross, dtype=np.float64)
+        if gross.size <= CHUNK_SIZE:
+            return self._net_income(gross)
+        flat = gross.ravel()
+        net = np.empty_like(flat)
+        for start in range(0, flat.size, CHUNK_SIZE):
+            net[start:start + CHUNK_SIZE] = self._net_income(flat[start:start + CHUNK_SIZE])
+        return net.reshape(gross.shape)
+
+    def _net_income(self, gross: np.ndarray) -> np.ndarray:
+        gross = gross * 1000
+        contributions, deductible_contributions = self._contributions(gross)
+        net = gross - contributions
+        net -= self.total_tax(self.income_tax(self._taxable_income(gross, deductible_contributions)))
+        net /= 1000
+        return net
+
+    def net_severance(self, severance, other_income) -> np.ndarray:
+        """Net compensation payment (k€): the additional taxes of a severance (k€) paid in a year with a gross
+        salary of ``other_income`` (k€). No social contributions are due on a severance."""
+        severance = np.asarray(severance, dtype=np.float64) * 1000
+        taxable_income = self.taxable_income(np.asarray(other_income, dtype=np.float64) * 1000)
+        income_tax = self.income_tax(taxable_income)
+        if self.severance_relief:
+            # the tax on a fifth of the severance, times five
+            income_tax_with_severance = income_tax + SEVERANCE_FRACTION * (
+                self.income_tax(taxable_income + severance / SEVERANCE_FRACTION) - income_tax)
+        else:
+            income_tax_with_severance = self.income_tax(taxable_income + severance)
+        additional_taxes = self.total_tax(income_tax_with_severance) - self.total_tax(income_tax)
+        return (severance - additional_taxes) / 1000
@@ -1,7 +1,32 @@
+import json
+import logging
+import os
+import threading
+
 import numpy as np
-import pandas as pd
 import streamlit as st
-import plotly.express as px
+import plotly.graph_objects as go
+
+from job_change_calculator.breakeven import (breakeven_annual_payout, breakeven_new_job_salary,
+                                             required_investment_revenue)
+from job_change_calculator.cache import ResultCache, scenario_key
+from job_change_calculator.career import CareerSchedule, Segment
+from job_change_calculator.engine import (ANNUAL_COMPENSATION, COMPENSATION_ACCOUNT_BALANCE, CURRENT_JOB,
+                                          DIFFERENCE_NJ_CJ_COMP, NEW_JOB, NOMINAL, PRESENT_VALUE, REAL, TOTAL_NEW_JOB,
+                                          VALUE_TERMS, key_metrics, net_compensation_payment,
+                                          projection_overall_delta)
+from job_change_calculator.export import (EXPORT_FORMATS, available_export_formats, export_bytes, offers_table,
+                                          projection_table)
+from job_change_calculator.incremental import IncrementalProjection
+from job_change_calculator.offers import compare_offers
+from job_change_calculator.payout_plan import LEVEL_REAL_INCOME, OBJECTIVES, optimal_payouts, plan_projection
+from job_change_calculator.profiling import StageTimer, profile_report, start_profiler
+from job_change_calculator.simulation import DISTRIBUTIONS, RateDistribution, simulate
+from job_change_calculator.sweep import sweep
+from job_change_calculator.tax import LATEST_TAX_YEAR, TAX_YEARS, GrossToNet
+
+logger = logging.getLogger("streamlit_app")
+timing_logger = logging.getLogger("streamlit_app.timings")
 
 st.set_page_config(
     page_title="Job Change Calculator",
@@ -15,42 +40,13 @@ st.set_page_config(
     }
 )
 
-# income types (index values for dataframe) for "normal" yearly view:
-TYPE_OF_INCOME = "Type of income"
-CURRENT_JOB = "Salary current Job"
-NEW_JOB = "Salary new job"
-ANNUAL_COMPENSATION = "Compensation payment (annual)"
-COMPENSATION_ACCOUNT_BALANCE = "Remaining compensation (incl. investment revenue)"  # the remaining heigt of the compensation over the years
-TOTAL_NEW_JOB = f"Total: {NEW_JOB} + {ANNUAL_COMPENSATION}"
-DIFFERENCE_NJ_CJ = f"Difference {NEW_JOB} vs. {CURRENT_JOB}"
-DIFFERENCE_NJ_CJ_COMP = f"Difference {NEW_JOB} vs {CURRENT_JOB} + {ANNUAL_COMPENSATION}"
-
-# income types (index values for dataframe) for cummulated "Overall sum":
-CURRENT_JOB_CUM_SUM = f"Overall sum {CURRENT_JOB}"
-NEW_JOB_CUM_SUM = f"Overall sum {NEW_JOB}"
-ANNUAL_COMPENSATION_SUM = f"Overall sum {ANNUAL_COMPENSATION}"
-TOTAL_NEW_JOB_SUM = f"Overall sum {TOTAL_NEW_JOB}"
-DIFFERENCE_NJ_CJ_SUM = f"Overall sum {DIFFERENCE_NJ_CJ}"
-DIFFERENCE_NJ_CJ_COMP_SUM = f"Overall sum {DIFFERENCE_NJ_CJ_COMP}"
-
-# color scheme for the charts
-COLOR_CURRENT_JOB = "#83C9FF"
-COLOR_NEW_JOB = "#0068C9"
-COLOR_ANNUAL_COMPENSATION = "#FFB74D"
-COLOR_TOTAL_NEW_JOB = "#7F7F7F"
-COLOR_POSITIVE = "#4CAF50"
-COLOR_NEGATIVE = "#E57373"
-COLOR_DIFFERENCE = "#9C27B0"
-
-color_discrete_map = {CURRENT_JOB: COLOR_CURRENT_JOB,
-                      CURRENT_JOB_CUM_SUM: COLOR_CURRENT_JOB,
-                      NEW_JOB: COLOR_NEW_JOB,
-                      NEW_JOB_CUM_SUM: COLOR_NEW_JOB,
-                      ANNUAL_COMPENSATION: COLOR_ANNUAL_COMPENSATION,
-                      ANNUAL_COMPENSATION_SUM: COLOR_ANNUAL_COMPENSATION,
-                      TOTAL_NEW_JOB: COLOR_TOTAL_NEW_JOB,
-                      TOTAL_NEW_JOB_SUM: COLOR_TOTAL_NEW_JOB
-                      }
+
+# opt-in instrumentation: for all sessions with JOB_CHANGE_CALCULATOR_PROFILING=1, for one session with ?debug=1
+profiling_enabled = bool(os.environ.get("JOB_CHANGE_CALCULATOR_PROFILING")) or st.query_params.get("debug") == "1"
+timer = StageTimer(enabled=profiling_enabled)
+profiler = start_profiler() if profiling_enabled and st.session_state.pop("profile_rerun", False) else None
+# set by the debug panel or the benchmarks: recalculate instead of serving the shared result cache
+bypass_cache = st.session_state.get("bypass_result_cache", False)
 
 st.logo("images/logo.png")
 st.sidebar.text("")  # vertical space
@@ -65,7 +61,7 @@ years = st.sidebar.number_input("Years until my retirement",
                                 help=help_year)
 
 help_current_job_salary = ("Enter the salary of your CURRENT job. You can enter your gross or net salary, but then "
-                           "enter gross or net everywhere.")
+                           "enter gross or net everywhere. With 'Calculate net income (Germany)' enter gross.")
 current_job_salary = st.sidebar.number_input("Current Job Salary (k€/year)",
                                              min_value=0,
                                              max_value=1000,
@@ -73,7 +69,7 @@ current_job_salary = st.sidebar.number_input("Current Job Salary (k€/year)",
                                              help=help_current_job_salary)
 
 help_new_job_salary = ("Enter the salary of your NEW job. You can enter your gross or net salary, but then enter gross "
-                       "or net everywhere.")
+                       "or net everywhere. With 'Calculate net income (Germany)' enter gross.")
 new_job_salary = st.sidebar.number_input("New job Salary (k€/year)",
                                          min_value=0,
                                          max_value=1000,
@@ -89,17 +85,60 @@ salary_increase_input = st.sidebar.number_input("Expected annual salary increase
                                                 help=help_salary_increase_input)
 salary_increase_percent = salary_increase_input / 100
 
+# career paths: column of the segment table -> (field of Segment, factor for display)
+career_columns = {"Start year": ("start_year", 1),
+                  "Salary change (%)": ("salary_change", 100),
+                  "Salary increase rate (%)": ("growth_rate", 100),
+                  "Working time (%)": ("work_share", 100)}
+default_careers = {CURRENT_JOB: {"Start year": [], "Salary change (%)": [], "Salary increase rate (%)": [],
+                                 "Working time (%)": []},
+                   NEW_JOB: {"Start year": [3], "Salary change (%)": [10.0], "Salary increase rate (%)": [np.nan],
+                             "Working time (%)": [100.0]}}
+
+
+def career_input(_job: str) -> CareerSchedule | None:
+    # segment table of one job in the sidebar; rows without start year are skipped, empty cells use the defaults of
+    # Segment (no change, the expected annual salary increase, full time). No segments: constant increase.
+    segments_input = st.sidebar.data_editor(
+        default_careers[_job], num_rows="dynamic", key=f"career {_job}",
+        column_config={"Start year": st.column_config.NumberColumn(min_value=1, max_value=100, step=1),
+                       "Salary change (%)": st.column_config.NumberColumn(min_value=-99.0, format="%.1f"),
+                       "Salary increase rate (%)": st.column_config.NumberColumn(min_value=-99.0, format="%.1f"),
+                       "Working time (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0,
+                                                                         format="%.0f")})
+    segments = []
+    for row in range(len(segments_input["Start year"])):
+        values = {name: segments_input[column][row] / factor for column, (name, factor) in career_columns.items()
+                  if segments_input[column][row] is not None and not np.isnan(segments_input[column][row])}
+        if "start_year" in values:
+            segments.append(Segment(**{**values, "start_year": int(values["start_year"])}))
+    return CareerSchedule(tuple(segments)) if segments else None
+
+
+current_job_career = new_job_career = None
+help_career = ("Model promotions, raises, part-time or breaks: each row starts a phase in the given year with a "
+               "one-time salary change, its own annual salary increase (empty: the expected annual salary increase "
+               "rate) and the paid share of the full-time salary (0% for a sabbatical). The job offers and the Monte "
+               "Carlo simulation keep one salary increase rate.")
+if st.sidebar.checkbox("Career path (promotions, part-time, breaks)", help=help_career):
+    st.sidebar.text("Current job")
+    current_job_career = career_input(CURRENT_JOB)
+    st.sidebar.text("New job")
+    new_job_career = career_input(NEW_JOB)
+
 compensation_payment = 0
 compensation_annual_rate = 0
 investment_revenue_input = 0
 investment_revenue_percent = 0.0
+periods_per_year = 1
 
 help_compensation_paid = "If you will receive a compensation payment, activate the checkbox and enter your numbers."
 compensation_paid = st.sidebar.checkbox("I will receive a compensation payment", help=help_compensation_paid)
 
 if compensation_paid:
     help_compensation_payment = ("Enter the amount of compensation payment you will receive. You can enter your gross "
-                                 "or net salary, but then enter gross or net everywhere.")
+                                 "or net salary, but then enter gross or net everywhere. With 'Calculate net income "
+                                 "(Germany)' enter gross.")
     compensation_payment = st.sidebar.number_input("Compensation payment (k€)",
                                                    min_value=0,
                                                    max_value=1000,
@@ -126,8 +165,110 @@ if compensation_paid:
                                                        help=help_investment_revenue_input)
     investment_revenue_percent = investment_revenue_input / 100  # 2% -> 0.02
 
+    help_monthly_calculation = ("Calculate month by month: the annual payout is paid in monthly installments and the "
+                                "investment revenue is compounded monthly (same effective annual rate). The results "
+                                "are still shown per year.")
+    if st.sidebar.checkbox("Monthly payouts and investment revenue", help=help_monthly_calculation):
+        periods_per_year = 12
+
+tax = None
+help_net_income = ("Enter gross amounts and calculate with net amounts: income tax, solidarity surcharge, church tax "
+                   "and the employee share of the social contributions in Germany are deducted from the salaries, the "
+                   "compensation payment is taxed as severance in the first year of the new job. An approximation for "
+                   "employees (lump sums for expenses, law of the chosen year for all years), not a payroll "
+                   "calculation.")
+if st.sidebar.checkbox("Calculate net income (Germany)", help=help_net_income):
+    tax_year = st.sidebar.selectbox("Tax year",
+                                    sorted(TAX_YEARS, reverse=True),
+                                    index=sorted(TAX_YEARS, reverse=True).index(LATEST_TAX_YEAR),
+                                    help="Tax law and contribution ceilings of this year are applied to all years.")
+    joint_assessment = st.sidebar.checkbox("Joint assessment (splitting)",
+                                           help="Married with a partner without income (tax class III).")
+    church_tax_options = {"No church tax": 0.0, "8% (Bavaria, Baden-Württemberg)": 0.08, "9% (other states)": 0.09}
+    church_tax = st.sidebar.selectbox("Church tax", church_tax_options)
+    childless = st.sidebar.checkbox("No children", value=True,
+                                    help="Childless employees pay a surcharge on the long-term care insurance.")
+    severance_relief = True
+    if compensation_paid:
+        severance_relief = st.sidebar.checkbox("Reduced tax on the compensation payment (Fünftelregelung)",
+                                               value=True,
+                                               help="Tax the compensation payment with the reduced rate of § 34 "
+                                                    "EStG (Fünftelregelung).")
+    tax = GrossToNet(tax_year, joint_assessment, church_tax_options[church_tax], childless, severance_relief)
+
+help_inflation_input = ("Enter the expected annual inflation rate in percent. The 'Real' view shows all amounts in "
+                        "today's money.")
+inflation_input = st.sidebar.number_input("Expected annual inflation rate (%)",
+                                          min_value=0.0,
+                                          max_value=100.0,
+                                          value=2.0,
+                                          step=0.1,
+                                          help=help_inflation_input)
+inflation_rate = inflation_input / 100
+
+help_discount_input = ("Enter the annual discount rate in percent, e.g. the return of a safe investment. The 'Present "
+                       "value' view and the present value of the overall delta discount all future amounts to today "
+                       "with this rate.")
+discount_input = st.sidebar.number_input("Discount rate for present values (%)",
+                                         min_value=0.0,
+                                         max_value=100.0,
+                                         value=3.0,
+                                         step=0.1,
+                                         help=help_discount_input)
+discount_rate = discount_input / 100
+
+
+def rate_distribution_input(_label, _mean, _default_volatility) -> RateDistribution:
+    kind = st.sidebar.selectbox(f"Distribution of the {_label}",
+                                DISTRIBUTIONS,
+                                index=DISTRIBUTIONS.index("Normal"),
+                                help=f"How the yearly {_label} is drawn for each simulated path. The rate entered "
+                                     f"above is the expected value.")
+    if kind in ("Normal", "Lognormal"):
+        volatility_input = st.sidebar.number_input(f"Volatility of the {_label} (%)",
+                                                   min_value=0.0,
+                                                   max_value=100.0,
+                                                   value=_default_volatility,
+                                                   step=0.1,
+                                                   help="Standard deviation of the yearly rate, e.g. '15.0'% for "
+                                                        "stocks.")
+        return RateDistribution(kind, _mean, volatility_input / 100)
+    if kind == "Historical bootstrap":
+        history_input = st.sidebar.text_input(f"Historical {_label} rates (%)",
+                                              help="Comma separated list of historical yearly rates, e.g. "
+                                                   "'2.1, -0.5, 3.0'. Each simulated year draws one of them.")
+        try:
+            history = tuple(float(value) / 100 for value in history_input.replace(";", ",").split(",")
+                            if value.strip())
+        except ValueError:
+            history = ()
+        if history:
+            return RateDistribution(kind, history=history)
+        st.sidebar.warning(f"Enter at least one historical {_label} rate. The fixed rate is used instead.")
+    return RateDistribution("Fixed", _mean)
+
+
+help_simulation = ("Simulate many random paths of the salary increase (and investment revenue) instead of a single "
+                   "fixed rate. The rates entered above are used as expected values.")
+simulation_enabled = st.sidebar.checkbox("Monte Carlo simulation", help=help_simulation)
+
+if simulation_enabled:
+    salary_increase_distribution = rate_distribution_input("salary increase", salary_increase_percent, 1.0)
+    investment_revenue_distribution = RateDistribution("Fixed", investment_revenue_percent)
+    if compensation_paid:
+        investment_revenue_distribution = rate_distribution_input("investment revenue", investment_revenue_percent,
+                                                                  15.0)
+    help_simulation_paths = "Number of simulated paths. More paths give more stable results but take longer."
+    simulation_paths = st.sidebar.number_input("Simulated paths",
+                                               min_value=1_000,
+                                               max_value=1_000_000,
+                                               value=100_000,
+                                               step=10_000,
+                                               help=help_simulation_paths)
+
 st.sidebar.text("")  # vertical space
 st.sidebar.write("<sup>Reset: Press 'STRG'+'F5'</sup>", unsafe_allow_html=True)
+timer.lap("inputs")
 
 st.title("Do you want or need to change your current job?")
 st.text("""
@@ -136,85 +277,96 @@ impact of a job change on your future salary and visualize the results.
 """)
 
 
-def add_calculations_salary_in_the_next_years(_df, _name, _initial_salary, _salary_increase_rate) -> pd.DataFrame:
-    data = {column_names[0]: [_initial_salary]}
-    # calculate the salaries for the next years
-    tmp_salary = _initial_salary
-    for i in range(1, _df.shape[1]):
-        previous_year_salary = data[column_names[i - 1]][0]
-        tmp_salary = previous_year_salary * (1 + _salary_increase_rate)
-        data[column_names[i]] = [tmp_salary]
-
-    salary_dict = [_initial_salary * ((1 + _salary_increase_rate) ** i) for i in range(len(column_names))]
-    _df.loc[_name] = salary_dict
-
-    return _df
-
-
-def add_compensation_payments(_df, _compensation_payment, _annual_payment, _investment_revenue_percent) -> pd.DataFrame:
-    # calculation of payments
-    payments = []
-    compensation_account_balance = []
-    remaining_balance = _compensation_payment
-    for year in column_names:
-        if year == column_names[-1]:
-            payments.append(remaining_balance)
-            remaining_balance = 0
-        else:
-            if remaining_balance >= _annual_payment:
-                payments.append(_annual_payment)
-                remaining_balance -= _annual_payment
-            else:
-                payments.append(remaining_balance)
-                remaining_balance = 0
-        # add the investment revenue after each year.
-        remaining_balance = remaining_balance * (1 + _investment_revenue_percent)
-        compensation_account_balance.append(remaining_balance)
-
-    # Add new row to DataFrame
-    _df.loc[ANNUAL_COMPENSATION] = payments
-
-    # add new row for new job + compensation
-    _df.loc[TOTAL_NEW_JOB] = np.add(_df.loc[NEW_JOB], _df.loc[ANNUAL_COMPENSATION])
-
-    # add new row for the remaining height of your compensation balance
-    _df.loc[COMPENSATION_ACCOUNT_BALANCE] = compensation_account_balance
-
-    return _df
-
-
-def add_calculations_differences_in_the_next_years(_df):
-    if compensation_paid == 0:
-        _df.loc[DIFFERENCE_NJ_CJ] = _df.loc[NEW_JOB] - _df.loc[CURRENT_JOB]
-    else:
-        _df.loc[DIFFERENCE_NJ_CJ_COMP] = _df.loc[NEW_JOB] + _df.loc[ANNUAL_COMPENSATION] - _df.loc[CURRENT_JOB]
-    return _df
-
-
-column_names = [float(i) for i in range(1, years + 1)]
-df = pd.DataFrame(columns=column_names)
-df.index.name = TYPE_OF_INCOME
-df = add_calculations_salary_in_the_next_years(df, CURRENT_JOB, current_job_salary, salary_increase_percent)
-df = add_calculations_salary_in_the_next_years(df, NEW_JOB, new_job_salary, salary_increase_percent)
-if compensation_paid:
-    df = add_compensation_payments(df, compensation_payment, compensation_annual_rate, investment_revenue_percent)
-df = add_calculations_differences_in_the_next_years(df)
-
-df.columns = df.columns.astype(float)
-df = df.sort_index(axis=1)
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    # one cache for all sessions; set JOB_CHANGE_CALCULATOR_CACHE to a file path to keep the results in SQLite
+    return ResultCache(path=os.environ.get("JOB_CHANGE_CALCULATOR_CACHE"))
+
+
+@st.cache_resource
+def get_timing_log_handler() -> logging.Handler:
+    # structured timing logs (one JSON object per rerun) on stderr, configured once per process
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    timing_logger.addHandler(handler)
+    timing_logger.setLevel(logging.INFO)
+    return handler
+
+
+@st.cache_resource(show_spinner=False)
+def start_chart_warm_up() -> threading.Thread:
+    # once per process, after the first run has been rendered: build every chart type in the background, so that the
+    # first switch of view or chart type does not pay for loading the plotly templates and validators
+    def warm_up():
+        from job_change_calculator.charts import warm_up as warm_up_charts
+
+        warm_up_charts()
+
+    thread = threading.Thread(target=warm_up, name="chart warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def log_timings(_record):
+    get_timing_log_handler()
+    timing_logger.info(json.dumps(_record))
+
+
+def cached(_key, _compute):
+    # the debug panel can bypass the result cache, to time a real recalculation instead of the lookup
+    return _compute() if bypass_cache else result_cache.get_or_compute(_key, _compute)
+
+
+def calculate_model():
+    # calculate all rows (float64 arrays) with the projection engine and wrap them in a dataframe for display.
+    # The projection of this session only recomputes the rows whose inputs changed since its last rerun.
+    incremental_projection = st.session_state.setdefault("incremental_projection", IncrementalProjection())
+    _projection = incremental_projection.project(years, current_job_salary, new_job_salary, salary_increase_percent,
+                                                 compensation_paid, compensation_payment, compensation_annual_rate,
+                                                 investment_revenue_percent, periods_per_year, tax,
+                                                 current_job_career, new_job_career)
+    logger.debug("projection: %s", incremental_projection.last_actions)
+    net_compensation = net_compensation_payment(compensation_payment, new_job_salary, tax) if compensation_paid else 0
+    model = dict(projection=_projection,
+                 metrics=key_metrics(_projection, net_compensation),
+                 breakeven_salary=breakeven_new_job_salary(years, current_job_salary, salary_increase_percent,
+                                                           compensation_paid, compensation_payment,
+                                                           compensation_annual_rate, investment_revenue_percent,
+                                                           periods_per_year, tax,
+                                                           current_job_career=current_job_career,
+                                                           new_job_career=new_job_career))
+    if compensation_paid:
+        model["breakeven_payout"] = breakeven_annual_payout(years, current_job_salary, new_job_salary,
+                                                            salary_increase_percent, compensation_payment,
+                                                            investment_revenue_percent, periods_per_year, tax,
+                                                            current_job_career, new_job_career)
+        model["required_revenue"] = required_investment_revenue(years, current_job_salary, new_job_salary,
+                                                                salary_increase_percent, compensation_payment,
+                                                                compensation_annual_rate,
+                                                                periods_per_year=periods_per_year, tax=tax,
+                                                                current_job_career=current_job_career,
+                                                                new_job_career=new_job_career)
+    return model
+
+
+result_cache = get_result_cache()
+scenario = scenario_key(years, current_job_salary, new_job_salary, salary_increase_percent, compensation_paid,
+                        compensation_payment, compensation_annual_rate, investment_revenue_percent, periods_per_year,
+                        tax, current_job_career, new_job_career)
+with timer.stage("engine"):
+    model = cached(("model", scenario), calculate_model)
+projection = model["projection"]
+column_names = projection.column_names
+# real and present values of all rows (one array pass), the rates of each value terms identify them in the caches
+with timer.stage("value terms"):
+    projections = {NOMINAL: projection, **projection.adjusted(inflation_rate, discount_rate)}
+value_terms_rates = {NOMINAL: None, REAL: inflation_rate, PRESENT_VALUE: discount_rate}
 
 # metrics
-current_job_salary_final = df.loc[CURRENT_JOB].iloc[-1]
-new_job_salary_final = df.loc[NEW_JOB].iloc[-1]
-if compensation_paid:
-    compensation_payment_incl_revenue = df.loc[ANNUAL_COMPENSATION].sum()
-else:
-    compensation_payment_incl_revenue = 0.0
-
-
-def overall_sum_4_job(df, job_name, column_names) -> float:
-    sum = np.sum(df.loc[job_name, column_names].values)
-    return sum
+metrics = model["metrics"]
+current_job_salary_final = metrics["current_job_salary_final"]
+new_job_salary_final = metrics["new_job_salary_final"]
+compensation_payment_incl_revenue = metrics["compensation_payment_incl_revenue"]
 
 
 st.header("Key metrics")
@@ -226,13 +378,13 @@ col_1_1.metric(f"Starting salary new job",
                delta=f"{new_job_salary - current_job_salary:.2f} k€ ({(new_job_salary - current_job_salary) / 12:.2f} k€)",
                help=help_salary_new_job_initial)
 
-if salary_increase_percent > 0.0:
+if salary_increase_percent > 0.0 or current_job_career is not None or new_job_career is not None:
     salary_difference_year = new_job_salary_final - current_job_salary_final
     salary_difference_month = salary_difference_year / 12
     help_salary_new_job_final = (
         f"This is the salary of the new job when you retire in {years} years: ({new_job_salary_final:.2f} k€). "
         f"This takes into account your 'Expected annual salary increase rate (%)' of "
-        f"{salary_increase_input}%. The plus/minus trend compares this to the current salary"
+        f"{salary_increase_input}% and your career path. The plus/minus trend compares this to the current salary"
         f" in {years} years: {(current_job_salary_final):.2f} k€), shown as difference "
         f"k€/year (k€/month).")
     col_1_2.metric(f"Salary new job in {years} years",
@@ -241,7 +393,7 @@ if salary_increase_percent > 0.0:
                    help=help_salary_new_job_final
                    )
 
-current_job_overall_salary = overall_sum_4_job(df, CURRENT_JOB, column_names)
+current_job_overall_salary = metrics["current_job_overall_salary"]
 help_overall_sum_current = "The cumulative sum of your current job's salary until your retirement."
 col_1_3.metric("Overall sum current job",
                value=f"{current_job_overall_salary:.2f} k€",
@@ -249,7 +401,7 @@ col_1_3.metric("Overall sum current job",
 
 help_overall_sum_new = ("The cumulative sum of your new job's salary until your retirement. Does not include the "
                         "compensation payment.")
-new_job_overall_salary = overall_sum_4_job(df, NEW_JOB, column_names)
+new_job_overall_salary = metrics["new_job_overall_salary"]
 col_1_4.metric("Overall sum new job",
                value=f"{new_job_overall_salary:.2f} k€",
                help=help_overall_sum_new
@@ -260,11 +412,11 @@ help_compenstation = ("Amount of your compensation payment, if received. This in
                       "revenue from the investment.")
 col_1_5.metric("Compensation incl. revenue",
                value=f"{compensation_payment_incl_revenue:.2f} k€",
-               delta=f"{compensation_payment_incl_revenue - compensation_payment:.2f} k€ (revenue)",
+               delta=f"{metrics['investment_revenue']:.2f} k€ (revenue)",
                help=help_compenstation
                )
 
-overall_delta = new_job_overall_salary + compensation_payment_incl_revenue - current_job_overall_salary
+overall_delta = metrics["overall_delta"]
 help_overall_delta = (f"The is the cumulative income for the next {years} years, including the compensation payment of "
                       f"{compensation_payment_incl_revenue} k€ including investment revenues. New job+compensation "
                       f"payment+investment revenues vs. current job.")
@@ -273,47 +425,167 @@ col_1_6.metric("Overall delta",
                delta=f"{overall_delta:.2f} k€",
                help=help_overall_delta)
 
-col_3_1, col_3_2, col_3_3, col_3_4 = st.columns([3, 1, 1, 1])
-col_3_1.header("Future development of your income")
-
-with col_3_2:
-    data_type = st.radio(
-        "View",
-        ["Yearly", "Overall sum"],
-        label_visibility="collapsed"
-    )
+# break-even values: where the overall delta is exactly 0 k€
+col_2_1, col_2_2, col_2_3, col_2_4, col_2_5, col_2_6 = st.columns(6)
+present_value_overall_delta = float(projection_overall_delta(projections[PRESENT_VALUE]))
+help_present_value_overall_delta = (f"The overall delta with all future amounts discounted to today with the "
+                                    f"'Discount rate for present values (%)' of {discount_input}%. The trend value "
+                                    f"compares it to the overall delta.")
+col_2_1.metric("Overall delta (present value)",
+               value=f"{present_value_overall_delta:.2f} k€",
+               delta=f"{present_value_overall_delta - overall_delta:.2f} k€ vs. nominal",
+               help=help_present_value_overall_delta)
+
+breakeven_salary = model["breakeven_salary"]
+help_breakeven_salary = ("The minimum starting salary of the new job at which the overall delta is 0 k€, i.e. the "
+                         "new job (incl. compensation payment) earns as much as the current job until your "
+                         "retirement.")
+if not np.isnan(breakeven_salary):
+    col_2_4.metric("Break-even salary new job",
+                   value=f"{breakeven_salary:.2f} k€",
+                   delta=f"{breakeven_salary - new_job_salary:.2f} k€ vs. entered",
+                   delta_color="inverse",
+                   help=help_breakeven_salary)
 
-with col_3_3:
-    chart_type = st.radio(
-        "Chart type",
-        ["Bar charts", "Line charts"],
-        label_visibility="collapsed",
-    )
-
-
-def plot_bar_chart(_df):
-    if compensation_paid == 0:
-        title = "Comparison of current salary and new salary"
+if compensation_paid:
+    breakeven_payout = model["breakeven_payout"]
+    help_breakeven_payout = ("The highest annual payout from the compensation payment at which the overall delta is "
+                             "still at least 0 k€. Paying out less leaves more money invested, so the investment "
+                             "revenue grows.")
+    if np.isnan(breakeven_payout):
+        breakeven_payout_text = "not reachable"
+    elif np.isinf(breakeven_payout):
+        breakeven_payout_text = "any payout"
     else:
-        title = "Comparison of current salary and new salary with compensation payment"
-    if data_type == "Overall sum":
-        title = title + " (cumulative overall sum)"
-
-    # convert df into "longer" format, because it is easier for plotly
-    df_long = _df.reset_index().melt(id_vars=TYPE_OF_INCOME, var_name='Year', value_name='Income')
-    fig = px.bar(df_long,
-                 x='Year',
-                 y='Income',
-                 barmode='group',
-                 hover_data={TYPE_OF_INCOME: True, 'Income': True, 'Year': True},
-                 title=title,
-                 color=TYPE_OF_INCOME,
-                 color_discrete_map=color_discrete_map,
-                 text_auto=True  # show bar value(s) inside the bars
-                 )
-
-    # set legend
+        breakeven_payout_text = f"{breakeven_payout:.2f} k€"
+    col_2_5.metric("Break-even annual payout",
+                   value=breakeven_payout_text,
+                   help=help_breakeven_payout)
+
+    required_revenue = model["required_revenue"]
+    help_required_revenue = ("The minimum 'Expected annual revenue from investment (%)' at which the overall delta is "
+                             "0 k€.")
+    col_2_6.metric("Break-even investment revenue",
+                   value="not reachable" if np.isnan(required_revenue) else f"{required_revenue * 100:.2f} %",
+                   help=help_required_revenue)
+
+timer.lap("key metrics")
+
+# the charting stack (pandas, plotly.express) takes most of the cold start: import it only now, after the sidebar and
+# the key metrics have been sent to the browser
+with timer.stage("import charts"):
+    from job_change_calculator.charts import (COLOR_ANNUAL_COMPENSATION, COLOR_DIFFERENCE,  # noqa: E402
+                                              COLOR_NEGATIVE, COLOR_POSITIVE, COLOR_TOTAL_NEW_JOB, build_view)
+
+
+@st.fragment
+def show_income_development(_scenario, _projections, _timer):
+    # charts and detailed table: the view toggles rerun only this fragment, the model comes from the full run.
+    # _projections: the projection in each value terms (nominal, real, present value)
+    partial_rerun = _timer.reported  # the full run has already reported its timings
+    if partial_rerun:
+        _timer = StageTimer(enabled=_timer.enabled)
+
+    col_3_1, col_3_2, col_3_3, col_3_4 = st.columns([3, 1, 1, 1])
+    col_3_1.header("Future development of your income")
+
+    with col_3_2:
+        _data_type = st.radio(
+            "View",
+            ["Yearly", "Overall sum"],
+            label_visibility="collapsed"
+        )
+
+    with col_3_3:
+        _chart_type = st.radio(
+            "Chart type",
+            ["Bar charts", "Line charts"],
+            label_visibility="collapsed",
+        )
+
+    with col_3_4:
+        _value_terms = st.radio(
+            "Values",
+            VALUE_TERMS,
+            label_visibility="collapsed",
+        )
+    _projection = _projections[_value_terms]
+
+    # charts and detailed table of the chosen view are shared by all sessions with the same inputs
+    with _timer.stage("view"):
+        _df, fig_comparison, fig_difference = cached(
+            ("view", _scenario, _data_type, _chart_type, _value_terms, value_terms_rates[_value_terms]),
+            lambda: build_view(_projection.to_frame(), compensation_paid, _data_type, _chart_type, _timer,
+                               _projection.cumulative_frame(), _value_terms))
+    with _timer.stage("render charts"):
+        st.plotly_chart(fig_comparison, use_container_width=True)
+        st.plotly_chart(fig_difference, use_container_width=True)
+
+    st.header("Detailed calculation")
+
+    # column configs:
+    # create a number float %.1f only for dtype float (-> dynamic names "relevant month)
+    column_config = {}
+    for col in _projection.column_names:
+        column_config[col] = st.column_config.NumberColumn(
+            f"{int(col)}. year",
+            help=f"Your future income in the {int(col)}. year.",
+            min_value=0,
+            # step=1,
+            format="%.2f k€",
+        )
+    # add column config for index / "type"
+    # column_config[_df.index.name] = st.column_config.TextColumn(width=500)
+
+    with _timer.stage("table"):
+        st.dataframe(_df, column_config=column_config, use_container_width=True)
+
+    if partial_rerun and _timer.enabled:
+        log_timings(_timer.record(fragment="income development", view=_data_type, chart_type=_chart_type,
+                                  value_terms=_value_terms))
+        st.caption(f"Partial rerun: {_timer.total_ms:.2f} ms "
+                   f"({', '.join(f'{name} {ms:.2f} ms' for name, ms in _timer.timings.items())})")
+    return _data_type, _chart_type, _value_terms
+
+
+data_type, chart_type, value_terms = show_income_development(scenario, projections, timer)
+
+
+@st.fragment
+def show_export(_name, _key, _make_table):
+    # the file is only created when requested (shared by all sessions via the result cache), not on every rerun;
+    # _key identifies the exported results, _make_table returns them as Arrow table (job_change_calculator.export)
+    col_1, col_2, col_3 = st.columns([1, 1, 4])
+    export_format = col_1.selectbox("Export format", available_export_formats(), key=f"{_name}_export_format",
+                                    label_visibility="collapsed")
+    extension, mime = EXPORT_FORMATS[export_format]
+    if col_2.button("Create export file", key=f"{_name}_export_create"):
+        with timer.stage("export"):
+            data = cached(("export", _key, export_format), lambda: export_bytes(_make_table(), export_format))
+        st.session_state[f"{_name}_export"] = (_key, export_format, data)
+    export = st.session_state.get(f"{_name}_export")
+    if export is not None and export[:2] == (_key, export_format):
+        col_3.download_button(f"Download {extension}", export[2], file_name=f"{_name}.{extension}", mime=mime,
+                              key=f"{_name}_export_download")
+
+
+show_export("job_change_calculation", scenario, lambda: projection_table(projection))
+
+
+def plot_payout_plans(_constant, _optimal):
+    # payouts (bars) and difference new job + payouts vs. current job (lines) of both plans, yearly projections
+    title = "Payouts from the compensation payment: constant annual payout vs. optimal plan"
+    fig = go.Figure()
+    for name, plan, color in (("constant payout", _constant, COLOR_TOTAL_NEW_JOB),
+                              ("optimal plan", _optimal, COLOR_ANNUAL_COMPENSATION)):
+        fig.add_trace(go.Bar(x=column_names, y=plan.row(ANNUAL_COMPENSATION), name=f"Payout, {name}",
+                             marker_color=color, hovertemplate="%{y:.2f} k€"))
+        fig.add_trace(go.Scatter(x=column_names, y=plan.row(DIFFERENCE_NJ_CJ_COMP), mode="lines+markers",
+                                 name=f"Difference vs. current job, {name}", line=dict(color=color),
+                                 hovertemplate="%{y:.2f} k€"))
+    fig.add_hline(y=0, line_dash="dot", line_color=COLOR_TOTAL_NEW_JOB)
     fig.update_layout(
+        barmode="group",
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -321,39 +593,84 @@ def plot_bar_chart(_df):
             xanchor="center",
             x=0.5
         ),
-        legend_title=None,
+        xaxis_title="Year",
         yaxis_title="Income (k€)",
+        title=title,
         title_font=dict(size=14, family="Arial", weight="normal"),
         title_x=0.0,
         title_y=0.85
     )
-
-    fig.update_traces(texttemplate='%{y:.2f} k€', textposition='auto')  # format display values inside the bars
-
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_line_chart(_df_cumsum):
-    if compensation_paid == 0:
-        title = "Comparison of current salary and new salary"
-    else:
-        title = "Comparison of current salary and new salary with compensation payment"
-    if data_type == "Overall sum":
-        title = title + " (cumulative overall sum)"
-
-    # convert df into "longer" format, because it is easier for plotly
-    df_long = _df_cumsum.reset_index().melt(id_vars=TYPE_OF_INCOME, var_name='Year', value_name='Income')
-    fig = px.line(df_long,
-                  x='Year',
-                  y='Income',
-                  hover_data={TYPE_OF_INCOME: True, 'Income': True, 'Year': False},
-                  color=TYPE_OF_INCOME,
-                  title=title,
-                  color_discrete_map=color_discrete_map,
-                  markers=True)
-
-    fig.update_xaxes(tickmode='linear', dtick=1)  # only full years
-    # set legend
+help_payout_plan = ("Instead of a constant annual payout, pay out a different amount each year, so that your income "
+                    "is as smooth as possible. The plan pays out the complete compensation payment incl. investment "
+                    "revenue until your retirement.")
+if compensation_paid and years and st.checkbox("Optimize the payout plan", help=help_payout_plan):
+    st.header("Payout plan")
+    help_payout_objective = ("'Smallest maximum shortfall': the largest gap between the new job (incl. payouts) and "
+                             "the current job in any year is as small as possible. 'Level real income': the lowest "
+                             "income of the new job (incl. payouts) in today's money is as high as possible, with the "
+                             "'Expected annual inflation rate (%)'.")
+    payout_objective = st.radio("Objective", OBJECTIVES, horizontal=True, help=help_payout_objective)
+    payout_plan_key = ("payout plan", scenario, payout_objective,
+                       inflation_rate if payout_objective == LEVEL_REAL_INCOME else None)
+    with timer.stage("payout plan"):
+        payout_plan = cached(payout_plan_key, lambda: optimal_payouts(
+            years, current_job_salary, new_job_salary, salary_increase_percent, compensation_payment,
+            investment_revenue_percent, payout_objective, inflation_rate, periods_per_year, tax, current_job_career,
+            new_job_career))
+        optimal_projection = plan_projection(projection, payout_plan)
+        payout_plans = {"constant payout": (projection.yearly(), projections[REAL]),
+                        "optimal plan": (optimal_projection.yearly(),
+                                         optimal_projection.adjusted(inflation_rate)[REAL])}
+    # largest shortfall vs. the current job (negative: the new job always earns more) and lowest real income
+    payout_plan_metrics = {name: (-float(nominal.row(DIFFERENCE_NJ_CJ_COMP).min()),
+                                  float(real.row(TOTAL_NEW_JOB).min()))
+                           for name, (nominal, real) in payout_plans.items()}
+    constant_shortfall, constant_real_income = payout_plan_metrics["constant payout"]
+
+    col_6 = st.columns(4)
+    for i, (plan_name, (largest_shortfall, lowest_real_income)) in enumerate(payout_plan_metrics.items()):
+        col_6[i].metric(f"Largest shortfall, {plan_name}",
+                        value=f"{largest_shortfall:.2f} k€",
+                        delta=f"{largest_shortfall - constant_shortfall:.2f} k€" if i else None,
+                        delta_color="inverse",
+                        help="The largest amount per year by which the new job (incl. payouts) earns less than the "
+                             "current job (negative: it always earns more).")
+        col_6[i + 2].metric(f"Lowest real income, {plan_name}",
+                            value=f"{lowest_real_income:.2f} k€",
+                            delta=f"{lowest_real_income - constant_real_income:.2f} k€" if i else None,
+                            help="The lowest yearly income of the new job (incl. payouts) in today's money.")
+    plot_payout_plans(payout_plans["constant payout"][0], payout_plans["optimal plan"][0])
+    st.dataframe(optimal_projection.to_frame([ANNUAL_COMPENSATION, COMPENSATION_ACCOUNT_BALANCE, TOTAL_NEW_JOB,
+                                              DIFFERENCE_NJ_CJ_COMP]),
+                 column_config={col: st.column_config.NumberColumn(f"{int(col)}. year", format="%.2f k€")
+                                for col in column_names},
+                 use_container_width=True)
+
+
+def plot_fan_chart(_simulation):
+    title = "Overall delta (cumulative) of new job vs. current job: percentiles of all simulated paths"
+    percentile_values = _simulation.cumulative_delta_percentiles
+    percentiles = _simulation.percentiles
+    fig = go.Figure()
+    # one shaded band per pair of outer percentiles, e.g. 5-95 and 25-75
+    for i in range(len(percentiles) // 2):
+        lower, upper = percentile_values[i], percentile_values[-1 - i]
+        band_name = f"{percentiles[i]:g}-{percentiles[-1 - i]:g}% of paths"
+        fig.add_trace(go.Scatter(x=column_names, y=lower, mode="lines", line=dict(width=0), showlegend=False,
+                                 legendgroup=band_name, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=column_names, y=upper, mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor=COLOR_DIFFERENCE, opacity=0.2 + 0.2 * i, name=band_name,
+                                 legendgroup=band_name, hovertemplate="%{y:.2f} k€"))
+    if len(percentiles) % 2:
+        middle = len(percentiles) // 2
+        fig.add_trace(go.Scatter(x=column_names, y=percentile_values[middle], mode="lines+markers",
+                                 line=dict(color=COLOR_DIFFERENCE), name=f"{percentiles[middle]:g}% (median)",
+                                 hovertemplate="%{y:.2f} k€"))
+
+    fig.add_hline(y=0, line_dash="dot", line_color=COLOR_TOTAL_NEW_JOB)
     fig.update_layout(
         legend=dict(
             orientation="h",
@@ -362,157 +679,204 @@ def plot_line_chart(_df_cumsum):
             xanchor="center",
             x=0.5
         ),
-        legend_title=None,
+        xaxis_title="Year",
+        yaxis_title="Difference (k€)",
+        title=title,
         title_font=dict(size=14, family="Arial", weight="normal"),
         title_x=0.0,
-        title_y=0.85,
-        yaxis=dict(range=[0, df_long['Income'].max() * 1.1]),  # y-axis start with '0'
-        yaxis_title="Income (k€)"
+        title_y=0.85
     )
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_difference_bar_chart(_df_diff):
-    if compensation_paid == 0:
-        # -> difference between CURRENT_JOB, NEW_JOB
-        title = f"Difference between {CURRENT_JOB} and {NEW_JOB}"
+# sensitivity analysis: parameter name -> (label, factor for display, current value)
+sweep_options = {"new_job_salary": ("New job salary (k€/year)", 1, new_job_salary),
+                 "current_job_salary": ("Current job salary (k€/year)", 1, current_job_salary),
+                 "years": ("Years until retirement", 1, years),
+                 "salary_increase_rate": ("Salary increase rate (%)", 100, salary_increase_input)}
+if compensation_paid:
+    sweep_options.update({"compensation_payment": ("Compensation payment (k€)", 1, compensation_payment),
+                          "compensation_annual_rate": ("Annual payout (k€/year)", 1, compensation_annual_rate),
+                          "investment_revenue_rate": ("Investment revenue (%)", 100, investment_revenue_input)})
+
+
+def sweep_axis_input(_column, _label, _default_name):
+    names = list(sweep_options)
+    name = _column.selectbox(_label, names, index=names.index(_default_name),
+                             format_func=lambda option: sweep_options[option][0])
+    label, factor, value = sweep_options[name]
+    if name == "years":
+        value_range = _column.slider(f"Range: {label}", min_value=1, max_value=100, value=(1, 100),
+                                     key=f"{_label} range years")
     else:
-        # -> difference between CURRENT_JOB, TOTAL_NEW_JOB
-        title = f"Difference between '{CURRENT_JOB}' and '{TOTAL_NEW_JOB}'"
-    if data_type == "Overall sum":
-        title = title + " (cumulative overall sum)"
-
-    df_diff_t = _df_diff.T
-    df_diff_t = df_diff_t.reset_index()
-    df_diff_t.columns = ['Year', 'Difference']
-    # add colors: negative is red, positive is green
-    df_diff_t['Color'] = df_diff_t['Difference'].apply(lambda x: 'red' if x < 0 else 'green')
-    fig = px.bar(df_diff_t,
-                 x='Year',
-                 y='Difference',
-                 hover_data={'Difference': True, 'Year': True, "Color": False},
-                 title=title,
-                 color='Color',
-                 color_discrete_map={'red': COLOR_NEGATIVE, 'green': COLOR_POSITIVE},
-                 text='Difference'  # show 'difference' value inside the bars
-                 )
-
-    # set y axis to always display the "0"-line
-    y_min = min(df_diff_t['Difference'].min(), -5.0)
-    y_max = max(df_diff_t['Difference'].max(), 5.0)
-    fig.update_layout(yaxis=dict(range=[y_min, y_max * 1.1]),
-                      yaxis_title="Difference (k€)",
-                      showlegend=False,
-                      height=350,
-                      title_font=dict(size=14, family="Arial", weight="normal"),
-                      title_x=0.0,
-                      title_y=0.85
-                      )
-    fig.update_traces(texttemplate='%{text:.2f} k€', textposition='auto')  # format text in bars
-
+        upper_limit = float(max(2 * value, 10 if factor == 100 else 100))
+        value_range = _column.slider(f"Range: {label}", min_value=0.0, max_value=upper_limit,
+                                     value=(0.0, upper_limit), key=f"{_label} range {name}")
+    return name, value_range
+
+
+def plot_sensitivity_heatmap(_x_name, _x_values, _y_name, _y_values, _overall_delta):
+    x_label, x_factor, _ = sweep_options[_x_name]
+    y_label, y_factor, _ = sweep_options[_y_name]
+    x = _x_values * x_factor
+    y = _y_values * y_factor
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(x=x, y=y, z=_overall_delta, colorscale=[[0, COLOR_NEGATIVE], [0.5, "#FFFFFF"],
+                                                                     [1, COLOR_POSITIVE]],
+                             zmid=0, colorbar=dict(title="k€"),
+                             hovertemplate=f"{x_label}: %{{x:.2f}}<br>{y_label}: %{{y:.2f}}<br>"
+                                           f"Overall delta: %{{z:.2f}} k€<extra></extra>"))
+    # break-even line: overall delta = 0
+    fig.add_trace(go.Contour(x=x, y=y, z=_overall_delta, showscale=False, hoverinfo="skip",
+                             contours=dict(start=0, end=0, size=1, coloring="lines"),
+                             line=dict(color=COLOR_DIFFERENCE, width=3)))
+    fig.update_layout(
+        title="Overall delta (new job + compensation vs. current job). The line marks an overall delta of 0 k€.",
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        title_font=dict(size=14, family="Arial", weight="normal"),
+        title_x=0.0,
+        title_y=0.95
+    )
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_difference_line_char(_df_diff):
-    if compensation_paid == 0:
-        # -> difference between CURRENT_JOB, NEW_JOB
-        title = f"Difference between '{CURRENT_JOB}' and '{NEW_JOB}'"
+help_sensitivity = ("Shows the overall delta for a whole grid of two parameters at once, all other parameters stay "
+                    "as entered in the sidebar.")
+if st.checkbox("Show sensitivity analysis", help=help_sensitivity):
+    st.header("Sensitivity analysis")
+    col_5_1, col_5_2, col_5_3 = st.columns([2, 2, 1])
+    sweep_x_name, sweep_x_range = sweep_axis_input(col_5_1, "Parameter x-axis", "new_job_salary")
+    sweep_y_name, sweep_y_range = sweep_axis_input(col_5_2, "Parameter y-axis",
+                                                   "compensation_annual_rate" if compensation_paid else "years")
+    sweep_resolution = col_5_3.number_input("Grid resolution", min_value=10, max_value=500, value=200, step=10,
+                                            help="Number of values per axis.")
+    if sweep_x_name == sweep_y_name:
+        st.warning("Please choose two different parameters.")
     else:
-        # -> difference between CURRENT_JOB, TOTAL_NEW_JOB
-        title = f"Difference between '{CURRENT_JOB}' and '{TOTAL_NEW_JOB}'"
-
-    if data_type == "Overall sum":
-        title = title + " (cumulative overall sum)"
-
-    df_diff_t = _df_diff.T
-    df_diff_t = df_diff_t.reset_index()
-    df_diff_t.columns = ['Year', 'Difference']
-    fig = px.line(df_diff_t, x='Year', y='Difference', title=title, markers=True, )
-
-    fig.update_traces(line=dict(color=COLOR_DIFFERENCE))
-
-    # set y axis to always display the "0"-line
-    y_min = min(df_diff_t['Difference'].min(), -5.0)
-    y_max = max(df_diff_t['Difference'].max(), 5.0)
-    fig.update_layout(yaxis=dict(range=[y_min, y_max * 1.1]),
-                      yaxis_title="Income (k€)",
-                      showlegend=False,
-                      height=350,
-                      title_font=dict(size=14, family="Arial", weight="normal"),
-                      title_x=0.0,
-                      title_y=0.85
-                      )
-
+        sweep_values = {}
+        for sweep_name, sweep_range in ((sweep_x_name, sweep_x_range), (sweep_y_name, sweep_y_range)):
+            if sweep_name == "years":
+                sweep_values[sweep_name] = np.arange(sweep_range[0], sweep_range[1] + 1)
+            else:
+                sweep_values[sweep_name] = np.linspace(*sweep_range, sweep_resolution) / sweep_options[sweep_name][1]
+        sweep_parameters = dict(years=years, current_job_salary=current_job_salary, new_job_salary=new_job_salary,
+                                salary_increase_rate=salary_increase_percent, compensation_paid=compensation_paid,
+                                compensation_payment=compensation_payment,
+                                compensation_annual_rate=compensation_annual_rate,
+                                investment_revenue_rate=investment_revenue_percent,
+                                periods_per_year=periods_per_year, tax=tax,
+                                current_job_career=current_job_career, new_job_career=new_job_career)
+        with timer.stage("sensitivity"):
+            sweep_overall_delta = sweep(sweep_parameters, sweep_x_name, sweep_values[sweep_x_name], sweep_y_name,
+                                        sweep_values[sweep_y_name])
+            plot_sensitivity_heatmap(sweep_x_name, sweep_values[sweep_x_name], sweep_y_name,
+                                     sweep_values[sweep_y_name], sweep_overall_delta)
+
+# job offers: column of the input table -> (parameter of compare_offers, factor for display)
+offer_columns = {"Starting salary (k€/year)": ("new_job_salary", 1),
+                 "Salary increase rate (%)": ("salary_increase_rate", 100),
+                 "Signing bonus (k€)": ("signing_bonus", 1),
+                 "Compensation payment (k€)": ("compensation_payment", 1),
+                 "Annual payout (k€/year)": ("compensation_annual_rate", 1),
+                 "Investment revenue (%)": ("investment_revenue_rate", 100)}
+default_offers = {"Offer": ["Offer A", "Offer B", "Offer C"],
+                  "Starting salary (k€/year)": [90.0, 80.0, 105.0],
+                  "Salary increase rate (%)": [2.0, 3.0, 1.0],
+                  "Signing bonus (k€)": [0.0, 10.0, 0.0],
+                  "Compensation payment (k€)": [0.0, 0.0, 0.0],
+                  "Annual payout (k€/year)": [0.0, 0.0, 0.0],
+                  "Investment revenue (%)": [0.0, 0.0, 0.0]}
+
+
+def plot_offer_comparison(_comparison, _top):
+    title = f"Overall delta (cumulative) of the best {len(_top)} offer(s) vs. current job"
+    fig = go.Figure()
+    for i in _top:
+        fig.add_trace(go.Scatter(x=column_names, y=np.cumsum(_comparison.yearly_delta[i]), mode="lines+markers",
+                                 name=_comparison.names[i], hovertemplate="%{y:.2f} k€"))
+    fig.add_hline(y=0, line_dash="dot", line_color=COLOR_TOTAL_NEW_JOB)
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.3,
+            xanchor="center",
+            x=0.5
+        ),
+        xaxis_title="Year",
+        yaxis_title="Difference (k€)",
+        title=title,
+        title_font=dict(size=14, family="Arial", weight="normal"),
+        title_x=0.0,
+        title_y=0.85
+    )
     st.plotly_chart(fig, use_container_width=True)
 
 
-# generate the dataframes for the different chart types (comparison/difference) and view modes (Yearly/Overall sum)
-if compensation_paid == 0:
-    df_4_comparison = df.loc[[CURRENT_JOB, NEW_JOB]]
-    df_4_difference = df.loc[[DIFFERENCE_NJ_CJ]]
-else:
-    df_4_comparison = df.loc[[CURRENT_JOB, NEW_JOB, ANNUAL_COMPENSATION, TOTAL_NEW_JOB]]
-    df_4_difference = df.loc[[DIFFERENCE_NJ_CJ_COMP]]
-
-# plot comparison chart:
-if data_type == "Yearly":
-    if chart_type == "Line charts":  # yearly + line
-        plot_line_chart(df_4_comparison)
-    else:  # yearly + bar
-        plot_bar_chart(df_4_comparison)
-
-elif data_type == "Overall sum":
-    # calculate the cumulative/overall sum for each year
-    df_4_comparison_cumsum = df_4_comparison.cumsum(axis=1)
-    df_4_comparison_cumsum = df_4_comparison_cumsum.rename(index={CURRENT_JOB: CURRENT_JOB_CUM_SUM,
-                                                                  NEW_JOB: NEW_JOB_CUM_SUM,
-                                                                  ANNUAL_COMPENSATION: ANNUAL_COMPENSATION_SUM,
-                                                                  TOTAL_NEW_JOB: TOTAL_NEW_JOB_SUM
-                                                                  })
-    # append cumsum data to "main" df, because we want to print the df later
-    df = pd.concat([df, df_4_comparison_cumsum])
-    if chart_type == "Line charts":
-        plot_line_chart(df_4_comparison_cumsum)
-    else:
-        plot_bar_chart(df_4_comparison_cumsum)
-
-# plot difference chart:
-if data_type == "Yearly":
-    if chart_type == "Line charts":  # yearly + line
-        plot_difference_line_char(df_4_difference)
-    else:  # yearly + bar
-        plot_difference_bar_chart(df_4_difference)
-
-elif data_type == "Overall sum":
-    df_4_difference_cumsum = df_4_difference.cumsum(axis=1)
-    df_4_difference_cumsum = df_4_difference_cumsum.rename(index={DIFFERENCE_NJ_CJ: DIFFERENCE_NJ_CJ_SUM,
-                                                                  DIFFERENCE_NJ_CJ_COMP: DIFFERENCE_NJ_CJ_COMP_SUM,
-                                                                  })
-    # append cumsum data to "main" df, because we want to print the df later
-    df = pd.concat([df, df_4_difference_cumsum])
-
-    if chart_type == "Line charts":
-        plot_difference_line_char(df_4_difference_cumsum)
+help_offers = ("Compare several job offers against your current job (salary and salary increase rate from the "
+               "sidebar). Each offer has its own salary, salary increase, signing bonus (paid in the first year) and "
+               "compensation package.")
+if st.checkbox("Compare job offers", help=help_offers):
+    st.header("Job offers")
+    offers = st.data_editor(default_offers, num_rows="dynamic", use_container_width=True, key="offers",
+                            column_config={column: st.column_config.NumberColumn(min_value=0.0, format="%.2f")
+                                           for column in offer_columns})
+    offer_values = {column: np.array([np.nan if value is None else value for value in offers[column]], dtype=float)
+                    for column in offer_columns}
+    offer_rows = np.flatnonzero(~np.isnan(offer_values["Starting salary (k€/year)"]))  # skip rows without salary
+    offer_count = len(offer_rows)
+    top_k = st.number_input("Offers in the chart", min_value=1, max_value=50, value=5,
+                            help="Only the best offers (by overall delta) are drawn, the table ranks all offers.")
+    if offer_count and years:
+        with timer.stage("offers"):
+            offer_names = [offers["Offer"][i] or f"Offer {i + 1}" for i in offer_rows]
+            comparison = compare_offers(years, current_job_salary, salary_increase_percent, offer_names,
+                                        periods_per_year=periods_per_year, tax=tax,
+                                        **{name: np.nan_to_num(offer_values[column][offer_rows]) / factor
+                                           for column, (name, factor) in offer_columns.items()})
+            ranking = comparison.ranking
+            st.dataframe({"Rank": np.arange(1, offer_count + 1),
+                          "Offer": [comparison.names[i] for i in ranking],
+                          "Overall delta (k€)": comparison.overall_delta[ranking],
+                          "Overall income (k€)": comparison.overall_income[ranking]},
+                         column_config={"Overall delta (k€)": st.column_config.NumberColumn(format="%.2f k€"),
+                                        "Overall income (k€)": st.column_config.NumberColumn(format="%.2f k€")},
+                         hide_index=True, use_container_width=True)
+            plot_offer_comparison(comparison, comparison.top(top_k))
+        show_export("job_offers", (scenario, tuple(comparison.names), comparison.overall_delta.tobytes()),
+                    lambda: offers_table(comparison))
     else:
-        plot_difference_bar_chart(df_4_difference_cumsum)
-
-st.header("Detailed calculation")
-
-# column configs:
-# create a number float %.1f only for dtype float (-> dynamic names "relevant month)
-column_config = {}
-for col in column_names:
-    column_config[col] = st.column_config.NumberColumn(
-        f"{int(col)}. year",
-        help=f"Your future income in the {int(col)}. year.",
-        min_value=0,
-        # step=1,
-        format="%.2f k€",
-    )
-# add column config for index / "type"
-# column_config[df.index.name] = st.column_config.TextColumn(width=500)
-
-st.dataframe(df, column_config=column_config, use_container_width=True)
+        st.info("Enter at least one offer with a starting salary (and more than 0 years until retirement).")
+
+if simulation_enabled:
+    st.header("Monte Carlo simulation")
+    with timer.stage("simulation"):
+        simulation = cached(
+            ("simulation", scenario, salary_increase_distribution, investment_revenue_distribution, simulation_paths),
+            lambda: simulate(years, current_job_salary, new_job_salary, salary_increase_distribution,
+                             compensation_paid, compensation_payment, compensation_annual_rate,
+                             investment_revenue_distribution, paths=simulation_paths, seed=0,
+                             periods_per_year=periods_per_year, tax=tax))
+
+    col_4_1, col_4_2, col_4_3, col_4_4 = st.columns(4)
+    help_probability_ahead = ("Share of the simulated paths in which the new job (incl. compensation payment and "
+                              "investment revenue) earns more overall than the current job.")
+    col_4_1.metric("Probability new job comes out ahead",
+                   value=f"{simulation.probability_new_job_ahead * 100:.1f} %",
+                   help=help_probability_ahead)
+    col_4_2.metric("Overall delta (median)",
+                   value=f"{simulation.overall_delta_percentile(50):.2f} k€",
+                   help="Half of the simulated paths end above, half below this overall delta.")
+    col_4_3.metric("Overall delta (5% worst case)",
+                   value=f"{simulation.overall_delta_percentile(5):.2f} k€",
+                   help="Only 5% of the simulated paths end below this overall delta.")
+    col_4_4.metric("Overall delta (5% best case)",
+                   value=f"{simulation.overall_delta_percentile(95):.2f} k€",
+                   help="Only 5% of the simulated paths end above this overall delta.")
+    plot_fan_chart(simulation)
+
+logger.debug("result cache: %s", result_cache.stats())
 
 st.text(" ")
 st.text(" ")
@@ -520,15 +884,42 @@ st.text(" ")
 
 st.write("No responsibility is taken for the accuracy of this calculations and information.")
 
-st.write("""Note: I have deliberately not taken gross-net salary into account here, as this is highly individual. You 
-may enter your your gross or net salary, but you should than stick to one type - don't  mix it up. The inflation 
-rate is not explicitly included, but you can account for it in the input field ‘Expected annual salary increase rate 
-(%)’ by entering ‘0.0%’ to assume that inflation is covered by the annual salary increases. Please also consider 
-inflation when entering the ‘Expected annual revenue from investment (%)’ field.""")
+st.write("""Note: Without 'Calculate net income (Germany)' gross-net salary is not taken into account, as this is 
+highly individual. You may enter your your gross or net salary, but you should than stick to one type - don't  mix it 
+up. The net income calculation is an approximation for employees in Germany and does not replace a payroll calculation. 
+The investment revenue is not taxed in either case. The ‘Expected annual inflation rate (%)’ is used for the 
+‘Real’ view, which shows all amounts in today's money; the ‘Nominal’ view and the key metrics show the amounts 
+as paid. The ‘Present value’ view and the present value of the overall delta discount all amounts to today with the 
+‘Discount rate for present values (%)’.""")
 
-st.write("💡", """Start with your gross salary to get a quick overview. If you want a better result, go to an <a 
+st.write("💡", """Start with your gross salary to get a quick overview. If you want a better result, activate 
+'Calculate net income (Germany)' in the sidebar, or use an <a 
 href='https://www.lexware.de/werkzeuge-ebooks/brutto-netto-rechner/' id='gross-net-link'>online gross-net 
 calculator</a> to calculate your real net salary and your <a 
 href='https://www.lexware.de/werkzeuge-ebooks/abfindungsrechner/' id='gross-net-link'> net compensation payment</a>. 
 The calculated results will be your future net income.""",
          unsafe_allow_html=True)
+
+if profiling_enabled:
+    if profiler is not None:
+        st.session_state["profile_report"] = profile_report(profiler)
+    timing_record = timer.record(years=years, compensation_paid=compensation_paid, view=data_type,
+                                 chart_type=chart_type, value_terms=value_terms, cache_bypassed=bypass_cache)
+    log_timings(timing_record)
+
+    with st.expander("Debug: timings of this rerun"):
+        st.checkbox("Bypass the result cache", key="bypass_result_cache",
+                    help="Recalculate everything on every rerun, to time the calculation instead of the cache lookup.")
+        st.dataframe({"stage": list(timing_record["stages"]), "ms": list(timing_record["stages"].values())},
+                     column_config={"ms": st.column_config.NumberColumn(format="%.2f ms")}, hide_index=True)
+        st.write(f"Total: {timing_record['total_ms']:.2f} ms. Result cache: {result_cache.stats()}")
+        if st.button("Profile the next rerun (cProfile)"):
+            st.session_state["profile_rerun"] = True
+            st.rerun()
+        if "profile_report" in st.session_state:
+            profile_text, profile_data = st.session_state["profile_report"]
+            st.download_button("Download profile", profile_data, file_name="rerun.prof",
+                               help="Load it with pstats.Stats('rerun.prof') or a viewer like snakeviz.")
+            st.code(profile_text)
+
+start_chart_warm_up()
@@ -0,0 +1,79 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from job_change_calculator.api import MAX_BODY_BYTES, create_server
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = create_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body: bytes, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+    connection.putrequest("POST", "/metrics")
+    for name, value in (headers or {"Content-Length": str(len(body))}).items():
+        connection.putheader(name, value)
+    connection.endheaders()
+    connection.send(body)
+    response = connection.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    connection.close()
+    return status, payload
+
+
+def test_metrics(server):
+    status, payload = post(server, b'{"years": 10, "current_job_salary": 100, "new_job_salary": 80}')
+    assert status == 200
+    assert payload["overall_delta"] == pytest.approx(-200.0)
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3"])
+def test_invalid_content_length(server, length):
+    status, payload = post(server, b"{}", {"Content-Length": length})
+    assert status == 400
+
+
+def test_body_too_large(server):
+    status, payload = post(server, b"", {"Content-Length": str(MAX_BODY_BYTES + 1)})
+    assert status == 413
+
+
+@pytest.mark.parametrize("body", [b'{"years": 10, "current_job_salary": NaN, "new_job_salary": 80}',
+                                  b'{"years": 10, "current_job_salary": Infinity, "new_job_salary": 80}',
+                                  b'{"years": 10, "current_job_salary": 1e400, "new_job_salary": 80}'])
+def test_non_finite_numbers(server, body):
+    status, payload = post(server, body)
+    assert status == 400
+
+
+def test_overflowing_result_is_strict_json(server):
+    status, payload = post(server, b'{"years": 100, "current_job_salary": 1e307, "new_job_salary": 1e308, '
+                                   b'"salary_increase_rate": 1e300}')
+    assert status == 500
+
+
+@pytest.mark.parametrize("value", ['"false"', '"true"', "1", "0", "null"])
+def test_compensation_paid_must_be_boolean(server, value):
+    status, payload = post(server, b'{"years": 10, "current_job_salary": 100, "new_job_salary": 80, '
+                                   b'"compensation_payment": 90, "compensation_paid": ' + value.encode() + b'}')
+    assert status == 400
+    assert payload["error"] == "'compensation_paid' must be true or false."
+
+
+def test_compensation_paid_false_ignores_the_payment(server):
+    status, payload = post(server, b'[{"years": 10, "current_job_salary": 100, "new_job_salary": 80, '
+                                   b'"compensation_payment": 90, "compensation_paid": false}, '
+                                   b'{"years": 10, "current_job_salary": 100, "new_job_salary": 80, '
+                                   b'"compensation_payment": 90}]')
+    assert status == 200
+    assert payload[0]["overall_delta"] == pytest.approx(-200.0)
+    assert payload[1]["overall_delta"] == pytest.approx(-110.0)
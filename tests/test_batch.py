@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_change_calculator.batch import YEARLY_ROWS, run_batch
+from job_change_calculator.engine import KEY_METRICS
+
+
+def write_scenarios(path, years, note=None):
+    scenarios = pd.DataFrame({"id": np.arange(len(years)), "years": years, "current_job_salary": 100.0,
+                              "new_job_salary": 80.0, "compensation_payment": 90.0,
+                              "compensation_annual_rate": 25.0})
+    if note is not None:
+        scenarios["note"] = note
+    if str(path).endswith(".parquet"):
+        scenarios.to_parquet(path, index=False)
+    else:
+        scenarios.to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("output_name", ["rows.csv", "rows.parquet"])
+def test_yearly_rows_with_empty_first_chunk(tmp_path, output_name):
+    # the first chunk has only horizons of 0 years, i.e. no output lines
+    write_scenarios(tmp_path / "scenarios.csv", [0, 0, 3, 2, 0, 1])
+    output = tmp_path / output_name
+    assert run_batch(str(tmp_path / "scenarios.csv"), str(output), yearly=True, chunk_size=2, workers=1) == 6
+    rows = pd.read_csv(output) if output_name.endswith(".csv") else pd.read_parquet(output)
+    assert list(rows.columns[-len(YEARLY_ROWS) - 1:]) == ["year", *YEARLY_ROWS]
+    assert rows["id"].astype(int).tolist() == [2, 2, 2, 3, 3, 5]  # text columns of a CSV stay text
+    assert rows["year"].tolist() == [1, 2, 3, 1, 2, 1]
+    assert not rows[list(YEARLY_ROWS)].isna().any().any()
+
+
+@pytest.mark.parametrize("input_name", ["scenarios.csv", "scenarios.parquet"])
+def test_parquet_output_with_changing_column_types(tmp_path, input_name):
+    # a text column that is empty in the first chunk must not fix its type to null/float
+    note = [None] * 5 + ["promotion", None, "part-time", None, None, "x"]
+    write_scenarios(tmp_path / input_name, list(range(11)), note)
+    output = tmp_path / "metrics.parquet"
+    assert run_batch(str(tmp_path / input_name), str(output), chunk_size=5, workers=1) == 11
+    metrics = pd.read_parquet(output)
+    assert metrics["note"].tolist()[5:8] == ["promotion", None, "part-time"]
+    assert list(metrics.columns[-len(KEY_METRICS):]) == list(KEY_METRICS)
+    assert metrics["overall_delta"].iloc[0] == 0.0
+
+
+def test_csv_output_keeps_text_columns(tmp_path):
+    write_scenarios(tmp_path / "scenarios.csv", [1, 2, 3], ["", "a", ""])
+    run_batch(str(tmp_path / "scenarios.csv"), str(tmp_path / "metrics.csv"), chunk_size=1, workers=1)
+    metrics = pd.read_csv(tmp_path / "metrics.csv")
+    assert len(metrics) == 3 and metrics["note"].tolist()[1] == "a"
+
+
+def test_years_must_be_whole_numbers(tmp_path):
+    write_scenarios(tmp_path / "scenarios.csv", [10, 10.7, 5, -1])
+    with pytest.raises(ValueError, match=r"row\(s\) 2, 4"):
+        run_batch(str(tmp_path / "scenarios.csv"), str(tmp_path / "metrics.csv"), workers=1)
+
+
+def test_compensation_paid_must_be_boolean(tmp_path):
+    scenarios = pd.DataFrame({"years": 10, "current_job_salary": 100.0, "new_job_salary": 80.0,
+                              "compensation_payment": 90.0, "compensation_annual_rate": 25.0,
+                              "compensation_paid": ["true", "false", "false"]})
+    scenarios.to_parquet(tmp_path / "text.parquet", index=False)
+    with pytest.raises(ValueError, match=r"'compensation_paid' must be true or false \(row\(s\) 1, 2, 3\)"):
+        run_batch(str(tmp_path / "text.parquet"), str(tmp_path / "metrics.csv"), workers=1)
+
+    # booleans with missing values (object column): missing means no compensation
+    scenarios["compensation_paid"] = [True, None, False]
+    scenarios.to_parquet(tmp_path / "boolean.parquet", index=False)
+    run_batch(str(tmp_path / "boolean.parquet"), str(tmp_path / "metrics.csv"), workers=1)
+    metrics = pd.read_csv(tmp_path / "metrics.csv")
+    assert metrics["compensation_payment_incl_revenue"].gt(0).tolist() == [True, False, False]
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.breakeven import (breakeven_annual_payout, breakeven_new_job_salary,
+                                             required_investment_revenue)
+from job_change_calculator.career import CareerSchedule, Segment
+from job_change_calculator.engine import key_metrics_batch
+from job_change_calculator.tax import GrossToNet
+
+CAREERS = {"constant": {}, "career": dict(current_job_career=CareerSchedule((Segment(4, 0.1),)),
+                                          new_job_career=CareerSchedule((Segment(3, 0.15, 0.04),
+                                                                         Segment(8, work_share=0.5))))}
+
+
+def overall_delta(**inputs):
+    return key_metrics_batch(**inputs)["overall_delta"]
+
+
+@pytest.mark.parametrize("careers", CAREERS)
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+def test_breakeven_new_job_salary_round_trip(careers, tax, periods_per_year):
+    inputs = dict(years=np.array([5, 15, 30]), current_job_salary=100.0, salary_increase_rate=0.02,
+                  compensation_paid=True, compensation_payment=90.0, compensation_annual_rate=25.0,
+                  investment_revenue_rate=0.05, periods_per_year=periods_per_year, tax=tax, **CAREERS[careers])
+    salary = breakeven_new_job_salary(**inputs)
+    delta = overall_delta(new_job_salary=salary, **inputs)
+    # net amounts: the tax is rounded down to whole euros, the delta has steps of a few euros
+    assert (delta >= -1e-6).all() and (delta <= (1e-6 if tax is None else 0.02)).all()
+    assert (overall_delta(new_job_salary=salary - 1e-6, **inputs) < 0).all()
+
+
+@pytest.mark.parametrize("careers", CAREERS)
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+def test_breakeven_annual_payout_round_trip(careers, tax, periods_per_year):
+    inputs = dict(years=15, current_job_salary=100.0, new_job_salary=80.0, salary_increase_rate=0.02,
+                  compensation_payment=np.array([250.0, 300.0, 400.0]), investment_revenue_rate=0.05,
+                  periods_per_year=periods_per_year, tax=tax, **CAREERS[careers])
+    payout = breakeven_annual_payout(**inputs)
+    finite = np.isfinite(payout)
+    assert finite.any()
+    delta = overall_delta(compensation_paid=True, compensation_annual_rate=np.where(finite, payout, 0.0), **inputs)
+    assert delta[finite] == pytest.approx(np.zeros(finite.sum()), abs=1e-6)
+
+
+def test_breakeven_annual_payout_limits():
+    # no payout can make up for the gap, every payout makes up for it
+    assert np.isnan(breakeven_annual_payout(10, 100, 50, 0.0, 10, 0.0))
+    assert np.isinf(breakeven_annual_payout(10, 100, 99, 0.0, 50, 0.0))
+
+
+@pytest.mark.parametrize("careers", CAREERS)
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+def test_required_investment_revenue_round_trip(careers, tax):
+    inputs = dict(years=15, current_job_salary=100.0, new_job_salary=80.0, salary_increase_rate=0.02,
+                  compensation_payment=np.array([150.0, 200.0]), compensation_annual_rate=25.0, tax=tax,
+                  **CAREERS[careers])
+    rate = required_investment_revenue(**inputs)
+    assert np.isfinite(rate).all()
+    delta = overall_delta(compensation_paid=True, investment_revenue_rate=rate, **inputs)
+    assert delta == pytest.approx(np.zeros(2), abs=1e-6)
@@ -0,0 +1,124 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from job_change_calculator import cache
+from job_change_calculator.cache import ResultCache, estimate_size, scenario_key
+from job_change_calculator.engine import project
+
+
+class Computations:
+    """compute functions that count their calls per key"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, key, size: int = 10):
+        def compute():
+            self.calls.append(key)
+            return np.full(size, float(len(self.calls)))
+        return compute
+
+
+def test_lru_evicts_least_recently_used_entry():
+    result_cache = ResultCache(max_entries=2)
+    compute = Computations()
+    result_cache.get_or_compute("a", compute("a"))
+    result_cache.get_or_compute("b", compute("b"))
+    result_cache.get_or_compute("a", compute("a"))  # "b" is now the least recently used entry
+    result_cache.get_or_compute("c", compute("c"))
+    result_cache.get_or_compute("a", compute("a"))
+    result_cache.get_or_compute("b", compute("b"))
+    assert compute.calls == ["a", "b", "c", "b"]
+    assert result_cache.stats()["evictions"] == 2
+
+
+def test_byte_limit_evicts_until_within_limit():
+    result_cache = ResultCache(max_bytes=20_000)
+    compute = Computations()
+    for key in "abc":
+        result_cache.get_or_compute(key, compute(key, size=1000))  # 8000 bytes each
+    stats = result_cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 16_000 and stats["evictions"] == 1
+    result_cache.get_or_compute("a", compute("a", size=1000))
+    assert compute.calls == ["a", "b", "c", "a"]
+
+    result_cache.get_or_compute("large", compute("large", size=5000))  # larger than the limit: evicts everything
+    assert result_cache.stats()["entries"] == 0 and result_cache.stats()["bytes"] == 0
+
+
+def test_counters():
+    result_cache = ResultCache()
+    compute = Computations()
+    assert result_cache.stats()["hit_rate"] == 0.0
+    first = result_cache.get_or_compute("a", compute("a"))
+    assert result_cache.get_or_compute("a", compute("a")) is first
+    result_cache.get_or_compute("a", compute("a"))
+    result_cache.get_or_compute("b", compute("b"))
+    stats = result_cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"], stats["entries"]) == (2, 0, 2, 2)
+    assert stats["hit_rate"] == 0.5
+    result_cache.clear()
+    assert result_cache.stats()["entries"] == 0 and result_cache.stats()["bytes"] == 0
+
+
+def test_memory_cache_does_not_serialize(monkeypatch):
+    def dumps(*args, **kwargs):
+        raise AssertionError("values of an in-memory cache must not be pickled")
+
+    monkeypatch.setattr(cache.pickle, "dumps", dumps)
+    result_cache = ResultCache()
+    projection = result_cache.get_or_compute("projection", lambda: project(30, 100, 80, 0.02, True, 90, 25, 0.05))
+    assert result_cache.stats()["bytes"] >= projection.values.nbytes
+
+
+def test_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    key = scenario_key(30, 100, 80, 0.02, True, 90, 25, 0.05)
+    expected = project(30, 100, 80, 0.02, True, 90, 25, 0.05)
+    ResultCache(path=path).get_or_compute(key, lambda: expected)
+
+    result_cache = ResultCache(path=path)
+    value = result_cache.get_or_compute(key, lambda: pytest.fail("the persisted result must be reused"))
+    assert value.index == expected.index
+    np.testing.assert_array_equal(value.values, expected.values)
+    stats = result_cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (0, 1, 0)
+    result_cache.get_or_compute(key, lambda: pytest.fail("the result must be in memory now"))
+    assert result_cache.stats()["hits"] == 1
+
+
+def test_sqlite_results_of_another_cache_version_are_not_reused(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.sqlite")
+    compute = Computations()
+    ResultCache(path=path).get_or_compute("a", compute("a"))
+    monkeypatch.setattr(cache, "CACHE_VERSION", cache.CACHE_VERSION + 1)
+    result_cache = ResultCache(path=path)
+    result_cache.get_or_compute("a", compute("a"))
+    assert compute.calls == ["a", "a"]
+    assert result_cache.stats()["misses"] == 1
+
+
+def test_sqlite_file_is_bounded(tmp_path):
+    compute = Computations()
+    result_cache = ResultCache(path=str(tmp_path / "results.sqlite"), max_disk_bytes=20_000)
+    size = len(pickle.dumps(np.zeros(1000), protocol=pickle.HIGHEST_PROTOCOL))
+    for key in "abc":
+        result_cache.get_or_compute(key, compute(key, size=1000))
+    assert result_cache.stats()["disk_evictions"] == 3 - 20_000 // size
+
+
+def test_estimate_size_counts_shared_arrays_once():
+    values = np.zeros(1000)
+    assert estimate_size(values) == 8000
+    assert 8000 < estimate_size({"a": values, "b": values}) < 9000
+    projection = project(30, 100, 80, 0.02, True, 90, 25, 0.05)
+    assert projection.values.nbytes < estimate_size(projection) < projection.values.nbytes + 2000
+    frame = projection.to_frame()
+    assert estimate_size(frame) >= frame.size * 8
+
+
+def test_scenario_key_ignores_unused_compensation_inputs():
+    assert scenario_key(10, 100, 80.0, 0.02) == scenario_key(10.0, 100.0, 80, 0.02, False, 90, 25, 0.05, 12)
+    assert scenario_key(10, 100, 80, 0.02, True, 90) != scenario_key(10, 100, 80, 0.02, True, 91)
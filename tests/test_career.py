@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.career import CareerSchedule, Segment, career_factors
+from job_change_calculator.engine import growth_factors
+
+
+def loop_factors(schedule, salary_increase_rate, years):
+    # year by year: raise, then apply the segments starting in this year
+    salary, growth_rate, work_share, factors = 1.0, salary_increase_rate, 1.0, []
+    for year in range(1, years + 1):
+        if year > 1:
+            salary *= 1 + growth_rate
+        for segment in schedule.segments:
+            if segment.start_year == year:
+                salary *= 1 + segment.salary_change
+                growth_rate = salary_increase_rate if segment.growth_rate is None else segment.growth_rate
+                work_share = segment.work_share
+        factors.append(salary * work_share)
+    return np.array(factors)
+
+
+SCHEDULE = CareerSchedule((Segment(5, 0.15, 0.04), Segment(3, work_share=0.5), Segment(8, -0.1, 0.0, 0.0),
+                           Segment(9, 0.2, 0.03), Segment(30, 0.05)))
+
+
+@pytest.mark.parametrize("salary_increase_rate", [0.0, 0.02, 0.07])
+def test_salary_factors_match_loop(salary_increase_rate):
+    np.testing.assert_allclose(SCHEDULE.salary_factors(salary_increase_rate, 25),
+                               loop_factors(SCHEDULE, salary_increase_rate, 25), rtol=1e-12)
+
+
+def test_empty_schedule_is_constant_growth():
+    np.testing.assert_array_equal(CareerSchedule().salary_factors(0.03, 30), growth_factors(0.03, 30))
+
+
+def test_batches():
+    assert SCHEDULE.salary_factors(np.array([0.0, 0.02]), 12).shape == (2, 12)
+    start_years = np.array([[1, 3, 6], [1, 2, 10]])
+    salary_changes = np.array([[0.0, 0.1, 0.2], [0.0, -0.2, 0.3]])
+    growth_rates = np.array([[0.02, 0.03, 0.0], [0.01, 0.02, 0.05]])
+    factors = career_factors(start_years, salary_changes, growth_rates, 1.0, 15)
+    for i in range(2):
+        schedule = CareerSchedule(tuple(Segment(int(start_years[i, j]), salary_changes[i, j], growth_rates[i, j])
+                                        for j in (1, 2)))
+        np.testing.assert_allclose(factors[i], loop_factors(schedule, growth_rates[i, 0], 15), rtol=1e-12)
+
+
+@pytest.mark.parametrize("segment", [dict(start_year=0), dict(start_year=2, salary_change=-1.0),
+                                     dict(start_year=2, work_share=1.5)])
+def test_invalid_segments(segment):
+    with pytest.raises(ValueError):
+        Segment(**segment)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_change_calculator import charts
+from job_change_calculator.engine import project
+
+
+def wide_frame(columns: int) -> pd.DataFrame:
+    return pd.DataFrame(np.arange(2 * columns, dtype=np.float64).reshape(2, columns),
+                        columns=range(1, columns + 1))
+
+
+@pytest.mark.parametrize("columns", [charts.MAX_POINTS_PER_TRACE + 1, 100, 1200])
+def test_decimate_reduces_wide_frames_and_keeps_endpoints(columns):
+    frame = wide_frame(columns)
+    decimated = charts.decimate(frame)
+    assert len(decimated.columns) <= charts.MAX_POINTS_PER_TRACE
+    assert decimated.columns[0] == 1 and decimated.columns[-1] == columns
+    # every n-th column, counted back from the last one
+    assert len(set(np.diff(decimated.columns[1:]))) == 1
+    pd.testing.assert_frame_equal(decimated, frame[decimated.columns])
+
+
+def test_decimate_keeps_frames_up_to_the_threshold():
+    frame = wide_frame(charts.MAX_POINTS_PER_TRACE)
+    assert charts.decimate(frame) is frame
+
+
+@pytest.mark.parametrize("plot_function, frame_index", [("plot_bar_chart", 1), ("plot_line_chart", 1),
+                                                        ("plot_difference_bar_chart", 2),
+                                                        ("plot_difference_line_char", 2)])
+@pytest.mark.parametrize("view", ["Yearly", "Overall sum"])
+def test_traces_of_long_horizons_are_bounded(plot_function, frame_index, view):
+    df = project(100, 100, 80, 0.02, True, 90, 25, 0.05).to_frame()
+    frames = charts.build_view_frames(df, True, view)
+    figure = getattr(charts, plot_function)(frames[frame_index], True, view)
+    years = [np.asarray(trace.x, dtype=np.float64) for trace in figure.data]
+    assert max(map(len, years)) <= charts.MAX_POINTS_PER_TRACE
+    # the difference bars are split into positive and negative traces: the endpoints are in one of them
+    years = np.concatenate(years)
+    assert years.min() == 1 and years.max() == 100
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.career import CareerSchedule, Segment
+from job_change_calculator.engine import (KEY_METRICS, REAL, STOCK_ROWS, compensation_payouts, key_metrics,
+                                          key_metrics_batch, project, salary_projection)
+from job_change_calculator.tax import GrossToNet
+
+
+def loop_salaries(initial_salary, salary_increase_rate, years):
+    # the original implementation of the app (add_calculations_salary_in_the_next_years)
+    salaries = [initial_salary]
+    for _ in range(1, years):
+        salaries.append(salaries[-1] * (1 + salary_increase_rate))
+    return np.array(salaries[:years])
+
+
+def loop_payouts(compensation_payment, annual_payment, investment_revenue_rate, years, periods_per_year=1):
+    # the original implementation of the app (add_compensation_payments), per period
+    payment = annual_payment / periods_per_year
+    growth = (1 + investment_revenue_rate) ** (1 / periods_per_year)
+    payouts, balances = [], []
+    remaining_balance = compensation_payment
+    for period in range(years * periods_per_year):
+        if period == years * periods_per_year - 1:
+            payouts.append(remaining_balance)
+            remaining_balance = 0
+        elif remaining_balance >= payment:
+            payouts.append(payment)
+            remaining_balance -= payment
+        else:
+            payouts.append(remaining_balance)
+            remaining_balance = 0
+        remaining_balance = remaining_balance * growth
+        balances.append(remaining_balance)
+    return np.array(payouts), np.array(balances)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_salary_projection_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    salary, rate, years = rng.uniform(10, 200), rng.uniform(0, 0.1), int(rng.integers(0, 60))
+    np.testing.assert_allclose(salary_projection(salary, rate, years), loop_salaries(salary, rate, years),
+                               rtol=1e-12)
+    monthly = salary_projection(salary, rate, years, periods_per_year=12)
+    np.testing.assert_allclose(monthly.reshape(years, 12).sum(axis=-1), loop_salaries(salary, rate, years),
+                               rtol=1e-12)
+
+
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+@pytest.mark.parametrize("seed", range(10))
+def test_compensation_payouts_match_loop(seed, periods_per_year):
+    rng = np.random.default_rng(seed)
+    years = int(rng.integers(1, 40))
+    compensation_payment, annual_payment = rng.uniform(0, 300), rng.uniform(0, 60)
+    investment_revenue_rate = rng.choice([0.0, rng.uniform(0, 0.1)])
+    payouts, balance = compensation_payouts(compensation_payment, annual_payment, investment_revenue_rate, years,
+                                            periods_per_year)
+    expected_payouts, expected_balance = loop_payouts(compensation_payment, annual_payment, investment_revenue_rate,
+                                                      years, periods_per_year)
+    np.testing.assert_allclose(payouts, expected_payouts, rtol=1e-10, atol=1e-9)
+    np.testing.assert_allclose(balance, expected_balance, rtol=1e-10, atol=1e-9)
+
+
+def test_compensation_payouts_batch_matches_scalars():
+    rng = np.random.default_rng(1)
+    compensation_payment, annual_payment, rate = rng.uniform(0, 300, 20), rng.uniform(0, 60, 20), rng.uniform(0, .1, 20)
+    payouts, balance = compensation_payouts(compensation_payment, annual_payment, rate, 25)
+    for i in range(20):
+        expected_payouts, expected_balance = compensation_payouts(compensation_payment[i], annual_payment[i], rate[i],
+                                                                  25)
+        np.testing.assert_allclose(payouts[i], expected_payouts, rtol=1e-12)
+        np.testing.assert_allclose(balance[i], expected_balance, rtol=1e-12)
+
+
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+def test_key_metrics_batch_matches_projection(tax, periods_per_year):
+    rng = np.random.default_rng(2)
+    n = 8
+    inputs = dict(years=rng.integers(0, 30, n), current_job_salary=rng.uniform(30, 150, n),
+                  new_job_salary=rng.uniform(30, 150, n), salary_increase_rate=rng.uniform(0, 0.05, n),
+                  compensation_paid=rng.random(n) < 0.7, compensation_payment=rng.uniform(0, 200, n),
+                  compensation_annual_rate=rng.uniform(0, 40, n), investment_revenue_rate=rng.uniform(0, 0.08, n))
+    batch = key_metrics_batch(**inputs, periods_per_year=periods_per_year, tax=tax)
+    assert tuple(batch) == KEY_METRICS
+    for i in range(n):
+        scenario = {name: values[i] for name, values in inputs.items()}
+        compensation_payment = scenario["compensation_payment"]
+        if tax is not None:
+            compensation_payment = tax.net_severance(compensation_payment, scenario["new_job_salary"])
+        metrics = key_metrics(project(int(scenario["years"]), scenario["current_job_salary"],
+                                      scenario["new_job_salary"], scenario["salary_increase_rate"],
+                                      bool(scenario["compensation_paid"]), scenario["compensation_payment"],
+                                      scenario["compensation_annual_rate"], scenario["investment_revenue_rate"],
+                                      periods_per_year, tax),
+                              compensation_payment if scenario["compensation_paid"] else 0.0)
+        for name in KEY_METRICS:
+            assert batch[name][i] == pytest.approx(metrics[name], rel=1e-9, abs=1e-9), name
+
+
+@pytest.mark.parametrize("options", [{}, dict(tax=GrossToNet()),
+                                     dict(new_job_career=CareerSchedule((Segment(3, 0.1),)))])
+def test_key_metrics_batch_has_broadcast_shape_of_all_inputs(options):
+    # every metric has the shape of all inputs, also those depending only on the current job or the compensation
+    batch = key_metrics_batch(years=10, current_job_salary=60.0, new_job_salary=np.array([55.0, 65.0, 75.0]),
+                              salary_increase_rate=0.02, compensation_paid=True,
+                              compensation_payment=np.array([[50.0], [100.0]]), compensation_annual_rate=10.0,
+                              **options)
+    for name in KEY_METRICS:
+        assert batch[name].shape == (2, 3), name
+    np.testing.assert_array_equal(batch["current_job_overall_salary"], batch["current_job_overall_salary"][0, 0])
+
+
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+def test_adjusted_yearly_and_monthly_agree(tax):
+    # the same scenario (no investment revenue, so the nominal yearly sums are equal) in yearly and monthly periods:
+    # every period of a year has the deflation and discount factor of the year, the first year is today's money
+    yearly = project(20, 100, 80, 0.02, True, 90, 25, 0.0, 1, tax)
+    monthly = project(20, 100, 80, 0.02, True, 90, 25, 0.0, 12, tax)
+    np.testing.assert_allclose(monthly.yearly().values, yearly.values, rtol=1e-12, atol=1e-9)
+    yearly_terms = yearly.adjusted(inflation_rate=0.03, discount_rate=0.05)
+    monthly_terms = monthly.adjusted(inflation_rate=0.03, discount_rate=0.05)
+    for term, projection in yearly_terms.items():
+        assert monthly_terms[term].index == projection.index
+        np.testing.assert_allclose(monthly_terms[term].values, projection.values, rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(projection.values[:, 0], yearly.values[:, 0] / np.where(
+            [name in STOCK_ROWS for name in yearly.index], 1.03 if term == REAL else 1.05, 1.0))
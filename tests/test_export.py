@@ -0,0 +1,83 @@
+import io
+import re
+import zipfile
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from job_change_calculator.engine import project
+from job_change_calculator.export import EXPORT_FORMATS, export_bytes, offers_table, projection_table
+from job_change_calculator.offers import compare_offers
+
+XLSX_NAMESPACE = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def read_xlsx(data: bytes) -> pd.DataFrame:
+    # the first sheet, header in the first row (reads the sheet XML, no Excel reader is needed)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        strings = [item.findtext("x:t", namespaces=XLSX_NAMESPACE) for item in
+                   ElementTree.fromstring(archive.read("xl/sharedStrings.xml")).iterfind("x:si", XLSX_NAMESPACE)]
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in sheet.iterfind("x:sheetData/x:row", XLSX_NAMESPACE):
+        cells = {}
+        for cell in row.iterfind("x:c", XLSX_NAMESPACE):
+            column = re.match(r"[A-Z]+", cell.get("r")).group()
+            value = cell.findtext("x:v", namespaces=XLSX_NAMESPACE)
+            cells[column] = strings[int(value)] if cell.get("t") == "s" else float(value)
+        rows.append([cells[column] for column in sorted(cells, key=lambda name: (len(name), name))])
+    return pd.DataFrame(rows[1:], columns=rows[0])
+
+
+def read_export(data: bytes, export_format: str) -> pd.DataFrame:
+    if export_format == "CSV":
+        return pd.read_csv(io.BytesIO(data))
+    if export_format == "Parquet":
+        return pd.read_parquet(io.BytesIO(data))
+    if export_format == "Arrow":
+        import pyarrow as pa
+
+        return pa.ipc.open_file(pa.BufferReader(data)).read_pandas()
+    return read_xlsx(data)
+
+
+def detailed_frame(projection) -> pd.DataFrame:
+    # the detailed calculation of the app (rows x years), transposed to one line per year, plus the overall sums
+    frame = projection.to_frame().T.reset_index(drop=True)
+    frame.insert(0, "year", np.arange(1, len(frame) + 1))
+    cumulative = projection.cumulative_frame().T.reset_index(drop=True)
+    return pd.concat([frame, cumulative], axis=1)
+
+
+@pytest.mark.parametrize("export_format", EXPORT_FORMATS)
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+def test_projection_export_round_trip(export_format, periods_per_year):
+    if export_format == "Excel":
+        pytest.importorskip("xlsxwriter")
+    projection = project(30, 100, 80, 0.02, True, 90, 25, 0.05, periods_per_year)
+    exported = read_export(export_bytes(projection_table(projection), export_format), export_format)
+    expected = detailed_frame(projection)
+    assert list(exported.columns) == list(expected.columns)
+    # CSV and Excel store decimal text: the values round-trip, the integer dtype of "year" may not
+    exact = export_format in ("Parquet", "Arrow")
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=exact, check_names=False,
+                                  check_exact=exact, rtol=1e-15)
+
+
+@pytest.mark.parametrize("export_format", EXPORT_FORMATS)
+def test_offers_export_round_trip(export_format):
+    if export_format == "Excel":
+        pytest.importorskip("xlsxwriter")
+    comparison = compare_offers(10, 100.0, 0.02, ["a", "b, with comma", "c"], [90.0, 120.0, 105.0], 0.02)
+    exported = read_export(export_bytes(offers_table(comparison), export_format), export_format)
+    assert list(exported.columns) == ["rank", "offer", "overall_delta", "overall_income"]
+    assert list(exported["offer"]) == ["b, with comma", "c", "a"]
+    np.testing.assert_array_equal(exported["rank"], [1, 2, 3])
+    np.testing.assert_allclose(exported["overall_delta"], np.sort(comparison.overall_delta)[::-1], rtol=1e-15)
+
+
+def test_unknown_export_format():
+    with pytest.raises(ValueError, match="Unknown export format"):
+        export_bytes(projection_table(project(5, 100, 80, 0.02)), "JSON")
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.career import CareerSchedule, Segment
+from job_change_calculator.engine import project
+from job_change_calculator.incremental import IncrementalProjection
+from job_change_calculator.tax import GrossToNet
+
+CHOICES = {"years": lambda rng: int(rng.integers(0, 40)),
+           "current_job_salary": lambda rng: float(rng.integers(30, 150)),
+           "new_job_salary": lambda rng: float(rng.integers(30, 150)),
+           "salary_increase_rate": lambda rng: float(rng.choice([0.0, 0.02, 0.035])),
+           "compensation_paid": lambda rng: bool(rng.random() < 0.7),
+           "compensation_payment": lambda rng: float(rng.integers(0, 300)),
+           "compensation_annual_rate": lambda rng: float(rng.integers(0, 50)),
+           "investment_revenue_rate": lambda rng: float(rng.choice([0.0, 0.05])),
+           "periods_per_year": lambda rng: int(rng.choice([1, 12])),
+           "tax": lambda rng: rng.choice([None, GrossToNet(), GrossToNet(2024, joint_assessment=True)]),
+           "new_job_career": lambda rng: rng.choice([None, CareerSchedule((Segment(3, 0.1),
+                                                                           Segment(6, work_share=0.5)))])}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_project_after_random_changes(seed):
+    rng = np.random.default_rng(seed)
+    inputs = {name: choose(rng) for name, choose in CHOICES.items()}
+    incremental = IncrementalProjection()
+    for _ in range(40):
+        for name in rng.choice(list(CHOICES), size=int(rng.integers(1, 3)), replace=False):
+            inputs[name] = CHOICES[name](rng)
+        result = incremental.project(**inputs)
+        expected = project(**inputs)
+        assert result.index == expected.index
+        np.testing.assert_allclose(result.values, expected.values, rtol=1e-12, atol=1e-9)
+        expected_sums = expected.cumulative_rows()
+        for name, values in result.cumulative_rows().items():
+            np.testing.assert_allclose(values, expected_sums[name], rtol=1e-12, atol=1e-9)
+
+
+def test_unchanged_inputs_reuse_all_nodes():
+    incremental = IncrementalProjection()
+    incremental.project(10, 100, 80, 0.02, True, 90, 25, 0.05)
+    incremental.project(10, 100, 80, 0.02, True, 90, 25, 0.05)
+    assert set(incremental.last_actions.values()) == {"reused"}
+    incremental.project(20, 100, 80, 0.02, True, 90, 25, 0.05)
+    assert set(incremental.last_actions.values()) == {"extended"}
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.engine import DIFFERENCE_NJ_CJ_COMP, key_metrics, net_compensation_payment, project
+from job_change_calculator.offers import compare_offers
+from job_change_calculator.tax import GrossToNet
+
+
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+@pytest.mark.parametrize("years", [0, 1, 20])
+def test_single_offer_matches_projection(tax, periods_per_year, years):
+    comparison = compare_offers(years, 100.0, 0.02, ["offer"], 85.0, 0.02, compensation_payment=120.0,
+                                compensation_annual_rate=30.0, investment_revenue_rate=0.04,
+                                periods_per_year=periods_per_year, tax=tax)
+    projection = project(years, 100.0, 85.0, 0.02, True, 120.0, 30.0, 0.04, periods_per_year, tax)
+    metrics = key_metrics(projection, net_compensation_payment(120.0, 85.0, tax))
+    assert comparison.overall_delta[0] == pytest.approx(metrics["overall_delta"], rel=1e-12, abs=1e-9)
+    assert comparison.overall_income[0] == pytest.approx(
+        metrics["new_job_overall_salary"] + metrics["compensation_payment_incl_revenue"], rel=1e-12, abs=1e-9)
+    np.testing.assert_allclose(comparison.yearly_delta[0], projection.yearly().row(DIFFERENCE_NJ_CJ_COMP),
+                               rtol=1e-12, atol=1e-9)
+
+
+def test_signing_bonus_is_paid_in_the_first_year():
+    without_bonus = compare_offers(10, 100.0, 0.02, ["a"], 90.0, 0.03)
+    with_bonus = compare_offers(10, 100.0, 0.02, ["a"], 90.0, 0.03, signing_bonus=15.0)
+    np.testing.assert_allclose(with_bonus.yearly_delta - without_bonus.yearly_delta, [[15.0] + [0.0] * 9])
+
+
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+def test_ranking_follows_overall_delta(tax):
+    rng = np.random.default_rng(5)
+    n = 12
+    offers = dict(new_job_salary=rng.uniform(60, 140, n), salary_increase_rate=rng.uniform(0, 0.05, n),
+                  signing_bonus=rng.uniform(0, 20, n), compensation_payment=rng.uniform(0, 150, n),
+                  compensation_annual_rate=rng.uniform(5, 40, n), investment_revenue_rate=rng.uniform(0, 0.06, n))
+    names = [f"offer {i}" for i in range(n)]
+    comparison = compare_offers(15, 100.0, 0.02, names, **offers, tax=tax)
+    # the batch equals the offers evaluated one by one
+    for i in range(n):
+        single = compare_offers(15, 100.0, 0.02, [names[i]], **{name: values[i] for name, values in offers.items()},
+                                tax=tax)
+        assert comparison.overall_delta[i] == pytest.approx(single.overall_delta[0], rel=1e-12)
+    ranked_delta = comparison.overall_delta[comparison.ranking]
+    assert (np.diff(ranked_delta) <= 0).all()
+    assert sorted(comparison.ranking) == list(range(n))
+    np.testing.assert_array_equal(comparison.top(3), comparison.ranking[:3])
+
+
+def test_ties_keep_the_order_of_the_offers():
+    comparison = compare_offers(10, 100.0, 0.02, ["a", "b", "c", "d"], [90.0, 110.0, 90.0, 110.0], 0.02)
+    np.testing.assert_array_equal(comparison.ranking, [1, 3, 0, 2])
+    assert len(comparison.top(0)) == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.engine import (CURRENT_JOB, DIFFERENCE_NJ_CJ_COMP, REAL, TOTAL_NEW_JOB, growth_factors,
+                                          project)
+from job_change_calculator.payout_plan import (LEVEL_REAL_INCOME, MINIMAX_SHORTFALL, level_payouts,
+                                               optimal_payouts, plan_projection)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_level_payouts_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    needs, weights, budget = rng.normal(10, 5, 20), rng.uniform(0.3, 1, 20), rng.uniform(0, 100)
+    payouts, level = level_payouts(needs, weights, budget)
+    assert (payouts >= 0).all()
+    assert payouts @ weights == pytest.approx(budget)
+    assert (needs - payouts).max() == pytest.approx(level)
+    # no other feasible plan has a lower maximum
+    others = rng.dirichlet(np.ones(20), 1000) * budget / weights
+    assert ((needs - others).max(axis=-1) >= level - 1e-9).all()
+
+
+def test_minimax_shortfall_plan():
+    plan = optimal_payouts(20, 100, 80, 0.02, 300, 0.05)
+    assert plan.balance[-1] == pytest.approx(0.0, abs=1e-9)
+    # the account: payouts discounted with the revenue rate add up to the compensation
+    assert plan.payouts @ (1 / growth_factors(0.05, 20)) == pytest.approx(300)
+    projection = plan_projection(project(20, 100, 80, 0.02, True, 300, 25, 0.05), plan)
+    assert -projection.row(DIFFERENCE_NJ_CJ_COMP).min() == pytest.approx(plan.level)
+    np.testing.assert_array_equal(projection.row(CURRENT_JOB), project(20, 100, 80, 0.02).row(CURRENT_JOB))
+
+
+def test_level_real_income_plan():
+    plan = optimal_payouts(10, 100, 80, 0.0, 1000, 0.0, LEVEL_REAL_INCOME, inflation_rate=0.02)
+    real_income = (80 + plan.payouts) / growth_factors(0.02, 10)
+    np.testing.assert_allclose(real_income, plan.level)
+
+
+def test_monthly_level_real_income_plan_is_level_in_yearly_real_terms():
+    # the months of a year share the deflator of the year, like in Projection.adjusted
+    plan = optimal_payouts(10, 100, 80, 0.0, 1000, 0.0, LEVEL_REAL_INCOME, inflation_rate=0.02, periods_per_year=12)
+    projection = plan_projection(project(10, 100, 80, 0.0, True, 1000, 0.0, 0.0, 12), plan)
+    real_income = projection.adjusted(inflation_rate=0.02)[REAL].row(TOTAL_NEW_JOB)
+    np.testing.assert_allclose(real_income, 12 * plan.level)
+
+
+def test_batch_matches_scalars():
+    compensation_payment = np.array([50.0, 150.0, 400.0])
+    plans = optimal_payouts(15, 100, 80, 0.02, compensation_payment, 0.04, MINIMAX_SHORTFALL, periods_per_year=12)
+    for i, payment in enumerate(compensation_payment):
+        plan = optimal_payouts(15, 100, 80, 0.02, payment, 0.04, MINIMAX_SHORTFALL, periods_per_year=12)
+        np.testing.assert_allclose(plans.payouts[i], plan.payouts, rtol=1e-12, atol=1e-12)
+        assert plans.level[i] == pytest.approx(plan.level)
+
+
+def test_unknown_objective():
+    with pytest.raises(ValueError):
+        optimal_payouts(10, 100, 80, 0.02, 90, objective="unknown")
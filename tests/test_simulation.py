@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.engine import DIFFERENCE_NJ_CJ_COMP, key_metrics, net_compensation_payment, project
+from job_change_calculator.simulation import RateDistribution, simulate
+from job_change_calculator.tax import GrossToNet
+
+SCENARIO = dict(years=25, current_job_salary=100.0, new_job_salary=80.0, compensation_paid=True,
+                compensation_payment=90.0, compensation_annual_rate=25.0)
+
+
+@pytest.mark.parametrize("kind", ["Fixed", "Normal", "Lognormal"])
+@pytest.mark.parametrize("tax", [None, GrossToNet()])
+@pytest.mark.parametrize("periods_per_year", [1, 12])
+def test_zero_volatility_matches_projection(kind, tax, periods_per_year):
+    result = simulate(**SCENARIO, salary_increase=RateDistribution(kind, 0.02),
+                      investment_revenue=RateDistribution(kind, 0.05), paths=64, seed=1, chunk_size=512,
+                      periods_per_year=periods_per_year, tax=tax)
+    projection = project(SCENARIO["years"], SCENARIO["current_job_salary"], SCENARIO["new_job_salary"], 0.02, True,
+                         SCENARIO["compensation_payment"], SCENARIO["compensation_annual_rate"], 0.05,
+                         periods_per_year, tax)
+    compensation_payment = net_compensation_payment(SCENARIO["compensation_payment"], SCENARIO["new_job_salary"], tax)
+    overall_delta = key_metrics(projection, compensation_payment)["overall_delta"]
+    np.testing.assert_allclose(result.overall_delta, overall_delta, rtol=1e-9)
+    # every percentile of the fan is the cumulative delta of the deterministic projection
+    cumulative_delta = np.cumsum(projection.yearly().row(DIFFERENCE_NJ_CJ_COMP))
+    np.testing.assert_allclose(result.cumulative_delta_percentiles,
+                               np.broadcast_to(cumulative_delta, result.cumulative_delta_percentiles.shape),
+                               rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("kind", ["Normal", "Lognormal"])
+def test_antithetic_draws_have_zero_mean_shock(kind):
+    distribution = RateDistribution(kind, 0.03, 0.1)
+    rates = distribution.sample(np.random.default_rng(7), (1000, 20))
+    # the shock is the standard normal draw: rate - mean (normal) or the centered log(1 + rate) (lognormal)
+    shock = rates if kind == "Normal" else np.log1p(rates)
+    shock = shock - shock.mean()
+    np.testing.assert_allclose(shock[:500], -shock[500:], atol=1e-12)
+    assert rates.mean() == pytest.approx(0.03, abs=1e-3 if kind == "Lognormal" else 1e-12)
+
+
+def test_same_seed_gives_same_result():
+    inputs = dict(SCENARIO, salary_increase=RateDistribution("Normal", 0.02, 0.01),
+                  investment_revenue=RateDistribution("Historical bootstrap", history=(-0.1, 0.05, 0.2)),
+                  paths=3000, chunk_size=1024)
+    first = simulate(**inputs, seed=42)
+    second = simulate(**inputs, seed=42)
+    np.testing.assert_array_equal(first.overall_delta, second.overall_delta)
+    np.testing.assert_array_equal(first.cumulative_delta_percentiles, second.cumulative_delta_percentiles)
+    assert not np.array_equal(first.overall_delta, simulate(**inputs, seed=43).overall_delta)
+
+
+@pytest.mark.parametrize("chunk_size", [1024, 100_000])
+def test_fan_percentiles_are_monotone(chunk_size):
+    result = simulate(**SCENARIO, salary_increase=RateDistribution("Lognormal", 0.02, 0.03),
+                      investment_revenue=RateDistribution("Normal", 0.05, 0.15), paths=5000, seed=3,
+                      chunk_size=chunk_size, percentiles=(5, 25, 50, 75, 95))
+    assert (np.diff(result.cumulative_delta_percentiles, axis=0) >= 0).all()
+    assert result.cumulative_delta_percentiles.shape == (5, SCENARIO["years"])
+    if chunk_size >= result.paths:  # one chunk: the exact percentiles of all paths
+        np.testing.assert_allclose(result.cumulative_delta_percentiles[:, -1],
+                                   np.percentile(result.overall_delta, (5, 25, 50, 75, 95)), rtol=1e-12)
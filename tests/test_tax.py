@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from job_change_calculator.tax import TAX_YEARS, GrossToNet, tariff_income_tax
+
+# income tax of § 32a EStG (single assessment) for a taxable income, per tax year
+TARIFF_VALUES = {2024: {11_784: 0, 15_000: 548, 20_000: 1_725, 50_000: 10_872, 100_000: 31_363, 300_000: 116_028},
+                 2025: {12_096: 0, 15_000: 485, 20_000: 1_639, 50_000: 10_691, 100_000: 31_088, 300_000: 115_753},
+                 2026: {12_348: 0, 15_000: 435, 20_000: 1_570, 50_000: 10_548, 100_000: 30_864, 300_000: 115_529}}
+
+
+@pytest.mark.parametrize("tax_year", sorted(TARIFF_VALUES))
+def test_tariff_values(tax_year):
+    incomes, taxes = zip(*TARIFF_VALUES[tax_year].items())
+    assert tariff_income_tax(np.array(incomes), tax_year).tolist() == list(taxes)
+
+
+@pytest.mark.parametrize("tax_year", sorted(TAX_YEARS))
+def test_tariff_is_continuous_and_increasing(tax_year):
+    incomes = np.arange(0, 400_000, 7.0)
+    tax = tariff_income_tax(incomes, tax_year)
+    assert (np.diff(tax) >= 0).all()
+    assert np.diff(tax).max() <= 7 * 0.45 + 1  # no jumps at the zone limits
+
+
+def test_joint_assessment_is_splitting():
+    assert GrossToNet(joint_assessment=True).income_tax(80_000) == 2 * tariff_income_tax(40_000)
+
+
+def test_net_income():
+    tax = GrossToNet()
+    net = tax.net_income(np.array([0.0, 30.0, 60.0, 150.0]))
+    assert net[0] == 0.0
+    assert (np.diff(net) > 0).all() and (net[1:] < [30.0, 60.0, 150.0]).all()
+    # large arrays are converted in blocks with the same result
+    gross = np.linspace(0, 300, 40_000)
+    np.testing.assert_array_equal(tax.net_income(gross), np.concatenate([tax.net_income(part)
+                                                                         for part in np.split(gross, 8)]))
+
+
+def test_severance_relief_lowers_the_tax():
+    assert GrossToNet(severance_relief=True).net_severance(100, 60) > GrossToNet(severance_relief=False).net_severance(
+        100, 60)
+
+
+def test_unknown_tax_year():
+    with pytest.raises(ValueError):
+        GrossToNet(1999)